@@ -6,10 +6,13 @@ class Settings(BaseSettings):
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 5000
+    WORKERS: int = 1  # >1 pre-forks workers that share the loaded model (CPU only)
+    UDS: str = ""  # Listen on a Unix socket instead of HOST:PORT
 
     # Models
     MODEL_NAME: str = "distilbert-base-uncased"
     MODEL_CACHE_DIR: str = "./models"
+    MODEL_CACHE_CONVERT: bool = True  # Save a safetensors copy of the base model for fast (mmapped) restarts
     DEVICE: str = "cpu"  # or "cuda" for GPU
 
     # Detection
@@ -20,6 +23,7 @@ class Settings(BaseSettings):
     PATTERN_WEIGHT: float = 0.40
     STATISTICAL_WEIGHT: float = 0.30
     ML_WEIGHT: float = 0.30
+    ENSEMBLE_CONFIG_PATH: str = ""  # Fitted weights/calibration/thresholds (backend benchmarks.ensemble_eval)
 
     # Thresholds
     AI_THRESHOLD: float = 0.85
@@ -27,6 +31,15 @@ class Settings(BaseSettings):
     MIXED_THRESHOLD: float = 0.45
     LIKELY_HUMAN_THRESHOLD: float = 0.25
 
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = '{}'  # Per-logger overrides, e.g. '{"ml_detector": "DEBUG"}'
+    LOG_FORMAT: str = "text"  # text or json
+    LOG_SAMPLE_RATE: float = 0.1  # Fraction of DEBUG records kept
+    LOG_RATE_LIMIT_BURST: int = 5  # Repeated warnings/errors allowed per interval
+    LOG_RATE_LIMIT_INTERVAL: float = 60.0
+    LOG_QUEUE_SIZE: int = 10000
+
     class Config:
         env_file = ".env"
 
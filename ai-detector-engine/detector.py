@@ -1,15 +1,18 @@
 """Ensemble AI detector combining multiple methods"""
 
+import json
+import math
 import time
-from typing import Dict
+from typing import Dict, List
 import logging
 
 from pattern_detector import PatternDetector
 from statistical_detector import StatisticalDetector
 from ml_detector import MLDetector
 from config import settings
+from logging_setup import configure_logging
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 class EnsembleDetector:
@@ -22,11 +25,39 @@ class EnsembleDetector:
         self.ml_detector = MLDetector(
             model_name=settings.MODEL_NAME,
             cache_dir=settings.MODEL_CACHE_DIR,
-            device=settings.DEVICE
+            device=settings.DEVICE,
+            convert_cache=settings.MODEL_CACHE_CONVERT
         )
 
+        # Ensemble weights and thresholds; ENSEMBLE_CONFIG_PATH overrides the settings
+        self.weights = {
+            'pattern': settings.PATTERN_WEIGHT,
+            'statistical': settings.STATISTICAL_WEIGHT,
+            'ml': settings.ML_WEIGHT
+        }
+        self.fallback_weights = {'pattern': 0.55, 'statistical': 0.45}  # Without ML
+        self.calibration = None  # {'a', 'b'}: p = sigmoid(a * score + b)
+        self.thresholds = {
+            'ai': settings.AI_THRESHOLD,
+            'likely_ai': settings.LIKELY_AI_THRESHOLD,
+            'mixed': settings.MIXED_THRESHOLD,
+            'likely_human': settings.LIKELY_HUMAN_THRESHOLD
+        }
+        if settings.ENSEMBLE_CONFIG_PATH:
+            self._load_config(settings.ENSEMBLE_CONFIG_PATH)
+
         logger.info("Ensemble detector initialized")
 
+    def _load_config(self, path: str):
+        """Apply a config fitted by the backend's benchmarks.ensemble_eval"""
+        with open(path) as f:
+            config = json.load(f)
+        self.weights.update(config.get('weights', {}))
+        self.fallback_weights.update(config.get('fallback_weights', {}))
+        self.thresholds.update(config.get('thresholds', {}))
+        self.calibration = config.get('calibration') or None
+        logger.info("Loaded ensemble config %s from %s", config.get('version'), path)
+
     def detect(self, text: str) -> Dict:
         """
         Detect AI content using ensemble of methods
@@ -46,21 +77,49 @@ class EnsembleDetector:
 
         # Validate input
         if not text or len(text.strip()) < settings.MIN_TEXT_LENGTH:
-            return {
-                'ai_probability': 0.5,
-                'classification': 'UNCERTAIN',
-                'confidence': 0.1,
-                'scores': {},
-                'inference_time_ms': 0,
-                'error': f'Text too short (minimum {settings.MIN_TEXT_LENGTH} characters)'
-            }
+            return self._too_short_result()
 
         if len(text) > settings.MAX_TEXT_LENGTH:
             text = text[:settings.MAX_TEXT_LENGTH]
 
+        return self._ensemble(text, self.statistical_detector.detect(text), start_time)
+
+    def detect_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Detect AI content for many texts (bulk path)
+
+        Statistical features are computed for the whole batch at once; the
+        pattern and ML detectors still run per text. inference_time_ms of
+        each result includes its share of the batched statistical pass.
+        """
+        start_time = time.time()
+
+        valid = [
+            i for i, text in enumerate(texts)
+            if text and len(text.strip()) >= settings.MIN_TEXT_LENGTH
+        ]
+        truncated = [texts[i][:settings.MAX_TEXT_LENGTH] for i in valid]
+        statistical_results = self.statistical_detector.detect_batch(truncated)
+
+        results: List[Dict] = [self._too_short_result() for _ in texts]
+        for i, text, statistical_result in zip(valid, truncated, statistical_results):
+            results[i] = self._ensemble(text, statistical_result, start_time)
+        return results
+
+    def _too_short_result(self) -> Dict:
+        return {
+            'ai_probability': 0.5,
+            'classification': 'UNCERTAIN',
+            'confidence': 0.1,
+            'scores': {},
+            'inference_time_ms': 0,
+            'error': f'Text too short (minimum {settings.MIN_TEXT_LENGTH} characters)'
+        }
+
+    def _ensemble(self, text: str, statistical_result: Dict, start_time: float) -> Dict:
+        """Run the remaining detectors and combine them with the statistical result"""
         # Run all detectors
         pattern_result = self.pattern_detector.detect(text)
-        statistical_result = self.statistical_detector.detect(text)
         ml_result = self.ml_detector.detect(text)
 
         # Extract scores
@@ -72,21 +131,22 @@ class EnsembleDetector:
         if ml_result.get('available', False):
             # All three methods available
             combined_score = (
-                settings.PATTERN_WEIGHT * pattern_score +
-                settings.STATISTICAL_WEIGHT * statistical_score +
-                settings.ML_WEIGHT * ml_score
+                self.weights['pattern'] * pattern_score +
+                self.weights['statistical'] * statistical_score +
+                self.weights['ml'] * ml_score
             )
             base_confidence = 0.85  # High confidence with all methods
         else:
             # ML not available, re-weight pattern and statistical
-            pattern_weight = 0.55
-            statistical_weight = 0.45
             combined_score = (
-                pattern_weight * pattern_score +
-                statistical_weight * statistical_score
+                self.fallback_weights['pattern'] * pattern_score +
+                self.fallback_weights['statistical'] * statistical_score
             )
             base_confidence = 0.70  # Lower confidence without ML
 
+        if self.calibration:
+            combined_score = 1 / (1 + math.exp(-(self.calibration['a'] * combined_score + self.calibration['b'])))
+
         # Adjust confidence based on agreement between methods
         scores = [pattern_score, statistical_score, ml_score if ml_result.get('available') else None]
         scores = [s for s in scores if s is not None]
@@ -100,13 +160,13 @@ class EnsembleDetector:
             confidence = base_confidence * 0.6
 
         # Classification
-        if combined_score >= settings.AI_THRESHOLD:
+        if combined_score >= self.thresholds['ai']:
             classification = "AI"
-        elif combined_score >= settings.LIKELY_AI_THRESHOLD:
+        elif combined_score >= self.thresholds['likely_ai']:
             classification = "LIKELY_AI"
-        elif combined_score >= settings.MIXED_THRESHOLD:
+        elif combined_score >= self.thresholds['mixed']:
             classification = "MIXED"
-        elif combined_score >= settings.LIKELY_HUMAN_THRESHOLD:
+        elif combined_score >= self.thresholds['likely_human']:
             classification = "LIKELY_HUMAN"
         else:
             classification = "HUMAN"
@@ -136,11 +196,7 @@ class EnsembleDetector:
                 }
             },
             'inference_time_ms': round(inference_time, 2),
-            'weights_used': {
-                'pattern': settings.PATTERN_WEIGHT if ml_result.get('available') else 0.55,
-                'statistical': settings.STATISTICAL_WEIGHT if ml_result.get('available') else 0.45,
-                'ml': settings.ML_WEIGHT if ml_result.get('available') else 0
-            }
+            'weights_used': self.weights if ml_result.get('available') else {**self.fallback_weights, 'ml': 0}
         }
 
     def get_stats(self) -> Dict:
@@ -150,15 +206,9 @@ class EnsembleDetector:
             'ml_available': self.ml_detector.loaded,
             'model_name': settings.MODEL_NAME,
             'device': settings.DEVICE,
-            'thresholds': {
-                'ai': settings.AI_THRESHOLD,
-                'likely_ai': settings.LIKELY_AI_THRESHOLD,
-                'mixed': settings.MIXED_THRESHOLD,
-                'likely_human': settings.LIKELY_HUMAN_THRESHOLD
-            },
-            'weights': {
-                'pattern': settings.PATTERN_WEIGHT,
-                'statistical': settings.STATISTICAL_WEIGHT,
-                'ml': settings.ML_WEIGHT
-            }
+            'model_load': self.ml_detector.load_report,
+            'thresholds': self.thresholds,
+            'weights': self.weights,
+            'fallback_weights': self.fallback_weights,
+            'calibration': self.calibration
         }
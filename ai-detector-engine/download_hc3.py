@@ -6,127 +6,141 @@ HC3 = Human ChatGPT Comparison Corpus
 Contains ~24,000 human and ChatGPT generated Q&A pairs
 """
 
+import os
+import csv
+import random
+import hashlib
 import logging
+from collections import Counter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _hc3_rows(stream, max_samples, stats):
+    """Filtered, deduplicated rows from the streamed dataset"""
+    seen = set()  # ~24k hashes at most
+    for i, item in enumerate(stream):
+        if max_samples and i >= max_samples // 2:
+            break
+
+        question = item.get('question', '')[:100]  # First 100 chars
+        # First human answer (label 0) and first ChatGPT answer (label 1)
+        for answers, label, source in (
+            (item.get('human_answers') or [], 0, 'hc3_human'),
+            (item.get('chatgpt_answers') or [], 1, 'hc3_chatgpt'),
+        ):
+            text = (answers[0] or '').strip() if answers else ''
+            if len(text) <= 20:  # Filter out very short texts
+                continue
+            digest = hashlib.sha256(' '.join(text.lower().split()).encode()).digest()[:16]
+            if digest in seen:
+                stats['duplicates'] += 1
+                continue
+            seen.add(digest)
+            stats[label] += 1
+            yield {'text': text, 'label': label, 'source': source, 'question': question}
+
+        if (i + 1) % 5000 == 0:
+            logger.info("  Streamed %d entries, kept %d samples...", i + 1, stats[0] + stats[1])
+
+
 def download_hc3_dataset(output_file: str = "training_data_hc3.csv", max_samples: int = None):
     """
     Download HC3 dataset and convert to training format
 
+    The dataset is streamed and written to CSV as it arrives (no full
+    download, no in-memory table); a second pass over the local file
+    trims the larger class when balancing, keeping a seeded uniform sample
+    of it (selection sampling). train.py shuffles on split.
+
     Args:
         output_file: Output CSV filename
         max_samples: Limit number of samples (None = all)
     """
     try:
         from datasets import load_dataset
-        import pandas as pd
     except ImportError:
         logger.error("❌ Required libraries not installed")
         logger.error("\nPlease run:")
-        logger.error("  pip3 install datasets pandas")
+        logger.error("  pip3 install datasets")
         return False
 
     logger.info("="*80)
     logger.info("HC3 DATASET DOWNLOAD")
     logger.info("="*80)
-    logger.info("\nDownloading HC3 dataset from Hugging Face...")
-    logger.info("This may take 5-10 minutes depending on your internet speed.")
+    logger.info("\nStreaming HC3 dataset from Hugging Face...")
     logger.info("")
 
+    fields = ['text', 'label', 'source', 'question']
+    staging = output_file + '.partial'
     try:
-        # Load dataset
-        dataset = load_dataset('Hello-SimpleAI/HC3', 'all', trust_remote_code=True)
-
-        logger.info("✓ Dataset downloaded successfully!")
-        logger.info(f"  Total entries: {len(dataset['train'])}")
-
-        # Convert to our format
-        logger.info("\nConverting to training format...")
-        data = []
-
-        for i, item in enumerate(dataset['train']):
-            if max_samples and i >= max_samples // 2:
-                break
-
-            # Get human and ChatGPT answers
-            human_answers = item.get('human_answers', [])
-            chatgpt_answers = item.get('chatgpt_answers', [])
-
-            # Add first human answer
-            if human_answers and len(human_answers) > 0:
-                text = human_answers[0]
-                if text and len(text.strip()) > 20:  # Filter out very short texts
-                    data.append({
-                        'text': text.strip(),
-                        'label': 0,  # Human
-                        'source': 'hc3_human',
-                        'question': item.get('question', '')[:100]  # First 100 chars
-                    })
-
-            # Add first ChatGPT answer
-            if chatgpt_answers and len(chatgpt_answers) > 0:
-                text = chatgpt_answers[0]
-                if text and len(text.strip()) > 20:
-                    data.append({
-                        'text': text.strip(),
-                        'label': 1,  # AI
-                        'source': 'hc3_chatgpt',
-                        'question': item.get('question', '')[:100]
-                    })
-
-        logger.info(f"✓ Converted {len(data)} samples")
-
-        # Create DataFrame
-        df = pd.DataFrame(data)
-
-        # Shuffle
-        df = df.sample(frac=1, random_state=42).reset_index(drop=True)
-
-        # Balance classes if needed
-        human_count = len(df[df['label'] == 0])
-        ai_count = len(df[df['label'] == 1])
-
+        stream = load_dataset('Hello-SimpleAI/HC3', 'all', split='train', streaming=True, trust_remote_code=True)
+
+        # Pass 1: stream, filter, dedupe and write
+        logger.info("Converting to training format...")
+        stats = Counter()
+        with open(staging, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for row in _hc3_rows(stream, max_samples, stats):
+                writer.writerow(row)
+
+        human_count, ai_count = stats[0], stats[1]
+        logger.info("✓ Converted %d samples (%d duplicates skipped)", human_count + ai_count, stats['duplicates'])
+
+        # Pass 2: balance classes if needed, reading the local file back
+        needed = {0: human_count, 1: ai_count}
         if abs(human_count - ai_count) > 100:
-            logger.info(f"\n⚠ Dataset imbalanced: {human_count} human, {ai_count} AI")
+            logger.info("\n⚠ Dataset imbalanced: %d human, %d AI", human_count, ai_count)
             logger.info("  Balancing...")
-
-            # Keep equal numbers
             min_count = min(human_count, ai_count)
-            df_human = df[df['label'] == 0].iloc[:min_count]
-            df_ai = df[df['label'] == 1].iloc[:min_count]
-
-            df = pd.concat([df_human, df_ai], ignore_index=True)
-            df = df.sample(frac=1, random_state=42).reset_index(drop=True)
-
-            logger.info(f"✓ Balanced to {len(df)} total samples")
-
-        # Save
-        df.to_csv(output_file, index=False)
+            needed = {0: min_count, 1: min_count}
+        balancing = needed[0] != human_count or needed[1] != ai_count
+
+        # Keep each row with probability needed/unseen: a uniform sample of
+        # each class in one pass, not just the rows that streamed in first
+        rng = random.Random(42)
+        unseen = {0: human_count, 1: ai_count}
+        written = Counter()
+        with open(staging, newline='') as src, open(output_file, 'w', newline='') as dst:
+            writer = csv.DictWriter(dst, fieldnames=fields)
+            writer.writeheader()
+            for row in csv.DictReader(src):
+                label = int(row['label'])
+                keep = rng.random() * unseen[label] < needed[label]
+                unseen[label] -= 1
+                if keep:
+                    needed[label] -= 1
+                    writer.writerow(row)
+                    written[label] += 1
+        os.remove(staging)
+
+        total = written[0] + written[1]
+        if balancing:
+            logger.info("✓ Balanced to %d total samples", total)
 
         logger.info("\n" + "="*80)
         logger.info("SUCCESS!")
         logger.info("="*80)
-        logger.info(f"✓ Dataset saved to: {output_file}")
-        logger.info(f"✓ Total samples: {len(df)}")
-        logger.info(f"✓ Human samples: {len(df[df['label'] == 0])}")
-        logger.info(f"✓ AI samples: {len(df[df['label'] == 1])}")
-        logger.info(f"✓ Balance ratio: {len(df[df['label'] == 0]) / len(df[df['label'] == 1]):.2f}")
+        logger.info("✓ Dataset saved to: %s", output_file)
+        logger.info("✓ Total samples: %d", total)
+        logger.info("✓ Human samples: %d", written[0])
+        logger.info("✓ AI samples: %d", written[1])
+        logger.info("✓ Balance ratio: %.2f", written[0] / max(written[1], 1))
         logger.info("\n" + "="*80)
         logger.info("NEXT STEPS")
         logger.info("="*80)
-        logger.info(f"\n1. Preview the data:")
-        logger.info(f"   python3 -c \"import pandas as pd; print(pd.read_csv('{output_file}').head(10))\"")
-        logger.info(f"\n2. Start training:")
-        logger.info(f"   python3 train.py --dataset {output_file} --epochs 3")
-        logger.info(f"\n3. This will take ~30 minutes with {len(df)} samples")
+        logger.info("\n1. Preview the data:")
+        logger.info("   python3 -c \"import pandas as pd; print(pd.read_csv('%s').head(10))\"", output_file)
+        logger.info("\n2. Start training:")
+        logger.info("   python3 train.py --dataset %s --epochs 3", output_file)
+        logger.info("\n3. This will take ~30 minutes with %d samples", total)
         logger.info("="*80 + "\n")
 
         return True
 
     except Exception as e:
-        logger.error(f"\n❌ Error downloading dataset: {e}")
+        logger.error("\n❌ Error downloading dataset: %s", e)
         logger.error("\nTroubleshooting:")
         logger.error("1. Check internet connection")
         logger.error("2. Try: pip3 install --upgrade datasets")
@@ -4,13 +4,17 @@ import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from typing import Dict, Optional
 import os
+import time
+import shutil
 import logging
+import tempfile
 
 logger = logging.getLogger(__name__)
 
 class MLDetector:
     def __init__(self, model_name: str = "distilbert-base-uncased",
-                 cache_dir: str = "./models", device: str = "cpu"):
+                 cache_dir: str = "./models", device: str = "cpu",
+                 convert_cache: bool = True):
         """
         Initialize ML detector with transformer model
 
@@ -18,10 +22,14 @@ class MLDetector:
             model_name: HuggingFace model name or path to fine-tuned model
             cache_dir: Directory to cache models
             device: 'cpu' or 'cuda'
+            convert_cache: Save a safetensors copy of a downloaded model so
+                later starts memory-map it instead of re-reading the checkpoint
         """
         self.device = device
         self.model_name = model_name
         self.cache_dir = cache_dir
+        self.convert_cache = convert_cache
+        self.load_report: Dict = {}
 
         self.model = None
         self.tokenizer = None
@@ -31,25 +39,44 @@ class MLDetector:
         try:
             self._load_model()
         except Exception as e:
-            logger.warning(f"Could not load ML model: {e}. Using fallback detection.")
+            logger.warning("Could not load ML model: %s. Using fallback detection.", e)
 
     def _load_model(self):
-        """Load the transformer model"""
+        """
+        Load the transformer model
+
+        Prefers safetensors, which transformers memory-maps, and
+        low_cpu_mem_usage (no random init pass, no second copy of the
+        weights), so cold start is mostly page faults on touched weights.
+        """
         os.makedirs(self.cache_dir, exist_ok=True)
+        started = time.perf_counter()
 
-        logger.info(f"Loading ML model: {self.model_name}")
+        logger.info("Loading ML model: %s", self.model_name)
 
-        # Check if we have a fine-tuned model
+        # Check if we have a fine-tuned model, then a converted copy of the base model
         finetuned_path = os.path.join(self.cache_dir, "finetuned_model")
+        converted_path = os.path.join(self.cache_dir, "converted", self.model_name.replace('/', '--'))
 
         if os.path.exists(finetuned_path):
             logger.info("Loading fine-tuned model...")
+            source, source_format = finetuned_path, "finetuned"
             self.tokenizer = AutoTokenizer.from_pretrained(finetuned_path)
-            self.model = AutoModelForSequenceClassification.from_pretrained(finetuned_path)
+            self.model = AutoModelForSequenceClassification.from_pretrained(
+                finetuned_path, **self._load_kwargs(finetuned_path)
+            )
+        elif self._has_safetensors(converted_path):
+            logger.info("Loading converted pre-trained model...")
+            source, source_format = converted_path, "cache"
+            self.tokenizer = AutoTokenizer.from_pretrained(converted_path)
+            self.model = AutoModelForSequenceClassification.from_pretrained(
+                converted_path, **self._load_kwargs(converted_path)
+            )
         else:
             # Use pre-trained model as baseline
             # In production, this should be fine-tuned on AI detection data
             logger.info("Loading pre-trained model (not fine-tuned for AI detection yet)...")
+            source, source_format = self.model_name, "pretrained"
             self.tokenizer = AutoTokenizer.from_pretrained(
                 self.model_name,
                 cache_dir=self.cache_dir
@@ -58,14 +85,48 @@ class MLDetector:
             self.model = AutoModelForSequenceClassification.from_pretrained(
                 self.model_name,
                 num_labels=2,  # Binary: AI or Human
-                cache_dir=self.cache_dir
+                cache_dir=self.cache_dir,
+                low_cpu_mem_usage=True
             )
+            if self.convert_cache:
+                self._write_converted(converted_path)
 
         self.model.to(self.device)
         self.model.eval()
         self.loaded = True
 
-        logger.info("ML model loaded successfully")
+        seconds = time.perf_counter() - started
+        self.load_report = {'source': source, 'format': source_format, 'seconds': round(seconds, 3)}
+        logger.info("ML model loaded successfully from %s (%s) in %.2fs", source, source_format, seconds)
+
+    @staticmethod
+    def _has_safetensors(path: str) -> bool:
+        return os.path.isdir(path) and any(name.endswith('.safetensors') for name in os.listdir(path))
+
+    def _load_kwargs(self, path: str) -> Dict:
+        kwargs = {'low_cpu_mem_usage': True}
+        if self._has_safetensors(path):
+            kwargs['use_safetensors'] = True
+        return kwargs
+
+    def _write_converted(self, converted_path: str):
+        """
+        Save a safetensors copy of the base model, renamed into place so a
+        concurrent reader never sees a partial one. This also pins the
+        freshly initialised classification head across restarts.
+        """
+        try:
+            parent = os.path.dirname(converted_path)
+            os.makedirs(parent, exist_ok=True)
+            staging = tempfile.mkdtemp(dir=parent, prefix='.converting-')
+            self.model.save_pretrained(staging, safe_serialization=True)
+            self.tokenizer.save_pretrained(staging)
+            if os.path.exists(converted_path):
+                shutil.rmtree(converted_path)
+            os.replace(staging, converted_path)
+            logger.info("Saved safetensors copy to %s", converted_path)
+        except Exception as e:
+            logger.warning("Could not save converted model to %s: %s", converted_path, e)
 
     def detect(self, text: str) -> Dict:
         """
@@ -114,7 +175,7 @@ class MLDetector:
             }
 
         except Exception as e:
-            logger.error(f"ML detection error: {e}")
+            logger.error("ML detection error: %s", e)
             return {
                 'ml_score': 0.5,
                 'confidence': 0.0,
@@ -174,7 +235,7 @@ class MLDetector:
         optimizer = AdamW(self.model.parameters(), lr=2e-5)
         self.model.train()
 
-        logger.info(f"Starting fine-tuning for {epochs} epochs...")
+        logger.info("Starting fine-tuning for %d epochs...", epochs)
 
         for epoch in range(epochs):
             total_loss = 0
@@ -202,13 +263,13 @@ class MLDetector:
                 progress.set_postfix({'loss': loss.item()})
 
             avg_loss = total_loss / len(train_loader)
-            logger.info(f"Epoch {epoch+1} average loss: {avg_loss:.4f}")
+            logger.info("Epoch %d average loss: %.4f", epoch + 1, avg_loss)
 
         # Save fine-tuned model
         save_path = os.path.join(self.cache_dir, "finetuned_model")
         os.makedirs(save_path, exist_ok=True)
-        self.model.save_pretrained(save_path)
+        self.model.save_pretrained(save_path, safe_serialization=True)
         self.tokenizer.save_pretrained(save_path)
 
-        logger.info(f"Fine-tuned model saved to {save_path}")
+        logger.info("Fine-tuned model saved to %s", save_path)
         self.model.eval()
@@ -9,12 +9,11 @@ import logging
 
 from detector import EnsembleDetector
 from config import settings
+from logging_setup import configure_logging, reconfigure_after_fork
+import prefork
 
 # Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -61,6 +60,7 @@ async def root():
         "endpoints": {
             "detect": "POST /detect - Detect AI content",
             "health": "GET /health - Health check",
+            "workers": "GET /workers - Per-process memory",
             "stats": "GET /stats - Detector statistics"
         }
     }
@@ -75,6 +75,11 @@ async def health():
         "device": stats['device']
     }
 
+@app.get("/workers")
+async def workers():
+    """Memory of the serving processes (shared vs private, PSS sums to the real cost)"""
+    return prefork.memory_report()
+
 @app.get("/stats")
 async def stats():
     """Get detector statistics"""
@@ -102,7 +107,7 @@ async def detect(request: DetectRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Detection error: {e}", exc_info=True)
+        logger.error("Detection error: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
 
 @app.get("/test")
@@ -137,11 +142,32 @@ async def test():
 
 def main():
     """Start the server"""
-    logger.info(f"Starting server on {settings.HOST}:{settings.PORT}")
+    if settings.WORKERS > 1 and settings.DEVICE == "cpu":
+        def on_worker_start(index: int):
+            reconfigure_after_fork()
+            import torch
+            torch.set_num_threads(prefork.worker_threads(settings.WORKERS))
+
+        prefork.serve(
+            app,
+            workers=settings.WORKERS,
+            host=settings.HOST,
+            port=settings.PORT,
+            uds=settings.UDS,
+            on_worker_start=on_worker_start,
+            log_level="info"
+        )
+        return
+
+    if settings.WORKERS > 1:
+        logger.warning("WORKERS=%d ignored: pre-forking is CPU only (DEVICE=%s)", settings.WORKERS, settings.DEVICE)
+
+    logger.info("Starting server on %s", settings.UDS or f"{settings.HOST}:{settings.PORT}")
     uvicorn.run(
-        "server:app",
+        app,
         host=settings.HOST,
         port=settings.PORT,
+        uds=settings.UDS or None,
         reload=False,
         log_level="info"
     )
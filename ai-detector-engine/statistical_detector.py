@@ -2,9 +2,25 @@
 
 import re
 import math
+from collections import Counter
+from dataclasses import dataclass
 from typing import Dict, List
 import numpy as np
-from collections import Counter
+
+SENTENCE_SPLIT = re.compile(r'[.!?]+')
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+
+@dataclass
+class TextFeatures:
+    """Everything the statistical metrics need, from one pass over the text"""
+    sentence_lengths: np.ndarray  # Word counts of sentences longer than 5 characters
+    sentence_count: int           # Non-empty sentences
+    word_count: int               # Word tokens in the original casing
+    token_counts: Counter         # Lowercased word tokens, in first-seen order
+    token_total: int
+    rare_tokens: int              # Tokens outside common_words
+
 
 class StatisticalDetector:
     def __init__(self):
@@ -16,6 +32,27 @@ class StatisticalDetector:
             'or', 'an', 'will', 'my', 'one', 'all', 'would', 'there', 'their', 'what'
         ])
 
+    def extract_features(self, text: str) -> TextFeatures:
+        """Split sentences and tokenize words once for all metrics"""
+        sentences = [s.strip() for s in SENTENCE_SPLIT.split(text)]
+        long_sentences = [s for s in sentences if len(s) > 5]
+
+        tokens = WORD_PATTERN.findall(text.lower())
+        token_counts = Counter(tokens)
+
+        # Lowercasing can split some non-ASCII words (e.g. 'İ'), so only
+        # reuse the token count for the cased count when that can't happen
+        word_count = len(tokens) if text.isascii() else len(WORD_PATTERN.findall(text))
+
+        return TextFeatures(
+            sentence_lengths=np.array([len(s.split()) for s in long_sentences]),
+            sentence_count=sum(1 for s in sentences if s),
+            word_count=word_count,
+            token_counts=token_counts,
+            token_total=len(tokens),
+            rare_tokens=sum(count for word, count in token_counts.items() if word not in self.common_words)
+        )
+
     def detect(self, text: str) -> Dict:
         """
         Perform statistical analysis on text
@@ -23,13 +60,53 @@ class StatisticalDetector:
         Returns:
             Dict with statistical_score (0-1) and analysis details
         """
+        features = self.extract_features(text)
+
         # Extract metrics
-        burstiness = self._calculate_burstiness(text)
-        perplexity = self._estimate_perplexity(text)
-        vocabulary_diversity = self._calculate_vocabulary_diversity(text)
-        readability = self._calculate_readability(text)
-        uniformity = self._calculate_uniformity(text)
+        burstiness = self._calculate_burstiness(features)
+        perplexity = self._estimate_perplexity(features)
+        vocabulary_diversity = self._calculate_vocabulary_diversity(features)
+        readability = self._calculate_readability(features)
+        uniformity = self._calculate_uniformity(features)
+
+        ai_score = self._combine(burstiness, perplexity, vocabulary_diversity, uniformity)
+        ai_score = max(0, min(1, ai_score))
+
+        return self._result(ai_score, burstiness, perplexity, vocabulary_diversity, readability, uniformity)
 
+    def detect_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Statistical analysis over many texts for the bulk path
+
+        Metrics are computed as arrays over the whole batch instead of per
+        text; results are identical to calling detect() on each text.
+        """
+        if not texts:
+            return []
+
+        metrics = self._compute_metrics([self.extract_features(text) for text in texts])
+        ai_score = np.clip(self._combine(
+            metrics['burstiness'], metrics['perplexity'],
+            metrics['vocabulary_diversity'], metrics['uniformity']
+        ), 0, 1)
+
+        results = []
+        for i in range(len(texts)):
+            # detect() gets NumPy scalars from the sentence statistics and
+            # plain floats from the fallbacks; match that so rounding agrees
+            sentence_type = np.float64 if metrics['has_sentences'][i] else float
+            results.append(self._result(
+                sentence_type(ai_score[i]),
+                sentence_type(metrics['burstiness'][i]),
+                float(metrics['perplexity'][i]),
+                float(metrics['vocabulary_diversity'][i]),
+                float(metrics['readability'][i]),
+                sentence_type(metrics['uniformity'][i])
+            ))
+        return results
+
+    def _combine(self, burstiness, perplexity, vocabulary_diversity, uniformity):
+        """Weighted AI score (unclipped) from scalars or batch arrays"""
         # Combine metrics into AI probability
         # AI text tends to have:
         # - Low burstiness (uniform sentence lengths)
@@ -53,21 +130,22 @@ class StatisticalDetector:
         # Vocabulary diversity: Low = AI-like (15% weight)
         ai_score += (1 - vocabulary_diversity) * 0.15
 
-        ai_score = max(0, min(1, ai_score))
+        return ai_score
 
+    def _result(self, ai_score, burstiness, perplexity, vocabulary_diversity, readability, uniformity) -> Dict:
         return {
-            'statistical_score': round(ai_score, 4),
+            'statistical_score': float(round(ai_score, 4)),
             'metrics': {
-                'burstiness': round(burstiness, 4),
-                'perplexity': round(perplexity, 4),
-                'vocabulary_diversity': round(vocabulary_diversity, 4),
-                'readability': round(readability, 4),
-                'uniformity': round(uniformity, 4)
+                'burstiness': float(round(burstiness, 4)),
+                'perplexity': float(round(perplexity, 4)),
+                'vocabulary_diversity': float(round(vocabulary_diversity, 4)),
+                'readability': float(round(readability, 4)),
+                'uniformity': float(round(uniformity, 4))
             },
             'interpretation': self._interpret_metrics(burstiness, perplexity, vocabulary_diversity, uniformity)
         }
 
-    def _calculate_burstiness(self, text: str) -> float:
+    def _calculate_burstiness(self, features: TextFeatures) -> float:
         """
         Calculate burstiness (sentence length variance)
         High variance = more human-like (bursty)
@@ -75,13 +153,11 @@ class StatisticalDetector:
 
         Returns: 0-1 where 1 = high burstiness (human)
         """
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 5]
+        lengths = features.sentence_lengths
 
-        if len(sentences) < 3:
+        if len(lengths) < 3:
             return 0.5  # Not enough data
 
-        lengths = [len(s.split()) for s in sentences]
         mean_length = np.mean(lengths)
         std_length = np.std(lengths)
 
@@ -96,7 +172,7 @@ class StatisticalDetector:
 
         return burstiness
 
-    def _estimate_perplexity(self, text: str) -> float:
+    def _estimate_perplexity(self, features: TextFeatures) -> float:
         """
         Estimate perplexity using word frequency
         High perplexity = more surprising/human
@@ -104,33 +180,24 @@ class StatisticalDetector:
 
         Returns: 0-1 where 1 = high perplexity (human)
         """
-        words = re.findall(r'\b\w+\b', text.lower())
-
-        if len(words) < 10:
+        if features.token_total < 10:
             return 0.5
 
-        # Calculate word frequencies
-        word_counts = Counter(words)
-        total_words = len(words)
-
         # Entropy-based perplexity estimation
-        entropy = 0.0
-        for count in word_counts.values():
-            prob = count / total_words
-            entropy += -prob * math.log2(prob)
+        entropy = self._entropy(features)
 
         # Normalize: typical entropy range is 3-10 bits
         normalized_entropy = min(entropy / 10, 1.0)
 
         # Check for rare words (less common = higher perplexity)
-        rare_word_ratio = sum(1 for w in words if w not in self.common_words) / len(words)
+        rare_word_ratio = features.rare_tokens / features.token_total
 
         # Combine entropy and rare words
         perplexity_score = (normalized_entropy * 0.7) + (rare_word_ratio * 0.30)
 
         return min(perplexity_score, 1.0)
 
-    def _calculate_vocabulary_diversity(self, text: str) -> float:
+    def _calculate_vocabulary_diversity(self, features: TextFeatures) -> float:
         """
         Calculate vocabulary diversity (Type-Token Ratio)
         High diversity = more human
@@ -138,13 +205,11 @@ class StatisticalDetector:
 
         Returns: 0-1 where 1 = high diversity (human)
         """
-        words = re.findall(r'\b\w+\b', text.lower())
-
-        if len(words) < 10:
+        if features.token_total < 10:
             return 0.5
 
-        unique_words = len(set(words))
-        total_words = len(words)
+        unique_words = len(features.token_counts)
+        total_words = features.token_total
 
         # Type-Token Ratio (TTR)
         ttr = unique_words / total_words
@@ -157,19 +222,15 @@ class StatisticalDetector:
 
         return diversity
 
-    def _calculate_readability(self, text: str) -> float:
+    def _calculate_readability(self, features: TextFeatures) -> float:
         """
         Calculate readability score (simplified Flesch)
         Returns: 0-1 where higher = more readable
         """
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 0]
-        words = re.findall(r'\b\w+\b', text)
-
-        if len(sentences) == 0 or len(words) == 0:
+        if features.sentence_count == 0 or features.word_count == 0:
             return 0.5
 
-        avg_sentence_length = len(words) / len(sentences)
+        avg_sentence_length = features.word_count / features.sentence_count
 
         # Simplified readability: ideal is 15-20 words per sentence
         if avg_sentence_length < 10:
@@ -181,7 +242,7 @@ class StatisticalDetector:
 
         return readability
 
-    def _calculate_uniformity(self, text: str) -> float:
+    def _calculate_uniformity(self, features: TextFeatures) -> float:
         """
         Calculate text uniformity (how consistent it is)
         High uniformity = more AI-like
@@ -189,19 +250,14 @@ class StatisticalDetector:
 
         Returns: 0-1 where 1 = highly uniform (AI-like)
         """
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 5]
+        lengths = features.sentence_lengths
 
-        if len(sentences) < 3:
+        if len(lengths) < 3:
             return 0.5
 
-        # Measure consistency in sentence structure
-        lengths = [len(s.split()) for s in sentences]
-
         # Calculate how closely lengths cluster around the mean
         mean_length = np.mean(lengths)
-        deviations = [abs(l - mean_length) for l in lengths]
-        avg_deviation = np.mean(deviations)
+        avg_deviation = np.mean(np.abs(lengths - mean_length))
 
         # Lower deviation = higher uniformity
         if mean_length == 0:
@@ -211,6 +267,90 @@ class StatisticalDetector:
 
         return uniformity
 
+    def _entropy(self, features: TextFeatures) -> float:
+        """Shannon entropy (bits) of the word distribution"""
+        entropy = 0.0
+        for count in features.token_counts.values():
+            prob = count / features.token_total
+            entropy += -prob * math.log2(prob)
+        return entropy
+
+    def _compute_metrics(self, features: List[TextFeatures]) -> Dict[str, np.ndarray]:
+        """
+        Batch version of the _calculate_* metrics: each one as an array over
+        all texts, using the same formulas element-wise
+        """
+        mean_length, std_length, avg_deviation, has_sentences = self._sentence_stats(features)
+
+        token_total = np.array([f.token_total for f in features])
+        unique_tokens = np.array([len(f.token_counts) for f in features])
+        rare_tokens = np.array([f.rare_tokens for f in features])
+        word_count = np.array([f.word_count for f in features])
+        sentence_count = np.array([f.sentence_count for f in features])
+        has_words = token_total >= 10
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Burstiness (sentence length variance), 1 = bursty/human
+            # Coefficient of variation; typical human CV is 0.4-0.8, AI is 0.1-0.3
+            burstiness = np.where(has_sentences, np.minimum(std_length / mean_length / 0.8, 1.0), 0.5)
+
+            # Uniformity (how closely sentence lengths cluster), 1 = uniform/AI
+            uniformity = np.where(has_sentences, 1 - np.minimum(avg_deviation / mean_length, 1.0), 0.5)
+
+            # Perplexity estimate from word-frequency entropy and rare words, 1 = human
+            # Normalize: typical entropy range is 3-10 bits
+            entropy = np.array([self._entropy(f) if f.token_total >= 10 else 0.0 for f in features])
+            normalized_entropy = np.minimum(entropy / 10, 1.0)
+            rare_word_ratio = rare_tokens / token_total
+            perplexity = np.where(
+                has_words,
+                np.minimum((normalized_entropy * 0.7) + (rare_word_ratio * 0.30), 1.0),
+                0.5
+            )
+
+            # Vocabulary diversity (Type-Token Ratio), adjusted for text length
+            # since longer texts naturally have lower TTR; typical range is 0.3-0.8
+            ttr = unique_tokens / token_total
+            log_length = np.array([math.log(total + 1) for total in token_total.tolist()])
+            vocabulary_diversity = np.where(has_words, np.minimum(ttr * log_length / 0.8, 1.0), 0.5)
+
+            # Readability (simplified Flesch): ideal is 15-20 words per sentence
+            avg_sentence_length = word_count / sentence_count
+            readability = np.where(
+                avg_sentence_length < 10,
+                avg_sentence_length / 10,
+                np.where(avg_sentence_length <= 20, 1.0, np.maximum(0, 1 - (avg_sentence_length - 20) / 30))
+            )
+            readability = np.where((sentence_count == 0) | (word_count == 0), 0.5, readability)
+
+        return {
+            'burstiness': burstiness,
+            'perplexity': perplexity,
+            'vocabulary_diversity': vocabulary_diversity,
+            'readability': readability,
+            'uniformity': uniformity,
+            'has_sentences': has_sentences
+        }
+
+    def _sentence_stats(self, features: List[TextFeatures]):
+        """Mean, standard deviation and mean absolute deviation of sentence lengths"""
+        count = len(features)
+        mean_length = np.zeros(count)
+        std_length = np.zeros(count)
+        avg_deviation = np.zeros(count)
+        has_sentences = np.zeros(count, dtype=bool)
+
+        for i, f in enumerate(features):
+            lengths = f.sentence_lengths
+            if len(lengths) < 3:
+                continue  # Not enough data
+            mean_length[i] = np.mean(lengths)
+            std_length[i] = np.std(lengths)
+            avg_deviation[i] = np.mean(np.abs(lengths - mean_length[i]))
+            has_sentences[i] = mean_length[i] != 0
+
+        return mean_length, std_length, avg_deviation, has_sentences
+
     def _interpret_metrics(self, burstiness: float, perplexity: float,
                           diversity: float, uniformity: float) -> str:
         """Generate human-readable interpretation"""
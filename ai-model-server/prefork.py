@@ -0,0 +1,180 @@
+# Vendored from ai-detector-engine/prefork.py - edit that file and copy it here.
+# Only this header differs (backend/tests/test_vendored.py).
+"""Pre-fork multi-worker serving with copy-on-write shared model weights
+
+The parent process loads the models, binds the listening socket and then
+forks the workers. The weight tensors stay in pages shared with the parent
+until someone writes to them, and inference never does. So N workers cost
+about one model's memory plus each worker's own heap, rather than N full
+copies as with `uvicorn --workers N`.
+
+Notes:
+- CPU only. CUDA contexts do not survive fork, so use one worker per GPU.
+- Do not run a forward pass in the parent. Some OpenMP runtimes deadlock
+  in children whose parent already started its thread pool.
+- `gc.freeze()` moves everything loaded so far out of the collector's
+  view, so collections in the workers do not touch (and copy) those pages.
+
+This is the canonical copy; ai-model-server/prefork.py is vendored from it.
+"""
+
+import os
+import gc
+import time
+import signal
+import socket
+import logging
+import multiprocessing
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# PIDs of all workers, filled in by the parent after each fork and shared
+# with the workers so any of them can report on its siblings
+_worker_pids = None
+_master_pid: Optional[int] = None
+
+
+def bind_socket(host: str, port: int, uds: str = "") -> socket.socket:
+    if uds:
+        if os.path.exists(uds):
+            os.unlink(uds)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(uds)
+    else:
+        sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(app, workers: int, host: str = "0.0.0.0", port: int = 5000, uds: str = "",
+          on_worker_start: Optional[Callable[[int], None]] = None, **uvicorn_kwargs):
+    """
+    Fork `workers` uvicorn servers sharing one socket and the already
+    loaded models, restart any that die, and stop them all on SIGINT/SIGTERM
+
+    on_worker_start(index) runs in each child before it serves, e.g. to
+    restart logging threads or size torch's thread pool.
+    """
+    import uvicorn
+
+    global _worker_pids, _master_pid
+    _master_pid = os.getpid()
+    _worker_pids = multiprocessing.Array('i', workers, lock=False)
+
+    sock = bind_socket(host, port, uds)
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+
+    def spawn(index: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                if on_worker_start:
+                    on_worker_start(index)
+                config = uvicorn.Config(app, **uvicorn_kwargs)
+                uvicorn.Server(config).run(sockets=[sock])
+            except Exception:
+                logger.exception("Worker %d crashed", index)
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        _worker_pids[index] = pid
+        return pid
+
+    for index in range(workers):
+        spawn(index)
+    logger.info("Started %d workers on %s: %s", workers, uds or f"{host}:{port}", list(_worker_pids))
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in _worker_pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while True:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        if stopping:
+            continue
+        if pid in list(_worker_pids):
+            index = list(_worker_pids).index(pid)
+            logger.warning("Worker %d (pid %d) exited with status %d, restarting", index, pid, status)
+            time.sleep(1.0)
+            spawn(index)
+
+    sock.close()
+    if uds and os.path.exists(uds):
+        os.unlink(uds)
+    logger.info("All workers stopped")
+
+
+def process_memory(pid: int) -> Dict[str, float]:
+    """
+    RSS, PSS and shared/private memory of a process in MB
+
+    PSS splits each shared page between the processes sharing it, so the
+    PSS of all workers added up is what the pool really costs.
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024
+    except OSError:
+        # No smaps_rollup (older kernels, non-Linux): peak RSS of this process only
+        if pid == os.getpid():
+            import resource
+            fields['Rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    return {
+        'pid': pid,
+        'rss_mb': round(fields.get('Rss', 0.0), 1),
+        'pss_mb': round(fields.get('Pss', 0.0), 1),
+        'shared_mb': round(fields.get('Shared_Clean', 0.0) + fields.get('Shared_Dirty', 0.0), 1),
+        'private_mb': round(fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0), 1)
+    }
+
+
+def memory_report() -> Dict:
+    """Per-process memory for the parent and every worker (or just this process when not pre-forked)"""
+    if _worker_pids is None:
+        processes = [dict(process_memory(os.getpid()), role='single')]
+    else:
+        processes = [dict(process_memory(_master_pid), role='master')]
+        processes += [
+            dict(process_memory(pid), role='worker', index=index, current=(pid == os.getpid()))
+            for index, pid in enumerate(_worker_pids)
+        ]
+
+    return {
+        'processes': processes,
+        'total_rss_mb': round(sum(p['rss_mb'] for p in processes), 1),
+        'total_pss_mb': round(sum(p['pss_mb'] for p in processes), 1)
+    }
+
+
+def worker_threads(workers: int) -> int:
+    """Intra-op threads per worker so the pool does not oversubscribe the CPUs"""
+    return max(1, (os.cpu_count() or 1) // max(workers, 1))
@@ -3,13 +3,31 @@ AI Detection Model Server
 Run this on a separate computer with the AI model
 Exposes a simple HTTP API that your main backend can call
 """
-from fastapi import FastAPI
+import os
+import json
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
+import prefork
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
 
+# Optional compact transport, negotiated by Content-Type / Accept
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
 app = FastAPI(title="AI Detection Model Server")
 
 # CORS - allow your main backend to call this
@@ -25,6 +43,25 @@ app.add_middleware(
 model = None
 tokenizer = None
 device = "cuda" if torch.cuda.is_available() else "cpu"
+MODEL_NAME = "roberta-base-openai-detector"
+
+# Batching: texts per forward pass, how long a /detect call waits for others
+# to share its batch, and the most texts accepted by one /detect/batch call
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+BATCH_MAX_TEXTS = int(os.getenv("BATCH_MAX_TEXTS", "1024"))
+
+# Listening: a Unix socket path for co-located backends, else host and port.
+# Keep-alive should outlast the backend's pooled connection expiry.
+SERVER_UDS = os.getenv("MODEL_SERVER_UDS", "")
+SERVER_HOST = os.getenv("MODEL_SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("MODEL_SERVER_PORT", "5000"))
+KEEP_ALIVE_SECONDS = int(os.getenv("KEEP_ALIVE_SECONDS", "75"))
+# >1 loads the model once, then forks workers sharing its weights (CPU only)
+WORKERS = int(os.getenv("WORKERS", "1"))
+
+# One inference thread: forward passes run one at a time, off the event loop
+inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
 
 class DetectRequest(BaseModel):
     text: str
@@ -35,16 +72,161 @@ class DetectResponse(BaseModel):
     confidence: float
     model_name: str
 
-@app.on_event("startup")
-async def load_model():
-    """Load the AI detection model on startup"""
+class BatchDetectRequest(BaseModel):
+    texts: List[str]
+
+class BatchDetectResponse(BaseModel):
+    results: List[DetectResponse]
+    model_name: str
+
+
+def score_batch(texts: List[str]) -> List[Tuple[float, float]]:
+    """
+    (ai_probability, human_probability) per text, from padded forward
+    passes of at most BATCH_MAX_SIZE texts
+
+    Texts are grouped by length so each batch pads to similar lengths,
+    then results are returned in the original order.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    scores: List[Tuple[float, float]] = [(0.5, 0.5)] * len(texts)
+
+    for start in range(0, len(order), BATCH_MAX_SIZE):
+        indices = order[start:start + BATCH_MAX_SIZE]
+        inputs = tokenizer(
+            [texts[i] for i in indices],
+            return_tensors="pt",
+            truncation=True,
+            max_length=512,
+            padding=True
+        ).to(device)
+
+        with torch.no_grad():
+            probabilities = torch.softmax(model(**inputs).logits, dim=-1).tolist()
+
+        # Assumes label 1 = AI, label 0 = Human (adjust for your model)
+        for i, row in zip(indices, probabilities):
+            scores[i] = (row[1], row[0])
+    return scores
+
+
+def request_body(schema) -> Dict:
+    """
+    openapi_extra documenting a body read with read_payload: the handler
+    takes the raw Request (to accept msgpack), so FastAPI can't infer it
+    """
+    body_schema = schema.model_json_schema()
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": body_schema},
+                MSGPACK_CONTENT_TYPE: {"schema": body_schema}
+            }
+        }
+    }
+
+
+async def read_payload(request: Request, schema):
+    """Parse a JSON or msgpack body (by Content-Type) into a request model"""
+    body = await request.body()
+    is_msgpack = request.headers.get("content-type", "").startswith(MSGPACK_CONTENT_TYPE)
+    if is_msgpack and not MSGPACK_AVAILABLE:
+        raise HTTPException(415, "msgpack is not installed on the model server")
+
+    try:
+        data = msgpack.unpackb(body, raw=False) if is_msgpack else json.loads(body)
+        return schema(**data)
+    except Exception as e:
+        raise HTTPException(422, f"Invalid request body: {e}")
+
+
+def reply(request: Request, result: BaseModel) -> Response:
+    """Encode a response as msgpack if the caller accepts it, else JSON"""
+    if MSGPACK_AVAILABLE and MSGPACK_CONTENT_TYPE in request.headers.get("accept", ""):
+        return Response(msgpack.packb(result.model_dump(), use_bin_type=True), media_type=MSGPACK_CONTENT_TYPE)
+    return JSONResponse(result.model_dump())
+
+
+def to_response(ai_prob: float, human_prob: float) -> DetectResponse:
+    # Confidence is the difference between the two
+    return DetectResponse(
+        ai_probability=round(ai_prob, 4),
+        human_probability=round(human_prob, 4),
+        confidence=round(abs(ai_prob - human_prob), 4),
+        model_name=MODEL_NAME
+    )
+
+
+def error_response(message: str) -> DetectResponse:
+    return DetectResponse(
+        ai_probability=0.5,
+        human_probability=0.5,
+        confidence=0.0,
+        model_name=message
+    )
+
+
+class RequestCoalescer:
+    """
+    Groups concurrent single-text /detect calls into shared batches
+
+    The first waiting text opens a batch; it is scored once BATCH_MAX_SIZE
+    texts are waiting or BATCH_MAX_WAIT_MS has passed, whichever is first.
+    """
+
+    def __init__(self):
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._full = asyncio.Event()
+        self._flusher = None
+
+    async def score(self, text: str) -> Tuple[float, float]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= BATCH_MAX_SIZE:
+            self._full.set()
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_after_wait())
+        return await future
+
+    async def _flush_after_wait(self):
+        try:
+            await asyncio.wait_for(self._full.wait(), timeout=BATCH_MAX_WAIT_MS / 1000)
+        except asyncio.TimeoutError:
+            pass
+
+        batch = self._pending[:BATCH_MAX_SIZE]
+        self._pending = self._pending[BATCH_MAX_SIZE:]
+        self._full.clear()
+        # Texts that arrived beyond this batch start the next one straight away
+        self._flusher = asyncio.create_task(self._flush_after_wait()) if self._pending else None
+        if len(self._pending) >= BATCH_MAX_SIZE:
+            self._full.set()
+
+        loop = asyncio.get_running_loop()
+        try:
+            scores = await loop.run_in_executor(inference_executor, score_batch, [text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, scores):
+            if not future.done():
+                future.set_result(result)
+
+
+coalescer = None
+
+def load_weights():
+    """Load the AI detection model (in the parent process when pre-forking)"""
     global model, tokenizer
 
     print("🔄 Loading AI detection model...")
     print(f"   Device: {device}")
 
     # Option 1: RoBERTa OpenAI Detector (fastest, good accuracy)
-    model_name = "roberta-base-openai-detector"
+    model_name = MODEL_NAME
 
     # Option 2: Better detector (uncomment to use)
     # model_name = "Hello-SimpleAI/chatgpt-detector-roberta"
@@ -60,65 +242,72 @@ async def load_model():
 
         print(f"✅ Model loaded: {model_name}")
         print(f"   Parameters: {sum(p.numel() for p in model.parameters()):,}")
+        print(f"   Batching: up to {BATCH_MAX_SIZE} texts, {BATCH_MAX_WAIT_MS:g}ms coalescing window")
         print(f"   Ready to detect AI text!")
     except Exception as e:
         print(f"❌ Failed to load model: {e}")
         print("   Installing transformers: pip install transformers torch")
         raise
 
-@app.post("/detect", response_model=DetectResponse)
-async def detect_ai(request: DetectRequest):
+@app.on_event("startup")
+async def load_model():
+    """Load the model unless a pre-forking parent already did, and start batching"""
+    global coalescer
+
+    if model is None:
+        load_weights()
+    coalescer = RequestCoalescer()
+
+@app.post("/detect", response_model=DetectResponse, openapi_extra=request_body(DetectRequest))
+async def detect_ai(request: Request):
     """
     Detect if text is AI-generated
     Returns probability between 0 (human) and 1 (AI)
+
+    Body: {"text": "..."} as JSON or msgpack. Concurrent calls are
+    coalesced into shared forward passes.
     """
+    payload = await read_payload(request, DetectRequest)
+
     if not model or not tokenizer:
-        return DetectResponse(
-            ai_probability=0.5,
-            human_probability=0.5,
-            confidence=0.0,
-            model_name="error - model not loaded"
-        )
+        return reply(request, error_response("error - model not loaded"))
 
     try:
-        # Tokenize input
-        inputs = tokenizer(
-            request.text,
-            return_tensors="pt",
-            truncation=True,
-            max_length=512,
-            padding=True
-        ).to(device)
-
-        # Run inference
-        with torch.no_grad():
-            outputs = model(**inputs)
-            logits = outputs.logits
-            probabilities = torch.softmax(logits, dim=-1)
-
-        # Get AI probability (assumes label 1 = AI, label 0 = Human)
-        # Adjust based on your model's label mapping
-        ai_prob = probabilities[0][1].item()
-        human_prob = probabilities[0][0].item()
-
-        # Confidence is the difference between the two
-        confidence = abs(ai_prob - human_prob)
-
-        return DetectResponse(
-            ai_probability=round(ai_prob, 4),
-            human_probability=round(human_prob, 4),
-            confidence=round(confidence, 4),
-            model_name="roberta-base-openai-detector"
-        )
+        ai_prob, human_prob = await coalescer.score(payload.text)
+        return reply(request, to_response(ai_prob, human_prob))
 
     except Exception as e:
         print(f"Detection error: {e}")
-        return DetectResponse(
-            ai_probability=0.5,
-            human_probability=0.5,
-            confidence=0.0,
-            model_name=f"error: {str(e)}"
-        )
+        return reply(request, error_response(f"error: {str(e)}"))
+
+@app.post("/detect/batch", response_model=BatchDetectResponse, openapi_extra=request_body(BatchDetectRequest))
+async def detect_ai_batch(request: Request):
+    """
+    Detect many texts in one call
+    Body: {"texts": [...]} as JSON or msgpack. Results are in the same
+    order as the request's texts.
+    """
+    payload = await read_payload(request, BatchDetectRequest)
+    texts = payload.texts
+    if len(texts) > BATCH_MAX_TEXTS:
+        raise HTTPException(413, f"At most {BATCH_MAX_TEXTS} texts per batch")
+
+    if not model or not tokenizer:
+        message = "error - model not loaded"
+        return reply(request, BatchDetectResponse(results=[error_response(message) for _ in texts], model_name=message))
+
+    try:
+        loop = asyncio.get_running_loop()
+        scores = await loop.run_in_executor(inference_executor, score_batch, texts)
+        return reply(request, BatchDetectResponse(
+            results=[to_response(ai_prob, human_prob) for ai_prob, human_prob in scores],
+            model_name=MODEL_NAME
+        ))
+
+    except Exception as e:
+        print(f"Batch detection error: {e}")
+        message = f"error: {str(e)}"
+        return reply(request, BatchDetectResponse(results=[error_response(message) for _ in texts], model_name=message))
 
 @app.get("/health")
 async def health():
@@ -126,9 +315,16 @@ async def health():
     return {
         "status": "healthy",
         "model_loaded": model is not None,
-        "device": device
+        "device": device,
+        "batch_max_size": BATCH_MAX_SIZE,
+        "transports": ["json", "msgpack"] if MSGPACK_AVAILABLE else ["json"]
     }
 
+@app.get("/workers")
+async def workers():
+    """Memory of the serving processes (shared vs private, PSS sums to the real cost)"""
+    return prefork.memory_report()
+
 @app.get("/")
 async def root():
     return {
@@ -143,4 +339,24 @@ if __name__ == "__main__":
     print("   This server runs the AI model and exposes an API")
     print("   Your main backend will call this server")
     print("")
-    uvicorn.run(app, host="0.0.0.0", port=5000)
+    if WORKERS > 1 and device == "cpu":
+        # prefork reports worker starts, crashes and restarts through logging
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        load_weights()
+        prefork.serve(
+            app,
+            workers=WORKERS,
+            host=SERVER_HOST,
+            port=SERVER_PORT,
+            uds=SERVER_UDS,
+            on_worker_start=lambda index: torch.set_num_threads(prefork.worker_threads(WORKERS)),
+            timeout_keep_alive=KEEP_ALIVE_SECONDS
+        )
+    else:
+        if WORKERS > 1:
+            print(f"⚠️  WORKERS={WORKERS} ignored: pre-forking is CPU only")
+        if SERVER_UDS:
+            print(f"   Listening on Unix socket {SERVER_UDS}")
+            uvicorn.run(app, uds=SERVER_UDS, timeout_keep_alive=KEEP_ALIVE_SECONDS)
+        else:
+            uvicorn.run(app, host=SERVER_HOST, port=SERVER_PORT, timeout_keep_alive=KEEP_ALIVE_SECONDS)
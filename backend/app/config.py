@@ -8,8 +8,76 @@ class Settings(BaseSettings):
     ZEROGPT_API_KEY: str = ""  # ZeroGPT API key
     ANTHROPIC_API_KEY: str = ""
     AI_MODEL_SERVER_URL: str = ""  # External AI model server (optional)
+    AI_MODEL_SERVER_TRANSPORT: str = "json"  # json or msgpack
+    AI_MODEL_SERVER_UDS: str = ""  # Unix socket path for a co-located model server
+    AI_MODEL_SERVER_MAX_CONNECTIONS: int = 20  # Pooled keep-alive connections
+    AI_MODEL_SERVER_KEEPALIVE_SECONDS: float = 30.0
+
+    # External detector endpoints (override to point at loadtest/fake_providers.py)
+    ZEROGPT_API_URL: str = "https://api.zerogpt.com/api/detect/detectText"
+    GPTZERO_API_URL: str = "https://api.gptzero.me/v2/predict/text"
+    HUGGINGFACE_API_URL: str = "https://api-inference.huggingface.co/models"
     CORS_ORIGINS: str = '["http://localhost:3000"]'
-    
+
+    # Workload scheduler (interactive scans vs bulk jobs)
+    SCHEDULER_MAX_CONCURRENCY: int = 8
+    SCHEDULER_INTERACTIVE_WEIGHT: float = 4.0
+    SCHEDULER_BULK_WEIGHT: float = 1.0
+    SCHEDULER_BULK_MAX_IN_FLIGHT: int = 2  # Leaves slots free for interactive scans
+    SCHEDULER_INTERACTIVE_THREADS: int = 8
+    SCHEDULER_BULK_THREADS: int = 2
+
+    # Tracing
+    TRACE_SAMPLE_RATE: float = 0.0  # Fraction of requests whose spans are exported
+    TRACE_EXPORTER: str = "none"  # none, file or otlp
+    TRACE_FILE_PATH: str = "traces/traces.jsonl"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318"
+    SERVER_TIMING_ENABLED: bool = True
+
+    # Model loading
+    MODEL_CACHE_DIR: str = "./model_cache"  # Pre-converted safetensors copies (mmapped on load)
+    MODEL_CACHE_CONVERT: bool = True  # Write a cached copy the first time a model is loaded
+    MODEL_PRELOAD: bool = False  # Load detector models during startup instead of on first request
+    MODEL_REGISTRY_DIR: str = "./models"  # registry.json of trained versions and the active one
+    MODEL_REGISTRY_POLL_SECONDS: float = 30.0  # How often serving checks for a promote/rollback (0 = never)
+    SHADOW_DEFAULT_SAMPLE_RATE: float = 0.05  # Share of live traffic a shadow candidate scores
+    SHADOW_QUEUE_SIZE: int = 100  # Pending shadow samples; more are dropped, never waited for
+    SHADOW_REPORT_WINDOW: int = 5000  # Comparisons kept for the agreement/latency report
+    SHADOW_RESULTS_PATH: str = "./shadow/results.jsonl"  # Every comparison, appended ("" = memory only)
+    ENSEMBLE_CONFIG_PATH: str = ""  # Fitted ensemble weights/calibration/thresholds (benchmarks.ensemble_eval)
+    DETECTOR_TIER: str = "full"  # full (ensemble) or fast (distilled student; full until one is trained)
+    DISTILLED_MODEL_DIR: str = "./distilled"  # Student weights, its report and the teacher label cache
+
+    # Training data collection
+    TRAINING_WRITE_BATCH_SIZE: int = 100  # Examples committed per transaction
+    TRAINING_WRITE_FLUSH_MS: float = 50.0  # Longest a queued example waits for its batch to fill
+    TRAINING_WRITE_QUEUE_SIZE: int = 10000  # Pending examples before add_example waits for the writer
+    TOKENIZED_CACHE_DIR: str = "./tokenized_cache"  # Tokenized training splits, reused across runs
+    TOKENIZED_CACHE_KEEP: int = 3  # Entries kept per split (train/val/test), most recently used first
+    PUBLIC_CORPUS_DIR: str = "./corpus"  # Streamed public datasets (pretrain_model.py), as local shards
+    TRAINING_JOBS_DIR: str = "./training_jobs"  # State, dataset snapshots and cancel flags of training jobs
+    TRAINING_CPU_THREADS: int = 2  # torch/BLAS threads of a training job, so serving keeps the rest
+    TRAINING_NICE: int = 10  # Scheduling priority drop for the training process
+    INCREMENTAL_REPLAY_RATIO: float = 0.5  # Incremental training: older examples replayed per new one
+
+    # Stylometrics
+    STYLOMETRY_ENGINE: str = "nltk"  # nltk (reference) or fast (regex splitter + lexicon tagger)
+    STYLOMETRY_REGEX_MAX_CHARS: int = 1000  # fast engine: longer texts still use punkt when available
+    STYLOMETRY_LEXICON_PATH: str = ""  # fast engine: compiled word -> tag lexicon (benchmarks.stylometry)
+
+    # Image analysis
+    IMAGE_ANALYSIS_MAX_SIDE: int = 512  # Pixel statistics and FFT run on a thumbnail this size
+    IMAGE_MAX_DECODE_PIXELS: int = 40_000_000  # Largest decode (after JPEG half-scale draft); bigger images skip pixel analysis
+
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = '{}'  # Per-logger overrides, e.g. '{"app.detection.text": "DEBUG"}'
+    LOG_FORMAT: str = "text"  # text or json
+    LOG_SAMPLE_RATE: float = 0.1  # Fraction of DEBUG records kept
+    LOG_RATE_LIMIT_BURST: int = 5  # Repeated warnings/errors allowed per interval
+    LOG_RATE_LIMIT_INTERVAL: float = 60.0
+    LOG_QUEUE_SIZE: int = 10000
+
     @property
     def cors_origins_list(self) -> List[str]:
         return json.loads(self.CORS_ORIGINS)
@@ -1,6 +1,9 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy import event
+import time
 from app.config import settings
+from app.metrics import DB_QUERY_LATENCY
 
 # Convert Railway's postgresql:// to postgresql+asyncpg:// for async support
 database_url = settings.DATABASE_URL
@@ -11,6 +14,15 @@ engine = create_async_engine(database_url, echo=False)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+    DB_QUERY_LATENCY.labels(operation=operation).observe(time.perf_counter() - context._query_start)
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
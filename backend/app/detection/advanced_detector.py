@@ -10,12 +10,13 @@ Uses ensemble of multiple detection techniques:
 """
 
 import re
+import gc
 import math
-import hashlib
+import time
+import logging
 import asyncio
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
-from collections import Counter
 import numpy as np
 from scipy import stats
 import torch
@@ -31,6 +32,19 @@ import textstat
 import nltk
 from functools import lru_cache
 
+from app.detection.prepared import PreparedText
+from app.detection.model_cache import model_cache
+from app.ml.model_registry import model_registry
+from app.detection.shadow import shadow_scorer
+from app.detection.stylometry import stylometry
+from app.ensemble_config import ensemble_config, length_bucket, calibrate, classify
+from app.scheduler import scheduler, BULK
+from app.metrics import SCORER_LATENCY, DETECTION_LATENCY, CACHE_REQUESTS
+from app.tracing import tracer
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
 # Download required NLTK data
 try:
     nltk.data.find('tokenizers/punkt')
@@ -56,6 +70,16 @@ class AdvancedDetectionResult:
     detailed_scores: Dict[str, float]
     content_hash: str
     needs_review: bool = False  # True if confidence < threshold
+    model_version: Optional[str] = None  # Classifier version that produced transformer_score
+    transformer_latency_ms: float = 0.0
+
+
+@dataclass
+class ServingClassifier:
+    """The transformer classifier in use; replaced as a whole on hot swap"""
+    version: str
+    model: object
+    tokenizer: object
 
 
 class AdvancedAIDetector:
@@ -65,89 +89,196 @@ class AdvancedAIDetector:
 
     def __init__(self):
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        print(f"[Advanced Detector] Using device: {self.device}")
+        logger.info("Using device: %s", self.device)
 
         # Initialize models (lazy loading)
         self._gpt2_model = None
         self._gpt2_tokenizer = None
         self._roberta_model = None
         self._roberta_tokenizer = None
-        self._ai_classifier_model = None
-        self._ai_classifier_tokenizer = None
+        self._classifier: Optional[ServingClassifier] = None
+        self._reload_lock: Optional[asyncio.Lock] = None
 
-        # Cache for model outputs
+        # Cache for model outputs, keyed by (content hash, classifier version)
         self._cache = {}
 
+        # Ensemble weights, calibration and thresholds (benchmarks.ensemble_eval fits these)
+        self.ensemble_config = ensemble_config
+
     @property
     def gpt2_model(self):
         """Lazy load GPT-2 for perplexity calculation"""
         if self._gpt2_model is None:
-            print("[Advanced Detector] Loading GPT-2 model...")
-            self._gpt2_model = GPT2LMHeadModel.from_pretrained('gpt2').to(self.device)
-            self._gpt2_tokenizer = GPT2TokenizerFast.from_pretrained('gpt2')
-            self._gpt2_model.eval()
+            logger.info("Loading GPT-2 model...")
+            with tracer.span("model.load.gpt2"):
+                self._gpt2_model, self._gpt2_tokenizer = model_cache.load(
+                    GPT2LMHeadModel, GPT2TokenizerFast, 'gpt2', label='gpt2', device=self.device
+                )
         return self._gpt2_model, self._gpt2_tokenizer
 
+    @property
+    def classifier(self) -> ServingClassifier:
+        """Lazy load the AI classifier (registry's active version, custom, or default)"""
+        if self._classifier is None:
+            with tracer.span("model.load.classifier"):
+                self._classifier = self._load_ai_classifier()
+        return self._classifier
+
     @property
     def ai_classifier(self):
-        """Lazy load RoBERTa-based AI classifier"""
-        if self._ai_classifier_model is None:
-            print("[Advanced Detector] Loading AI classifier...")
-
-            # Priority: Use custom pre-trained model if available
-            import os
-            custom_model_path = os.environ.get('VERIFILY_CUSTOM_MODEL')
-
-            if custom_model_path:
-                # Check if it's a local path or HuggingFace Hub ID
-                is_local = os.path.exists(custom_model_path)
-                source = "local" if is_local else "HuggingFace Hub"
-
-                print(f"[Advanced Detector] Loading custom model from {source}: {custom_model_path}")
-                try:
-                    self._ai_classifier_model = AutoModelForSequenceClassification.from_pretrained(
-                        custom_model_path
-                    ).to(self.device)
-                    self._ai_classifier_tokenizer = AutoTokenizer.from_pretrained(custom_model_path)
-                    self._ai_classifier_model.eval()
-                    print(f"[Advanced Detector] Custom model loaded successfully from {source}!")
-                    return self._ai_classifier_model, self._ai_classifier_tokenizer
-                except Exception as e:
-                    print(f"[Advanced Detector] Failed to load custom model from {source}: {e}")
-                    print("[Advanced Detector] Falling back to default...")
-
-            # Default: Use pre-trained model for AI detection
-            model_name = "roberta-base-openai-detector"
+        """(model, tokenizer) of the serving classifier"""
+        classifier = self.classifier
+        return classifier.model, classifier.tokenizer
+
+    @property
+    def model_version(self) -> Optional[str]:
+        """Version of the loaded classifier, None until it is first loaded"""
+        return self._classifier.version if self._classifier is not None else None
+
+    def _serving_classifier(self) -> Optional[ServingClassifier]:
+        """The classifier serving now (loading it if needed), None if it can't load"""
+        try:
+            return self.classifier
+        except Exception as e:
+            logger.warning("Transformer scorer failed: %s", e)
+            return None
+
+    def preload(self):
+        """Load every model now (startup) rather than on the first request"""
+        self.gpt2_model
+        self.classifier
+
+    def _load_ai_classifier(self) -> ServingClassifier:
+        """Load the registry's active model if any, else the custom classifier if configured, else the default"""
+        logger.info("Loading AI classifier...")
+
+        active = model_registry.active()
+        if active:
+            try:
+                return self._load_registered(active)
+            except Exception as e:
+                logger.warning("Failed to load registered model %s, falling back: %s", active['version'], e)
+
+        # Priority: Use custom pre-trained model if available
+        import os
+        custom_model_path = os.environ.get('VERIFILY_CUSTOM_MODEL')
+
+        if custom_model_path:
+            # Check if it's a local path or HuggingFace Hub ID
+            is_local = os.path.exists(custom_model_path)
+            source = "local" if is_local else "HuggingFace Hub"
+
+            logger.info("Loading custom model from %s: %s", source, custom_model_path)
+            try:
+                model, tokenizer = model_cache.load(
+                    AutoModelForSequenceClassification, AutoTokenizer, custom_model_path,
+                    label='classifier', device=self.device
+                )
+                logger.info("Custom model loaded successfully from %s", source)
+                return ServingClassifier(f"custom:{custom_model_path}", model, tokenizer)
+            except Exception as e:
+                logger.warning("Failed to load custom model from %s, falling back to default: %s", source, e)
+
+        # Default: Use pre-trained model for AI detection
+        model_name = "roberta-base-openai-detector"
+        try:
+            model, tokenizer = model_cache.load(
+                AutoModelForSequenceClassification, AutoTokenizer, model_name,
+                label='classifier', device=self.device
+            )
+        except:
+            # Fallback to base RoBERTa if specific model not available
+            logger.warning("Fallback to roberta-base")
+            model_name = "roberta-base"
+            model, tokenizer = model_cache.load(
+                RobertaForSequenceClassification, RobertaTokenizer, model_name,
+                label='classifier', device=self.device, num_labels=2
+            )
+        return ServingClassifier(f"default:{model_name}", model, tokenizer)
+
+    def _load_registered(self, entry: Dict) -> ServingClassifier:
+        model, tokenizer = model_cache.load(
+            AutoModelForSequenceClassification, AutoTokenizer, entry['path'],
+            label='classifier', device=self.device
+        )
+        return ServingClassifier(entry['version'], model, tokenizer)
+
+    def _warm_up(self, classifier: ServingClassifier):
+        """One forward pass so the first real request after a swap is not slow"""
+        inputs = classifier.tokenizer(
+            "Warm-up text for the classifier.", return_tensors='pt', truncation=True, max_length=512
+        ).to(self.device)
+        with torch.no_grad():
+            classifier.model(**inputs)
+
+    async def reload_classifier(self) -> Optional[str]:
+        """
+        Hot-swap to the registry's active version if it differs from the
+        serving one: load and warm the new model in the background, then
+        replace the reference in one assignment
+
+        Requests already scoring keep the model they started with. One
+        reload runs at a time, so at most two classifiers are resident
+        (old and new) and only until the old one's last request finishes.
+        """
+        if self._reload_lock is None:
+            self._reload_lock = asyncio.Lock()
+
+        async with self._reload_lock:
+            active = model_registry.active()
+            if active is None or active['version'] == self.model_version:
+                return self.model_version
+
+            logger.info("Loading model %s for hot swap (serving %s)", active['version'], self.model_version)
+            async with scheduler.lane(BULK):
+                classifier = await scheduler.to_thread(self._load_registered, active)
+                await scheduler.to_thread(self._warm_up, classifier)
+
+            previous = self.model_version
+            self._classifier = classifier
+            for key in [key for key in self._cache if key[1] != classifier.version]:
+                del self._cache[key]
+            gc.collect()
+            logger.info("Swapped classifier %s -> %s", previous, classifier.version)
+            return classifier.version
+
+    async def watch_registry(self):
+        """Follow promotions and rollbacks made by other processes (runs until cancelled)"""
+        while True:
+            await asyncio.sleep(settings.MODEL_REGISTRY_POLL_SECONDS)
+            # Not loaded yet: the first load reads the registry anyway
+            if self._classifier is None:
+                continue
             try:
-                self._ai_classifier_model = AutoModelForSequenceClassification.from_pretrained(
-                    model_name
-                ).to(self.device)
-                self._ai_classifier_tokenizer = AutoTokenizer.from_pretrained(model_name)
-            except:
-                # Fallback to base RoBERTa if specific model not available
-                print("[Advanced Detector] Fallback to roberta-base")
-                model_name = "roberta-base"
-                self._ai_classifier_model = RobertaForSequenceClassification.from_pretrained(
-                    model_name, num_labels=2
-                ).to(self.device)
-                self._ai_classifier_tokenizer = RobertaTokenizer.from_pretrained(model_name)
-
-            self._ai_classifier_model.eval()
-        return self._ai_classifier_model, self._ai_classifier_tokenizer
-
-    async def detect(self, text: str, source_platform: str = None) -> AdvancedDetectionResult:
+                await self.reload_classifier()
+            except Exception as e:
+                logger.warning("Model hot swap failed, still serving %s: %s", self.model_version, e)
+
+    async def detect(self, text: Union[str, PreparedText], source_platform: str = None) -> AdvancedDetectionResult:
         """
         Main detection method - runs all detection techniques in parallel
+        Accepts raw text or a PreparedText shared with the caller
         """
+        prepared = PreparedText.of(text)
+
         # Generate content hash
-        content_hash = hashlib.sha256(text.encode()).hexdigest()
+        content_hash = prepared.content_hash
 
-        # Check cache
-        if content_hash in self._cache:
-            return self._cache[content_hash]
+        # Check cache (results from another classifier version don't count)
+        cached = self._cache.get((content_hash, self.model_version))
+        if cached is not None:
+            CACHE_REQUESTS.labels(cache='advanced_detector', result='hit').inc()
+            return cached
+        CACHE_REQUESTS.labels(cache='advanced_detector', result='miss').inc()
 
+        with DETECTION_LATENCY.labels(detector='advanced').time():
+            return await self._detect_uncached(prepared, content_hash, source_platform)
+
+    async def _detect_uncached(self, prepared: PreparedText, content_hash: str,
+                               source_platform: str = None) -> AdvancedDetectionResult:
+        """Run every scorer and the ensemble for a text that isn't cached"""
         # Quick validation
-        word_count = len(text.split())
+        word_count = prepared.word_count
         if word_count < 5:
             return AdvancedDetectionResult(
                 classification="UNCERTAIN",
@@ -162,41 +293,52 @@ class AdvancedAIDetector:
                 content_hash=content_hash
             )
 
-        # Run all detection methods in parallel
-        perplexity_task = asyncio.to_thread(self._calculate_perplexity, text)
-        burstiness_task = asyncio.to_thread(self._calculate_burstiness, text)
-        entropy_task = asyncio.to_thread(self._calculate_entropy, text)
-        transformer_task = asyncio.to_thread(self._transformer_classify, text)
-        stylometric_task = asyncio.to_thread(self._stylometric_analysis, text)
-
-        results = await asyncio.gather(
-            perplexity_task,
-            burstiness_task,
-            entropy_task,
-            transformer_task,
-            stylometric_task,
-            return_exceptions=True
-        )
+        # One scheduler slot (in the caller's priority lane) for all the model work
+        async with scheduler.lane():
+            # Pin the serving classifier before any await: a hot swap while the
+            # scorers run must not relabel this result or its cache entry
+            classifier = await scheduler.to_thread(self._serving_classifier)
+            model_version = classifier.version if classifier is not None else None
+
+            # Run all detection methods in parallel
+            # Every scorer reads the same PreparedText, so each split happens once
+            perplexity_task = scheduler.to_thread(self._calculate_perplexity, prepared)
+            burstiness_task = scheduler.to_thread(self._calculate_burstiness, prepared)
+            entropy_task = scheduler.to_thread(self._calculate_entropy, prepared)
+            transformer_task = scheduler.to_thread(self._timed, self._transformer_classify, classifier, prepared)
+            stylometric_task = scheduler.to_thread(self._stylometric_analysis, prepared)
+
+            results = await asyncio.gather(
+                perplexity_task,
+                burstiness_task,
+                entropy_task,
+                transformer_task,
+                stylometric_task,
+                return_exceptions=True
+            )
 
         # Unpack results (handle exceptions)
         perplexity_score = results[0] if not isinstance(results[0], Exception) else 0.5
         burstiness_score = results[1] if not isinstance(results[1], Exception) else 0.5
         entropy_score = results[2] if not isinstance(results[2], Exception) else 0.5
-        transformer_score = results[3] if not isinstance(results[3], Exception) else 0.5
+        transformer_score, transformer_seconds = results[3] if not isinstance(results[3], Exception) else (0.5, 0.0)
         stylometric_score = results[4] if not isinstance(results[4], Exception) else 0.5
 
         # Combine scores using weighted ensemble
-        final_result = self._ensemble_scoring(
-            perplexity_score=perplexity_score,
-            burstiness_score=burstiness_score,
-            entropy_score=entropy_score,
-            transformer_score=transformer_score,
-            stylometric_score=stylometric_score,
-            text_length=word_count,
-            platform=source_platform
-        )
+        with tracer.span("ensemble"):
+            final_result = self._ensemble_scoring(
+                perplexity_score=perplexity_score,
+                burstiness_score=burstiness_score,
+                entropy_score=entropy_score,
+                transformer_score=transformer_score,
+                stylometric_score=stylometric_score,
+                text_length=word_count,
+                platform=source_platform
+            )
 
         final_result.content_hash = content_hash
+        final_result.model_version = model_version
+        final_result.transformer_latency_ms = round(transformer_seconds * 1000, 3)
 
         # UPDATED: Add confidence thresholding to flag low-confidence predictions
         # Confidence < 0.65 should be reviewed (especially for borderline cases)
@@ -206,12 +348,17 @@ class AdvancedAIDetector:
             if final_result.confidence < 0.50:
                 final_result.confidence *= 0.85
 
-        # Cache result
-        self._cache[content_hash] = final_result
+        # Cache result under the classifier version that scored it
+        self._cache[(content_hash, model_version)] = final_result
+
+        # Candidate model comparison, after the fact and off the request path
+        shadow_scorer.maybe_submit(prepared, final_result, source_platform)
 
         return final_result
 
-    def _calculate_perplexity(self, text: str) -> float:
+    @tracer.traced('scorer.perplexity')
+    @SCORER_LATENCY.labels(scorer='perplexity').time()
+    def _calculate_perplexity(self, prepared: PreparedText) -> float:
         """
         Calculate perplexity using GPT-2
         Low perplexity = more AI-like (predictable)
@@ -221,7 +368,7 @@ class AdvancedAIDetector:
             model, tokenizer = self.gpt2_model
 
             # Tokenize
-            encodings = tokenizer(text, return_tensors='pt', truncation=True, max_length=1024)
+            encodings = tokenizer(prepared.text, return_tensors='pt', truncation=True, max_length=1024)
             input_ids = encodings.input_ids.to(self.device)
 
             with torch.no_grad():
@@ -251,10 +398,12 @@ class AdvancedAIDetector:
             return ai_score
 
         except Exception as e:
-            print(f"[Perplexity] Error: {e}")
+            logger.warning("Perplexity scorer failed: %s", e)
             return 0.5
 
-    def _calculate_burstiness(self, text: str) -> float:
+    @tracer.traced('scorer.burstiness')
+    @SCORER_LATENCY.labels(scorer='burstiness').time()
+    def _calculate_burstiness(self, prepared: PreparedText) -> float:
         """
         Calculate burstiness (variance in sentence structure)
         AI text has low burstiness (uniform sentences)
@@ -262,7 +411,7 @@ class AdvancedAIDetector:
         """
         try:
             # Split into sentences
-            sentences = nltk.sent_tokenize(text)
+            sentences = stylometry.sentences(prepared)
 
             if len(sentences) < 3:
                 return 0.5
@@ -294,27 +443,29 @@ class AdvancedAIDetector:
             return ai_score
 
         except Exception as e:
-            print(f"[Burstiness] Error: {e}")
+            logger.warning("Burstiness scorer failed: %s", e)
             return 0.5
 
-    def _calculate_entropy(self, text: str) -> float:
+    @tracer.traced('scorer.entropy')
+    @SCORER_LATENCY.labels(scorer='entropy').time()
+    def _calculate_entropy(self, prepared: PreparedText) -> float:
         """
         Calculate lexical entropy and diversity
         AI text has lower entropy (repetitive)
         Human text has higher entropy (diverse)
         """
         try:
-            words = text.lower().split()
+            words = prepared.lower_words
 
             if len(words) < 10:
                 return 0.5
 
             # 1. Lexical diversity (unique words / total words)
-            unique_words = len(set(words))
+            word_counts = prepared.lower_word_counts
+            unique_words = len(word_counts)
             lexical_diversity = unique_words / len(words)
 
             # 2. Shannon entropy
-            word_counts = Counter(words)
             total_words = len(words)
             entropy = -sum((count / total_words) * math.log2(count / total_words)
                           for count in word_counts.values())
@@ -323,9 +474,9 @@ class AdvancedAIDetector:
             normalized_entropy = min(entropy / 12, 1.0)
 
             # 3. N-gram repetition
-            bigrams = list(zip(words[:-1], words[1:]))
-            unique_bigrams = len(set(bigrams))
-            bigram_diversity = unique_bigrams / len(bigrams) if bigrams else 0
+            bigrams = prepared.ngram_counts(2)
+            total_bigrams = len(words) - 1
+            bigram_diversity = len(bigrams) / total_bigrams if total_bigrams else 0
 
             # Combine metrics
             # High diversity + high entropy = human
@@ -338,47 +489,64 @@ class AdvancedAIDetector:
             return ai_score
 
         except Exception as e:
-            print(f"[Entropy] Error: {e}")
+            logger.warning("Entropy scorer failed: %s", e)
             return 0.5
 
-    def _transformer_classify(self, text: str) -> float:
+    @staticmethod
+    def _timed(func, *args):
+        """(func(*args), seconds it took)"""
+        started = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - started
+
+    @tracer.traced('scorer.transformer')
+    @SCORER_LATENCY.labels(scorer='transformer').time()
+    def _transformer_classify(self, classifier: Optional[ServingClassifier], prepared: PreparedText) -> float:
         """
         Use transformer-based classifier (RoBERTa fine-tuned on AI detection)
         """
+        if classifier is None:
+            return 0.5
         try:
-            model, tokenizer = self.ai_classifier
-
-            # Tokenize
-            inputs = tokenizer(
-                text,
-                return_tensors='pt',
-                truncation=True,
-                max_length=512,
-                padding=True
-            ).to(self.device)
-
-            with torch.no_grad():
-                outputs = model(**inputs)
-                logits = outputs.logits
-                probs = torch.softmax(logits, dim=-1)
-
-            # FIX: Model labels are inverted during training
-            # Label 0 should be "human" but model predicts it as "AI"
-            # Label 1 should be "AI" but model predicts it as "human"
-            # So we read label 0 instead of label 1
-            ai_prob = probs[0][0].item() if probs.shape[1] > 1 else 0.5
-
-            return ai_prob
+            return self._classify_with(classifier, prepared)
 
         except Exception as e:
-            print(f"[Transformer] Error: {e}")
+            logger.warning("Transformer scorer failed: %s", e)
             return 0.5
 
-    def _stylometric_analysis(self, text: str) -> float:
+    def _classify_with(self, classifier: ServingClassifier, prepared: PreparedText) -> float:
+        """AI probability from one classifier (the serving one, or a shadow candidate)"""
+        # Tokenize
+        inputs = classifier.tokenizer(
+            prepared.text,
+            return_tensors='pt',
+            truncation=True,
+            max_length=512,
+            padding=True
+        ).to(self.device)
+
+        with torch.no_grad():
+            outputs = classifier.model(**inputs)
+            logits = outputs.logits
+            probs = torch.softmax(logits, dim=-1)
+
+        # FIX: Model labels are inverted during training
+        # Label 0 should be "human" but model predicts it as "AI"
+        # Label 1 should be "AI" but model predicts it as "human"
+        # So we read label 0 instead of label 1
+        ai_prob = probs[0][0].item() if probs.shape[1] > 1 else 0.5
+
+        return ai_prob
+
+    @tracer.traced('scorer.stylometric')
+    @SCORER_LATENCY.labels(scorer='stylometric').time()
+    def _stylometric_analysis(self, prepared: PreparedText) -> float:
         """
         Analyze writing style features
         """
         try:
+            text = prepared.text
+            word_count = prepared.word_count
             ai_score = 0.5
 
             # 1. Readability scores
@@ -394,29 +562,24 @@ class AdvancedAIDetector:
                 ai_score += 0.1
 
             # 3. Syllable patterns
-            syllables_per_word = textstat.syllable_count(text) / len(text.split())
+            syllables_per_word = textstat.syllable_count(text) / word_count
             # AI tends toward 1.5-2.0 syllables per word
             if 1.5 <= syllables_per_word <= 2.0:
                 ai_score += 0.1
 
             # 4. Punctuation patterns
-            exclamation_ratio = text.count('!') / max(len(text.split()), 1)
-            question_ratio = text.count('?') / max(len(text.split()), 1)
+            exclamation_ratio = text.count('!') / max(word_count, 1)
+            question_ratio = text.count('?') / max(word_count, 1)
 
             # AI uses less exclamation marks
             if exclamation_ratio < 0.01:
                 ai_score += 0.05
 
             # 5. Part-of-speech patterns
-            words = nltk.word_tokenize(text)
-            pos_tags = nltk.pos_tag(words)
-            pos_counts = Counter(tag for word, tag in pos_tags)
-
             # AI tends to use more adjectives (JJ) and adverbs (RB)
-            total_tags = len(pos_tags)
-            if total_tags > 0:
-                adj_ratio = pos_counts.get('JJ', 0) / total_tags
-                adv_ratio = pos_counts.get('RB', 0) / total_tags
+            pos_ratios = stylometry.pos_ratios(prepared)
+            if pos_ratios is not None:
+                adj_ratio, adv_ratio = pos_ratios
 
                 if adj_ratio > 0.1:  # > 10% adjectives
                     ai_score += 0.05
@@ -428,9 +591,9 @@ class AdvancedAIDetector:
                 'however', 'moreover', 'furthermore', 'additionally',
                 'consequently', 'therefore', 'thus', 'hence'
             ]
-            text_lower = text.lower()
+            text_lower = prepared.lower
             transition_count = sum(text_lower.count(word) for word in transitions)
-            transition_ratio = transition_count / max(len(text.split()), 1)
+            transition_ratio = transition_count / max(word_count, 1)
 
             # AI uses more transitions
             if transition_ratio > 0.02:
@@ -439,7 +602,7 @@ class AdvancedAIDetector:
             return min(ai_score, 1.0)
 
         except Exception as e:
-            print(f"[Stylometric] Error: {e}")
+            logger.warning("Stylometric scorer failed: %s", e)
             return 0.5
 
     def _ensemble_scoring(
@@ -457,38 +620,12 @@ class AdvancedAIDetector:
         Weights optimized for maximum accuracy
         """
 
-        # Adaptive weights based on text length
+        # Adaptive weights based on text length (hand-tuned defaults or ENSEMBLE_CONFIG_PATH)
         # UPDATED: Reduced stylometric weight to minimize false positives on professional writing
-        if text_length < 50:
-            # Short text: rely more on transformer and patterns
-            weights = {
-                'perplexity': 0.20,
-                'burstiness': 0.15,
-                'entropy': 0.20,
-                'transformer': 0.35,
-                'stylometric': 0.10  # Reduced from 0.20 to avoid flagging clear writing
-            }
-            base_confidence = 0.70
-        elif text_length < 150:
-            # Medium text: balanced
-            weights = {
-                'perplexity': 0.25,
-                'burstiness': 0.15,
-                'entropy': 0.25,
-                'transformer': 0.25,
-                'stylometric': 0.10  # Reduced from 0.15
-            }
-            base_confidence = 0.85
-        else:
-            # Long text: all methods reliable
-            weights = {
-                'perplexity': 0.30,
-                'burstiness': 0.20,
-                'entropy': 0.25,
-                'transformer': 0.15,
-                'stylometric': 0.10  # Reduced from 0.15
-            }
-            base_confidence = 0.95
+        config = self.ensemble_config
+        bucket = length_bucket(text_length)
+        weights = config['weights'][bucket]
+        base_confidence = config['base_confidence'][bucket]
 
         # Calculate weighted score
         ai_probability = (
@@ -498,6 +635,7 @@ class AdvancedAIDetector:
             weights['transformer'] * transformer_score +
             weights['stylometric'] * stylometric_score
         )
+        ai_probability = float(calibrate(ai_probability, config['calibration']))
 
         # Platform adjustments - UPDATED to reduce false positives
         if platform == 'twitter':
@@ -515,24 +653,12 @@ class AdvancedAIDetector:
         # Low variance = high agreement = high confidence
         confidence = base_confidence * (1 - min(score_variance, 0.3))
 
-        # UPDATED: Add uncertainty band for borderline cases (35-65% range)
+        # UPDATED: Add uncertainty band for borderline cases (35-65% range by default)
         # This reduces false positives by requiring stronger evidence
-        if 0.35 < ai_probability < 0.65:
-            # Borderline case - reduce confidence and mark as uncertain
+        classification = classify(ai_probability, config['thresholds'])
+        if classification == "UNCERTAIN":
+            # Borderline case - reduce confidence
             confidence *= 0.70
-            classification = "UNCERTAIN"
-        # Classification thresholds (outside uncertainty band)
-        elif ai_probability >= 0.80:
-            classification = "AI"
-        elif ai_probability >= 0.65:
-            classification = "LIKELY_AI"
-        elif ai_probability <= 0.35 and ai_probability >= 0.20:
-            classification = "LIKELY_HUMAN"
-        elif ai_probability < 0.20:
-            classification = "HUMAN"
-        else:
-            # Fallback for edge cases
-            classification = "MIXED"
 
         return AdvancedDetectionResult(
             classification=classification,
@@ -1,11 +1,44 @@
 import base64
 import hashlib
 import io
-from typing import Dict, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from PIL import Image
 from PIL.ExifTags import TAGS
 import numpy as np
+from app.config import settings
+from app.scheduler import scheduler
+from app.metrics import DETECTION_LATENCY
+
+# IJG (libjpeg) base luminance quantization table, row-major; encoders that
+# don't ship their own tables scale this one by the quality setting
+IJG_LUMINANCE = np.array([
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99
+])
+
+# Row-major index of each zigzag position (older Pillow returns tables in zigzag order)
+ZIGZAG = np.array([
+    0, 1, 8, 16, 9, 2, 3, 10, 17, 24, 32, 25, 18, 11, 4, 5,
+    12, 19, 26, 33, 40, 48, 41, 34, 27, 20, 13, 6, 7, 14, 21, 28,
+    35, 42, 49, 56, 57, 50, 43, 36, 29, 22, 15, 23, 30, 37, 44, 51,
+    58, 59, 52, 45, 38, 31, 39, 46, 53, 60, 61, 54, 47, 55, 62, 63
+])
+
+
+def _ijg_table(quality: int) -> np.ndarray:
+    scale = 5000 / quality if quality < 50 else 200 - 2 * quality
+    return np.clip((IJG_LUMINANCE * scale + 50) // 100, 1, 255)
+
+
+IJG_TABLES = {quality: _ijg_table(quality) for quality in range(1, 101)}
 
 @dataclass
 class ImageDetectionResult:
@@ -43,6 +76,7 @@ class ImageDetector:
             
             image_bytes = base64.b64decode(image_data)
             content_hash = hashlib.sha256(image_bytes).hexdigest()
+            # Lazy: only the header is read here; pixels are decoded in _analyze_properties
             image = Image.open(io.BytesIO(image_bytes))
             
         except Exception as e:
@@ -80,13 +114,16 @@ class ImageDetector:
                 reason=f"Camera detected: {metadata_result.get('camera')}"
             )
         
-        # Analyze image properties
-        properties_result = self._analyze_properties(image)
+        # Analyze image properties (decoding and FFT off the event loop)
+        started = time.perf_counter()
+        async with scheduler.lane():
+            properties_result = await scheduler.to_thread(self._analyze_properties, image)
         
         # Combine scores
         combined = self._combine_scores(metadata_result, properties_result)
         combined.content_hash = content_hash
         
+        DETECTION_LATENCY.labels(detector='image').observe(time.perf_counter() - started)
         return combined
     
     def _analyze_metadata(self, image: Image.Image) -> Dict:
@@ -141,15 +178,22 @@ class ImageDetector:
         return result
     
     def _analyze_properties(self, image: Image.Image) -> Dict:
-        """Analyze image properties for AI signatures"""
+        """
+        Analyze image properties for AI signatures
+
+        The image is decoded once (JPEGs at half scale via draft mode) and
+        reduced to two small arrays: a strided sample of decoded pixels for
+        the colour spread, whose thresholds were set on near-native pixels,
+        and a filtered thumbnail for the spectrum.
+        """
         result = {'score': 0.5}
         
         try:
-            # Convert to array
-            img_array = np.array(image.convert('RGB'))
-            
-            # Check for unusual dimensions (AI often uses specific sizes)
+            # Header facts first: draft() and thumbnail() change image.size
             width, height = image.size
+            quantization = getattr(image, 'quantization', None)
+
+            # Check for unusual dimensions (AI often uses specific sizes)
             ai_sizes = [
                 (512, 512), (768, 768), (1024, 1024),
                 (512, 768), (768, 512), (1024, 768), (768, 1024),
@@ -159,23 +203,44 @@ class ImageDetector:
             if (width, height) in ai_sizes:
                 result['score'] += 0.1
                 result['ai_size'] = True
-            
-            # Check color distribution
-            # AI images often have unusual color patterns
-            r, g, b = img_array[:,:,0], img_array[:,:,1], img_array[:,:,2]
-            
-            # Very uniform color distribution can indicate AI
-            r_std = np.std(r)
-            g_std = np.std(g)
-            b_std = np.std(b)
-            
-            avg_std = (r_std + g_std + b_std) / 3
-            
-            if avg_std < 30:  # Very uniform
-                result['score'] += 0.15
-                result['uniform_colors'] = True
-            elif avg_std > 80:  # High variance (natural photos)
-                result['score'] -= 0.1
+
+            # JPEG quantization tables: stock libjpeg tables vs an encoder's own
+            if quantization:
+                result.update(self._inspect_quantization(quantization))
+                if result.get('jpeg_standard_tables'):
+                    # Saved by a library at a quality setting, as generators' output is
+                    result['score'] += 0.05
+                else:
+                    # Camera firmware and editors ship their own tables
+                    result['score'] -= 0.1
+
+            pixels = self._pixels(image, width, height)
+            if pixels is None:
+                result['skipped'] = 'too_large'
+            else:
+                samples, thumbnail = pixels
+
+                # Check color distribution
+                # AI images often have unusual color patterns
+                # Very uniform color distribution can indicate AI
+                avg_std = float(samples.reshape(-1, 3).std(axis=0).mean())
+                
+                if avg_std < 30:  # Very uniform
+                    result['score'] += 0.15
+                    result['uniform_colors'] = True
+                elif avg_std > 80:  # High variance (natural photos)
+                    result['score'] -= 0.1
+
+                # Natural images have power falling off roughly as 1/f^2;
+                # a much steeper fall-off means fine texture is missing
+                slope = self._spectral_slope(thumbnail)
+                if slope is not None:
+                    result['spectral_slope'] = slope
+                    if slope < -3.0:  # Over-smooth
+                        result['score'] += 0.1
+                        result['smooth_spectrum'] = True
+                    elif slope > -2.6:  # Natural fine detail
+                        result['score'] -= 0.05
             
             # Ensure score is in range
             result['score'] = max(min(result['score'], 1.0), 0.0)
@@ -184,6 +249,88 @@ class ImageDetector:
             pass
         
         return result
+
+    def _pixels(self, image: Image.Image, width: int, height: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (pixel sample, thumbnail): RGB float32 arrays of at most
+        IMAGE_ANALYSIS_MAX_SIDE per side, or None if too large to decode
+
+        Both are resized before converting to RGB, so apart from palette
+        images no full-size copy of the decoded image is made.
+        """
+        # JPEG decoders can halve each side while decoding; nothing else can
+        reduction = 4 if image.format == 'JPEG' else 1
+        if width * height / reduction > settings.IMAGE_MAX_DECODE_PIXELS:
+            return None
+
+        # Half scale keeps nearly all of the pixel variance at a quarter of the memory
+        image.draft('RGB', (max(width // 2, 1), max(height // 2, 1)))
+        width, height = image.size
+        max_side = settings.IMAGE_ANALYSIS_MAX_SIDE
+        scale = min(max_side / max(width, height), 1.0)
+        size = (max(int(width * scale), 1), max(int(height * scale), 1))
+
+        # Nearest-neighbour keeps real pixels on a stride; any averaging filter
+        # would smooth away fine variance
+        samples = image.resize(size, Image.Resampling.NEAREST).convert('RGB')
+
+        if image.mode in ('RGBA', 'LA'):
+            # Filtering premultiplies alpha into a full-size copy: filter the
+            # colour bands one at a time instead
+            bands = [
+                image.getchannel(band).resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+                for band in image.getbands() if band != 'A'
+            ]
+            thumbnail = Image.merge(image.mode[:-1], bands)
+        else:
+            if image.mode in ('1', 'P', 'PA'):
+                # Palettes only resize nearest-neighbour; these are graphics,
+                # and one byte per pixel, so the full-size conversion is kept
+                image = image.convert('RGB')
+            thumbnail = image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+        return np.asarray(samples, dtype=np.float32), np.asarray(thumbnail.convert('RGB'), dtype=np.float32)
+
+    def _spectral_slope(self, rgb: np.ndarray) -> Optional[float]:
+        """Slope of log radial power vs log frequency of the luma channel"""
+        gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        h, w = gray.shape
+        if min(h, w) < 64:
+            return None
+
+        gray -= gray.mean()
+        gray *= np.outer(np.hanning(h), np.hanning(w)).astype(np.float32)
+        power = np.abs(np.fft.rfft2(gray)) ** 2
+        radius = np.sqrt(np.fft.fftfreq(h)[:, None] ** 2 + np.fft.rfftfreq(w)[None, :] ** 2)
+
+        # Log-spaced rings between the window's leakage and the resampling filter's roll-off
+        edges = np.geomspace(4 / min(h, w), 0.35, 17)
+        rings = np.digitize(radius.ravel(), edges)
+        totals = np.bincount(rings, weights=power.ravel(), minlength=len(edges) + 1)[1:len(edges)]
+        counts = np.bincount(rings, minlength=len(edges) + 1)[1:len(edges)]
+        valid = (counts > 0) & (totals > 0)
+        if valid.sum() < 4:
+            return None
+
+        centers = np.sqrt(edges[:-1] * edges[1:])
+        slope = np.polyfit(np.log(centers[valid]), np.log(totals[valid] / counts[valid]), 1)[0]
+        return round(float(slope), 3)
+
+    def _inspect_quantization(self, quantization: Dict[int, List[int]]) -> Dict:
+        """Match the luminance table against libjpeg's scaled tables; estimate quality"""
+        table = np.asarray(quantization.get(0, []), dtype=np.int64)
+        if table.size != 64:
+            return {}
+
+        natural = np.empty(64, dtype=np.int64)
+        natural[ZIGZAG] = table
+        for quality, reference in IJG_TABLES.items():
+            if np.array_equal(table, reference) or np.array_equal(natural, reference):
+                return {'jpeg_quality': quality, 'jpeg_standard_tables': True}
+
+        # Custom tables: the IJG quality whose table is closest in overall scale
+        ratio = float(table.mean() / IJG_LUMINANCE.mean()) * 100
+        quality = (5000 / ratio) if ratio > 100 else (200 - ratio) / 2
+        return {'jpeg_quality': int(round(min(max(quality, 1), 100))), 'jpeg_standard_tables': False}
     
     def _combine_scores(self, metadata: Dict, properties: Dict) -> ImageDetectionResult:
         """Combine analysis results"""
@@ -222,7 +369,8 @@ class ImageDetector:
             confidence=round(confidence, 4),
             scores={
                 'metadata': round(metadata['score'], 4),
-                'properties': round(properties['score'], 4)
+                'properties': round(properties['score'], 4),
+                **{key: properties[key] for key in ('spectral_slope', 'jpeg_quality') if key in properties}
             },
             content_hash=""
         )
@@ -0,0 +1,130 @@
+"""
+Model Cache
+Loads transformer checkpoints from a local directory of pre-converted
+safetensors copies, which transformers memory-maps rather than reading and
+unpickling. Together with low_cpu_mem_usage (no random init, no second
+copy) a cold start mostly costs page faults on the weights it touches.
+
+A model that is not in the cache yet is loaded from its source (Hub ID or
+local path) and written to the cache for the next start. Every load is
+timed for the startup report (GET /models/startup, logs, metrics).
+
+Pre-populate the cache at image build time:
+    python -m app.detection.model_cache gpt2 roberta-base-openai-detector
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import logging
+import tempfile
+import threading
+from typing import Dict, List, Tuple
+
+from app.config import settings
+from app.metrics import MODEL_LOAD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def has_safetensors(path: str) -> bool:
+    return os.path.isdir(path) and any(name.endswith('.safetensors') for name in os.listdir(path))
+
+
+class ModelCache:
+    def __init__(self, cache_dir: str, convert: bool = True):
+        self.cache_dir = cache_dir
+        self.convert = convert
+        self._loads: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def cached_path(self, name_or_path: str) -> str:
+        slug = re.sub(r'[^A-Za-z0-9._-]+', '--', name_or_path.strip('/'))
+        return os.path.join(self.cache_dir, slug)
+
+    def load(self, model_cls, tokenizer_cls, name_or_path: str, label: str, device=None, **model_kwargs) -> Tuple:
+        """
+        (model, tokenizer) in eval mode, on `device` if given
+
+        Extra model_kwargs (e.g. num_labels for a fresh head) skip the cache,
+        since the cached copy would not match them.
+        """
+        started = time.perf_counter()
+        cached = self.cached_path(name_or_path) if self.cache_dir else ""
+
+        if has_safetensors(name_or_path):
+            source, source_format = name_or_path, 'safetensors'
+        elif cached and not model_kwargs and has_safetensors(cached):
+            source, source_format = cached, 'cache'
+        else:
+            source, source_format = name_or_path, 'pretrained'
+
+        load_kwargs = dict(model_kwargs, low_cpu_mem_usage=True)
+        if source_format != 'pretrained':
+            load_kwargs['use_safetensors'] = True
+
+        model = model_cls.from_pretrained(source, **load_kwargs)
+        tokenizer = tokenizer_cls.from_pretrained(source)
+
+        if source_format == 'pretrained' and cached and self.convert and not model_kwargs:
+            self._write_cache(model, tokenizer, cached)
+
+        if device is not None:
+            model = model.to(device)
+        model.eval()
+
+        seconds = time.perf_counter() - started
+        self._record(label, name_or_path, source, source_format, seconds)
+        return model, tokenizer
+
+    def _write_cache(self, model, tokenizer, cached: str):
+        """Save a safetensors copy, renamed into place so readers never see a partial one"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            staging = tempfile.mkdtemp(dir=self.cache_dir, prefix='.converting-')
+            model.save_pretrained(staging, safe_serialization=True)
+            tokenizer.save_pretrained(staging)
+            if os.path.exists(cached):
+                shutil.rmtree(cached)
+            os.replace(staging, cached)
+            logger.info("Cached safetensors copy at %s", cached)
+        except Exception as e:
+            logger.warning("Could not write model cache %s: %s", cached, e)
+
+    def _record(self, label: str, name_or_path: str, source: str, source_format: str, seconds: float):
+        MODEL_LOAD_SECONDS.labels(model=label, format=source_format).set(seconds)
+        with self._lock:
+            self._loads.append({
+                'model': label,
+                'name': name_or_path,
+                'loaded_from': source,
+                'format': source_format,
+                'seconds': round(seconds, 3)
+            })
+        logger.info("Loaded %s from %s (%s) in %.2fs", label, source, source_format, seconds)
+
+    def report(self) -> Dict:
+        with self._lock:
+            loads = list(self._loads)
+        return {
+            'cache_dir': self.cache_dir,
+            'loads': loads,
+            'total_seconds': round(sum(load['seconds'] for load in loads), 3)
+        }
+
+
+# Global instance
+model_cache = ModelCache(settings.MODEL_CACHE_DIR, settings.MODEL_CACHE_CONVERT)
+
+
+if __name__ == "__main__":
+    from transformers import AutoModelForSequenceClassification, AutoModelForCausalLM, AutoTokenizer
+
+    logging.basicConfig(level=logging.INFO)
+    for name in sys.argv[1:]:
+        model_cls = AutoModelForCausalLM if name.startswith('gpt2') else AutoModelForSequenceClassification
+        model_cache.load(model_cls, AutoTokenizer, name, label=name)
+    for load in model_cache.report()['loads']:
+        print(f"{load['model']:<40} {load['format']:<12} {load['seconds']:>7.2f}s  {load['loaded_from']}")
@@ -0,0 +1,91 @@
+"""
+Model Server Client
+One pooled, keep-alive httpx client for the ai-model-server, with the wire
+format negotiated by content type
+
+- json: application/json (default, works with any model server)
+- msgpack: application/msgpack for request and response bodies, smaller
+  and faster to encode for large batches (needs the msgpack package on
+  both sides; falls back to JSON when it is missing here)
+
+Set AI_MODEL_SERVER_UDS to reach a co-located server over a Unix socket;
+AI_MODEL_SERVER_URL is then only used for the Host header and paths.
+"""
+
+import json
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+
+class ModelServerClient:
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.base_url = settings.AI_MODEL_SERVER_URL.rstrip('/')
+        self.use_msgpack = settings.AI_MODEL_SERVER_TRANSPORT == "msgpack"
+
+        if self.use_msgpack and not MSGPACK_AVAILABLE:
+            logger.warning("AI_MODEL_SERVER_TRANSPORT=msgpack but msgpack is not installed, using JSON")
+            self.use_msgpack = False
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Shared client, created on first use so it binds to the running loop"""
+        if self._client is None:
+            transport = None
+            if settings.AI_MODEL_SERVER_UDS:
+                transport = httpx.AsyncHTTPTransport(uds=settings.AI_MODEL_SERVER_UDS)
+            self._client = httpx.AsyncClient(
+                transport=transport,
+                limits=httpx.Limits(
+                    max_connections=settings.AI_MODEL_SERVER_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.AI_MODEL_SERVER_MAX_CONNECTIONS,
+                    keepalive_expiry=settings.AI_MODEL_SERVER_KEEPALIVE_SECONDS
+                )
+            )
+        return self._client
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def encode(self, payload: Dict) -> Dict:
+        """Request keyword arguments (headers and body) for the negotiated format"""
+        if self.use_msgpack:
+            return {
+                'headers': {"Content-Type": MSGPACK_CONTENT_TYPE, "Accept": MSGPACK_CONTENT_TYPE},
+                'content': msgpack.packb(payload, use_bin_type=True)
+            }
+        return {
+            'headers': {"Content-Type": JSON_CONTENT_TYPE, "Accept": JSON_CONTENT_TYPE},
+            'content': json.dumps(payload).encode()
+        }
+
+    def decode(self, response: httpx.Response) -> Dict:
+        """Parse a response body by its content type (servers may always answer JSON)"""
+        content_type = response.headers.get("content-type", "")
+        if content_type.startswith(MSGPACK_CONTENT_TYPE) and MSGPACK_AVAILABLE:
+            return msgpack.unpackb(response.content, raw=False)
+        return response.json()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global instance
+model_server = ModelServerClient()
@@ -0,0 +1,113 @@
+"""
+Prepared Text
+One request's text plus every derived form the scorers need (sentences,
+words, lowercased tokens, n-gram counts), each computed on first use and
+then shared, so a text is split at most once per form no matter how many
+scorers read it
+"""
+
+import re
+import hashlib
+from collections import Counter
+from typing import Dict, List, Tuple, Union
+
+SENTENCE_SPLIT = re.compile(r'[.!?]+')
+
+
+class memoized:
+    """
+    Property computed once per instance and stored in its __dict__
+
+    Unlike functools.cached_property before Python 3.12, it takes no lock,
+    which there is shared by every instance of the class and would
+    serialize concurrent requests.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        values = instance.__dict__
+        if self.name not in values:
+            values[self.name] = self.func(instance)
+        return values[self.name]
+
+
+class PreparedText:
+    """
+    Lazily memoized views of a text
+
+    Scorers run on parallel threads without locking; a property first read
+    by two threads at once is computed twice with the same result, and the
+    later store wins.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._ngrams: Dict[int, Counter] = {}
+
+    @classmethod
+    def of(cls, text: Union[str, "PreparedText"]) -> "PreparedText":
+        """Wrap a raw string, or pass an already prepared text through"""
+        return text if isinstance(text, PreparedText) else cls(text)
+
+    @memoized
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.text.encode()).hexdigest()
+
+    @memoized
+    def words(self) -> List[str]:
+        """Whitespace-separated words"""
+        return self.text.split()
+
+    @memoized
+    def word_count(self) -> int:
+        return len(self.words)
+
+    @memoized
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @memoized
+    def lower_words(self) -> List[str]:
+        """Whitespace-separated words of the lowercased text"""
+        return self.lower.split()
+
+    @memoized
+    def lower_word_counts(self) -> Counter:
+        return Counter(self.lower_words)
+
+    @memoized
+    def sentences(self) -> List[str]:
+        """Sentences from NLTK's punkt tokenizer"""
+        import nltk
+        return nltk.sent_tokenize(self.text)
+
+    @memoized
+    def punctuation_sentences(self) -> List[str]:
+        """Stripped segments between runs of . ! ? (cheap, no NLTK)"""
+        return [s.strip() for s in SENTENCE_SPLIT.split(self.text)]
+
+    @memoized
+    def tokens(self) -> List[str]:
+        """NLTK word tokens (punctuation split off)"""
+        import nltk
+        return nltk.word_tokenize(self.text)
+
+    @memoized
+    def pos_tags(self) -> List[Tuple[str, str]]:
+        import nltk
+        return nltk.pos_tag(self.tokens)
+
+    def ngram_counts(self, n: int) -> Counter:
+        """Counts of lowercased word n-grams"""
+        counts = self._ngrams.get(n)
+        if counts is None:
+            words = self.lower_words
+            counts = Counter(zip(*(words[i:] for i in range(n))))
+            self._ngrams[n] = counts
+        return counts
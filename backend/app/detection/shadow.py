@@ -0,0 +1,214 @@
+"""
+Shadow Scoring
+Runs a candidate classifier (the registry's shadow version) on a sampled
+fraction of live traffic and compares it with production, after the
+production result is computed and off the request path
+
+- Sampling: the candidate's sample_rate, and nothing at all while
+  interactive requests are queueing for a scheduler slot
+- A bounded queue between the request path and one background worker;
+  when it is full the sample is dropped (and counted), never waited for
+- Scoring runs on the bulk lane, so it competes with batch jobs, not scans
+- Each comparison is appended to SHADOW_RESULTS_PATH and kept in a rolling
+  window for the report (GET /api/v1/ml/shadow/report)
+
+The candidate replaces only the transformer score; the other scorers'
+results are reused from production and re-ensembled, so agreement reflects
+the final verdict users would see.
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+from collections import Counter, deque
+from typing import Deque, Dict, Optional
+
+from app.config import settings
+from app.scheduler import scheduler, INTERACTIVE, BULK
+from app.ml.model_registry import model_registry
+from app.metrics import SHADOW_SAMPLES
+
+logger = logging.getLogger(__name__)
+
+# How often the registry is re-read for a new candidate or sample rate
+CONFIG_REFRESH_SECONDS = 5.0
+
+
+def _percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(p / 100 * len(ordered)), len(ordered) - 1)]
+
+
+class ShadowScorer:
+    def __init__(self, queue_size: int, window: int, results_path: str = ""):
+        self.queue_size = queue_size
+        self.results_path = results_path
+        self.counts = Counter()
+        self._results: Deque[Dict] = deque(maxlen=window)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._detector = None
+        self._candidate = None
+        self._config: Optional[Dict] = None
+        self._config_checked = 0.0
+
+    def start(self, detector):
+        """Start the background worker (from the app's lifespan)"""
+        self._detector = detector
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self._queue = None
+        self._candidate = None
+
+    def _current_config(self) -> Optional[Dict]:
+        now = time.monotonic()
+        if now - self._config_checked >= CONFIG_REFRESH_SECONDS:
+            self._config = model_registry.shadow()
+            self._config_checked = now
+            if self._config is None:
+                # Shadowing was cleared: free the candidate's weights
+                self._candidate = None
+        return self._config
+
+    def _count(self, outcome: str):
+        self.counts[outcome] += 1
+        SHADOW_SAMPLES.labels(outcome=outcome).inc()
+
+    def maybe_submit(self, prepared, production, source_platform: Optional[str] = None):
+        """Queue a production result for shadow scoring if sampled; never blocks"""
+        if self._queue is None:
+            return
+        config = self._current_config()
+        if not config or config['version'] == production.model_version:
+            return
+        if random.random() >= config['sample_rate']:
+            return
+
+        # Load shedding: production is already waiting for slots
+        if scheduler.lanes[INTERACTIVE].depth > 0:
+            self._count('skipped_busy')
+            return
+
+        try:
+            self._queue.put_nowait((prepared, production, source_platform, config))
+            self._count('queued')
+        except asyncio.QueueFull:
+            self._count('dropped')
+
+    async def _run(self):
+        while True:
+            prepared, production, source_platform, config = await self._queue.get()
+            try:
+                await self._score(prepared, production, source_platform, config)
+                self._count('scored')
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._count('failed')
+                logger.warning("Shadow scoring of %s failed: %s", config['version'], e)
+
+    async def _score(self, prepared, production, source_platform: Optional[str], config: Dict):
+        detector = self._detector
+        async with scheduler.lane(BULK):
+            if self._candidate is None or self._candidate.version != config['version']:
+                self._candidate = None
+                logger.info("Loading shadow candidate %s", config['version'])
+                self._candidate = await scheduler.to_thread(detector._load_registered, config)
+            transformer_score, seconds = await scheduler.to_thread(
+                detector._timed, detector._classify_with, self._candidate, prepared
+            )
+
+        shadow = detector._ensemble_scoring(
+            perplexity_score=production.perplexity_score,
+            burstiness_score=production.burstiness_score,
+            entropy_score=production.entropy_score,
+            transformer_score=transformer_score,
+            stylometric_score=production.stylometric_score,
+            text_length=prepared.word_count,
+            platform=source_platform
+        )
+
+        record = {
+            'ts': round(time.time(), 3),
+            'content_hash': production.content_hash,
+            'production_version': production.model_version,
+            'shadow_version': config['version'],
+            'production': {
+                'classification': production.classification,
+                'ai_probability': production.ai_probability,
+                'transformer_score': round(production.transformer_score, 4),
+                'transformer_ms': production.transformer_latency_ms
+            },
+            'shadow': {
+                'classification': shadow.classification,
+                'ai_probability': shadow.ai_probability,
+                'transformer_score': round(transformer_score, 4),
+                'transformer_ms': round(seconds * 1000, 3)
+            }
+        }
+        self._results.append(record)
+        if self.results_path:
+            await asyncio.to_thread(self._append, record)
+
+    def _append(self, record: Dict):
+        directory = os.path.dirname(self.results_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.results_path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+    def report(self) -> Dict:
+        """Agreement and latency of the candidate vs production over the rolling window"""
+        config = self._current_config()
+        records = [r for r in self._results if config and r['shadow_version'] == config['version']]
+        total = len(records)
+
+        def share(predicate) -> Optional[float]:
+            return round(sum(1 for r in records if predicate(r)) / total, 4) if total else None
+
+        production_ms = [r['production']['transformer_ms'] for r in records]
+        shadow_ms = [r['shadow']['transformer_ms'] for r in records]
+        latency = {}
+        for p in (50, 95, 99):
+            production_p = _percentile(production_ms, p)
+            shadow_p = _percentile(shadow_ms, p)
+            latency[f'p{p}'] = {
+                'production_ms': round(production_p, 3),
+                'shadow_ms': round(shadow_p, 3),
+                'delta_ms': round(shadow_p - production_p, 3)
+            }
+
+        return {
+            'candidate': config,
+            'compared': total,
+            'classification_agreement': share(
+                lambda r: r['production']['classification'] == r['shadow']['classification']
+            ),
+            'verdict_agreement': share(
+                lambda r: (r['production']['ai_probability'] >= 0.5) == (r['shadow']['ai_probability'] >= 0.5)
+            ),
+            'mean_abs_probability_delta': round(
+                sum(abs(r['production']['ai_probability'] - r['shadow']['ai_probability']) for r in records) / total, 4
+            ) if total else None,
+            'transformer_latency': latency,
+            'samples': dict(self.counts),
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0
+        }
+
+
+# Global instance
+shadow_scorer = ShadowScorer(
+    queue_size=settings.SHADOW_QUEUE_SIZE,
+    window=settings.SHADOW_REPORT_WINDOW,
+    results_path=settings.SHADOW_RESULTS_PATH
+)
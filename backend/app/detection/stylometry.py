@@ -0,0 +1,268 @@
+"""
+Stylometry Engines
+Sentence segmentation and part-of-speech ratios for the stylometric and
+burstiness scorers, behind one interface so deployments can trade NLTK's
+accuracy for speed (STYLOMETRY_ENGINE)
+
+- nltk: punkt sentences and the averaged perceptron tagger (reference)
+- fast: regex sentence splitter for short texts and a lexicon/suffix
+  tagger that only decides JJ vs RB vs other, which is all the scorer reads
+
+Compare them with `python -m benchmarks.stylometry`.
+"""
+
+import re
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.detection.prepared import PreparedText
+
+logger = logging.getLogger(__name__)
+
+ADJECTIVE = "JJ"
+ADVERB = "RB"
+OTHER = "-"
+
+
+class StylometryEngine:
+    name = ""
+
+    def sentences(self, prepared: PreparedText) -> List[str]:
+        raise NotImplementedError
+
+    def pos_ratios(self, prepared: PreparedText) -> Optional[Tuple[float, float]]:
+        """(adjective, adverb) share of all tokens, or None for an empty text"""
+        raise NotImplementedError
+
+
+class NltkStylometry(StylometryEngine):
+    """Punkt sentences and perceptron POS tags (the original behaviour)"""
+
+    name = "nltk"
+
+    def sentences(self, prepared: PreparedText) -> List[str]:
+        return prepared.sentences
+
+    def pos_ratios(self, prepared: PreparedText) -> Optional[Tuple[float, float]]:
+        pos_tags = prepared.pos_tags
+        if not pos_tags:
+            return None
+        adjectives = sum(1 for _, tag in pos_tags if tag == ADJECTIVE)
+        adverbs = sum(1 for _, tag in pos_tags if tag == ADVERB)
+        return adjectives / len(pos_tags), adverbs / len(pos_tags)
+
+
+# ============================================================================
+# Fast engine
+# ============================================================================
+
+# Treebank-style tokens: contractions split off ("do", "n't"), punctuation separate
+TOKEN_PATTERN = re.compile(r"\w+(?=n't\b)|n't\b|'(?:s|re|ve|ll|d|m)\b|\w+(?:[-']\w+)*|\.\.\.|[^\w\s]", re.IGNORECASE)
+
+# Candidate sentence boundaries: terminal punctuation, optional closing quotes/brackets, whitespace
+BOUNDARY_PATTERN = re.compile(r"[.!?]+[\"')\]]*\s+")
+
+ABBREVIATIONS = {
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'e.g', 'i.e',
+    'inc', 'ltd', 'co', 'corp', 'no', 'fig', 'approx', 'u.s', 'u.k', 'jan', 'feb',
+    'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec'
+}
+
+ADVERBS = {
+    'not', "n't", 'also', 'very', 'so', 'too', 'just', 'now', 'then', 'here', 'there',
+    'always', 'never', 'often', 'still', 'even', 'only', 'ever', 'already', 'almost',
+    'quite', 'rather', 'again', 'soon', 'perhaps', 'however', 'moreover', 'furthermore',
+    'thus', 'hence', 'therefore', 'instead', 'back', 'away', 'together', 'ago', 'yet',
+    'once', 'twice', 'maybe', 'anyway', 'otherwise', 'sometimes', 'somewhat', 'indeed',
+    'nevertheless', 'nonetheless', 'meanwhile', 'afterwards', 'later', 'tomorrow',
+    'forward', 'abroad', 'ahead', 'alone', 'else', 'enough', 'further', 'anymore', 'tbh'
+}
+
+# -ly words that are neither adverbs nor adjectives (nouns, verbs, names)
+LY_NON_ADVERBS = {
+    'family', 'reply', 'supply', 'apply', 'fly', 'july', 'italy', 'rely', 'ally',
+    'belly', 'bully', 'jelly', 'rally', 'tally', 'assembly', 'anomaly', 'butterfly',
+    'monopoly', 'melancholy', 'comply', 'multiply', 'imply', 'emily', 'lily', 'sally'
+}
+# -ly words that are adjectives
+LY_ADJECTIVES = {
+    'holy', 'ugly', 'friendly', 'lovely', 'likely', 'unlikely', 'early', 'daily',
+    'weekly', 'monthly', 'yearly', 'silly', 'lonely', 'costly', 'elderly', 'curly',
+    'deadly', 'lively', 'orderly', 'timely', 'worldly', 'scholarly', 'manly', 'chilly'
+}
+
+ADJECTIVES = {
+    'good', 'new', 'old', 'great', 'big', 'small', 'large', 'little', 'long', 'high',
+    'low', 'different', 'important', 'same', 'able', 'bad', 'last', 'next', 'young',
+    'few', 'own', 'other', 'public', 'sure', 'real', 'full', 'free', 'whole', 'clear',
+    'hard', 'easy', 'possible', 'simple', 'strong', 'open', 'true', 'certain', 'major',
+    'special', 'main', 'human', 'local', 'social', 'national', 'natural', 'modern',
+    'robust', 'crucial', 'essential', 'significant', 'various', 'unprecedented',
+    'strategic', 'pivotal', 'nuanced', 'holistic', 'complex', 'optimal', 'digital',
+    'technical', 'current', 'recent', 'entire', 'common', 'hot', 'cold', 'short',
+    'nice', 'cool', 'wild', 'crazy', 'weird', 'dope', 'mid', 'fun', 'sad', 'happy',
+    'late', 'ready', 'wrong', 'right', 'fine', 'dark', 'white', 'black', 'red', 'blue',
+    'green', 'key', 'fast', 'slow', 'deep', 'wide', 'huge', 'tiny', 'cheap', 'rich',
+    'poor', 'safe', 'busy', 'quick', 'final', 'total', 'basic', 'general', 'specific',
+    'overall', 'actual', 'available', 'several', 'soggy', 'tricky', 'pretty'
+}
+
+ADJECTIVE_SUFFIXES = ('able', 'ible', 'ful', 'ous', 'ive', 'less', 'ical', 'ic', 'al', 'ish', 'ary', 'ent', 'ant')
+
+# Suffix matches that are usually nouns, verbs or prepositions
+SUFFIX_NON_ADJECTIVES = {
+    'animal', 'signal', 'capital', 'hospital', 'festival', 'arrival', 'proposal',
+    'approval', 'individual', 'material', 'potential', 'criminal', 'interval',
+    'journal', 'metal', 'medal', 'pedal', 'portal', 'rival', 'scandal', 'survival',
+    'trial', 'deal', 'meal', 'goal', 'coal', 'oval', 'canal',
+    'executive', 'objective', 'olive', 'archive', 'detective', 'initiative',
+    'alternative', 'incentive', 'perspective', 'representative', 'narrative',
+    'relative', 'give', 'live', 'five', 'drive', 'arrive', 'alive', 'dive', 'hive',
+    'music', 'topic', 'logic', 'traffic', 'panic', 'republic', 'clinic', 'fabric',
+    'mechanic', 'critic', 'picnic', 'magic', 'graphic', 'rhetoric', 'arithmetic',
+    'table', 'cable', 'vegetable', 'variable', 'bible', 'handful', 'mouthful',
+    'unless', 'bless', 'library', 'summary', 'salary', 'dictionary', 'secretary',
+    'boundary', 'anniversary', 'diary', 'glossary', 'itinerary', 'commentary',
+    'january', 'february', 'student', 'moment', 'government', 'ment', 'event',
+    'agent', 'parent', 'client', 'talent', 'content', 'percent', 'cent', 'went',
+    'sent', 'spent', 'meant', 'bent', 'rent', 'tent', 'want', 'plant', 'giant',
+    'restaurant', 'assistant', 'merchant', 'tenant', 'servant', 'grant', 'ant',
+    'component', 'development', 'environment', 'management', 'statement', 'treatment',
+    'agreement', 'investment', 'department', 'movement', 'equipment', 'payment',
+    'requirement', 'implement', 'experiment', 'argument', 'document', 'element',
+    'instrument', 'segment', 'comment', 'achievement', 'improvement', 'settlement',
+    'president', 'resident', 'accident', 'incident', 'patient', 'consent', 'descent',
+    'advent', 'landlord', 'integral', 'appraisal', 'referral', 'removal', 'renewal',
+    'rehearsal', 'withdrawal', 'disposal', 'refusal', 'tutorial', 'editorial'
+}
+
+
+class FastStylometry(StylometryEngine):
+    """
+    Regex sentence splitting for texts up to regex_max_chars (punkt above
+    that when NLTK is installed) and a lexicon/suffix JJ-RB tagger
+
+    An optional compiled lexicon (word -> JJ/RB/-, the majority NLTK tag,
+    built by `python -m benchmarks.stylometry --build-lexicon`) overrides
+    the built-in rules for the words it covers.
+    """
+
+    name = "fast"
+
+    def __init__(self, regex_max_chars: int = 1000, lexicon_path: str = ""):
+        self.regex_max_chars = regex_max_chars
+        self.lexicon: Dict[str, str] = {}
+        if lexicon_path:
+            try:
+                with open(lexicon_path) as f:
+                    self.lexicon = json.load(f)
+                logger.info("Loaded %d-word stylometry lexicon from %s", len(self.lexicon), lexicon_path)
+            except (OSError, ValueError) as e:
+                logger.warning("Could not load stylometry lexicon %s: %s", lexicon_path, e)
+
+    def sentences(self, prepared: PreparedText) -> List[str]:
+        if len(prepared.text) > self.regex_max_chars:
+            try:
+                return prepared.sentences
+            except ImportError:
+                pass
+        return split_sentences(prepared.text)
+
+    def pos_ratios(self, prepared: PreparedText) -> Optional[Tuple[float, float]]:
+        tags = self.tag(prepared.text)
+        if not tags:
+            return None
+        adjectives = sum(1 for tag in tags if tag == ADJECTIVE)
+        adverbs = sum(1 for tag in tags if tag == ADVERB)
+        return adjectives / len(tags), adverbs / len(tags)
+
+    def tag(self, text: str) -> List[str]:
+        """JJ, RB or '-' for every token"""
+        tags = []
+        sentence_start = True
+        for token in TOKEN_PATTERN.findall(text):
+            tags.append(self._tag_token(token, sentence_start))
+            sentence_start = token in ('.', '!', '?', '...')
+        return tags
+
+    def _tag_token(self, token: str, sentence_start: bool) -> str:
+        word = token.lower()
+
+        known = self.lexicon.get(word)
+        if known is not None:
+            return known
+
+        if not word[0].isalpha():
+            return OTHER
+        # Capitalised mid-sentence words are almost always proper nouns
+        if token[0].isupper() and not sentence_start and word not in ADJECTIVES:
+            return OTHER
+
+        if word in ADVERBS:
+            return ADVERB
+        if word in ADJECTIVES or word in LY_ADJECTIVES:
+            return ADJECTIVE
+        if word.endswith('ly') and len(word) > 4 and word not in LY_NON_ADVERBS:
+            return ADVERB
+        if word in SUFFIX_NON_ADJECTIVES or len(word) < 5:
+            return OTHER
+        if '-' in word:
+            # Hyphenated compounds ("fast-paced", "well-known") are tagged JJ
+            return ADJECTIVE
+        if word.endswith(ADJECTIVE_SUFFIXES) and not word.endswith(('ment', 'ents', 'ants', 'als')):
+            return ADJECTIVE
+        return OTHER
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split on terminal punctuation followed by whitespace, unless the word
+    before is a known abbreviation or a single initial, or the next word
+    starts lowercase after a period
+    """
+    sentences = []
+    start = 0
+    for match in BOUNDARY_PATTERN.finditer(text):
+        end = match.end()
+        punctuation = match.group().strip()
+        before = text[start:match.start()].rsplit(None, 1)
+        last_word = before[-1].lower().strip('("\'[') if before else ''
+
+        if punctuation.startswith('.') and not punctuation.startswith('..'):
+            if last_word in ABBREVIATIONS or (len(last_word) == 1 and last_word.isalpha()):
+                continue
+            if end < len(text) and text[end].islower():
+                continue
+
+        sentence = text[start:end].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = end
+
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+ENGINES = {
+    NltkStylometry.name: NltkStylometry,
+    FastStylometry.name: FastStylometry,
+}
+
+
+def build_engine(name: str) -> StylometryEngine:
+    if name == FastStylometry.name:
+        return FastStylometry(
+            regex_max_chars=settings.STYLOMETRY_REGEX_MAX_CHARS,
+            lexicon_path=settings.STYLOMETRY_LEXICON_PATH
+        )
+    if name not in ENGINES:
+        logger.warning("Unknown STYLOMETRY_ENGINE %r, using nltk", name)
+    return NltkStylometry()
+
+
+# Global instance
+stylometry = build_engine(settings.STYLOMETRY_ENGINE)
@@ -1,19 +1,27 @@
 import re
-import hashlib
+import time
+import logging
 import asyncio
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 from dataclasses import dataclass
 import httpx
 import numpy as np
 from app.config import settings
+from app.detection.prepared import PreparedText
+from app.detection.model_client import model_server
+from app.scheduler import scheduler
+from app.metrics import PROVIDER_LATENCY, PROVIDER_REQUESTS, DETECTION_LATENCY
+from app.tracing import tracer
+from app.ml.student import student_loader, classify
+
+logger = logging.getLogger(__name__)
 
 # Try to import advanced detector
 try:
     from app.detection.advanced_detector import advanced_detector, AdvancedDetectionResult
     ADVANCED_AVAILABLE = True
 except ImportError as e:
-    print(f"[WARNING] Advanced detector not available: {e}")
-    print("[WARNING] Falling back to basic detection")
+    logger.warning("Advanced detector not available, falling back to basic detection: %s", e)
     ADVANCED_AVAILABLE = False
 
 @dataclass
@@ -24,6 +32,19 @@ class TextDetectionResult:
     scores: Dict[str, float]
     content_hash: str
 
+async def _provider_post(client: httpx.AsyncClient, provider: str, url: str, **kwargs) -> httpx.Response:
+    """POST to an external detector, recording latency and outcome metrics"""
+    try:
+        with tracer.span(f"provider.{provider}"), PROVIDER_LATENCY.labels(provider=provider).time():
+            response = await client.post(url, **kwargs)
+    except Exception:
+        PROVIDER_REQUESTS.labels(provider=provider, outcome='error').inc()
+        raise
+
+    outcome = 'ok' if response.status_code == 200 else f'http_{response.status_code}'
+    PROVIDER_REQUESTS.labels(provider=provider, outcome=outcome).inc()
+    return response
+
 class TextDetector:
     def __init__(self):
         self.api_key = settings.GPTZERO_API_KEY
@@ -75,14 +96,29 @@ class TextDetector:
             'informal_caps': (r'\b[A-Z]{2,}\b', -0.05),
         }
     
-    async def detect(self, text: str, source_platform: str = None) -> TextDetectionResult:
-        """Main detection method"""
+    async def detect(self, text: str, source_platform: str = None, tier: str = None,
+                     provider_result: Dict = None) -> TextDetectionResult:
+        """
+        Main detection method (tier: 'full' or 'fast', default DETECTOR_TIER)
+        provider_result: an already fetched external detector score
+        (prefetch_provider_results), used instead of calling a provider
+        """
+        # Split/tokenize once for every scorer below
+        prepared = PreparedText(text)
+
+        # FAST TIER: the distilled student, if one has been trained
+        if (tier or settings.DETECTOR_TIER) == 'fast':
+            student = student_loader.get()
+            if student is not None:
+                return await self._student_detect(student, prepared, source_platform)
+            logger.debug("Fast tier requested but no distilled student is available")
 
         # PRIORITY 1: Use Advanced Detector (best accuracy)
         if ADVANCED_AVAILABLE:
             try:
-                print("[Detection] Using ADVANCED multi-model detector")
-                advanced_result = await advanced_detector.detect(text, source_platform)
+                logger.debug("Using advanced multi-model detector")
+                with tracer.span("detect.advanced"):
+                    advanced_result = await advanced_detector.detect(prepared, source_platform)
 
                 # Convert to TextDetectionResult format
                 return TextDetectionResult(
@@ -101,17 +137,17 @@ class TextDetector:
                     content_hash=advanced_result.content_hash
                 )
             except Exception as e:
-                print(f"[Detection] Advanced detector failed: {e}")
-                print("[Detection] Falling back to basic detection")
+                logger.warning("Advanced detector failed, falling back to basic detection: %s", e)
 
         # FALLBACK: Basic detection if advanced not available
-        print("[Detection] Using basic detection (fallback)")
+        logger.debug("Using basic detection (fallback)")
+        started = time.perf_counter()
 
         # Generate content hash
-        content_hash = hashlib.sha256(text.encode()).hexdigest()
+        content_hash = prepared.content_hash
 
         # Quick validation
-        word_count = len(text.split())
+        word_count = prepared.word_count
         if word_count < 5:
             return TextDetectionResult(
                 classification="UNCERTAIN",
@@ -123,8 +159,9 @@ class TextDetector:
 
         # Run detection methods in parallel
         # Priority: ZeroGPT/GPTZero (paid, best) > External Model Server > Pattern matching
-        api_task = self._zerogpt_detect(text)  # Try ZeroGPT first (best accuracy)
-        pattern_task = asyncio.to_thread(self._pattern_analysis, text)
+        # Only the pattern pass takes a scheduler slot; provider calls just wait on the network
+        api_task = self._provider_detect(text, provider_result)
+        pattern_task = self._pattern_detect(prepared)
 
         api_result, pattern_result = await asyncio.gather(
             api_task, pattern_task
@@ -139,8 +176,84 @@ class TextDetector:
         )
         final_result.content_hash = content_hash
 
+        DETECTION_LATENCY.labels(detector='basic').observe(time.perf_counter() - started)
         return final_result
 
+    async def _student_detect(self, student, prepared: PreparedText, source_platform: str = None) -> TextDetectionResult:
+        """Score with the distilled student: one hashed feature vector and a dot product"""
+        started = time.perf_counter()
+        if prepared.word_count < 5:
+            return TextDetectionResult(
+                classification="UNCERTAIN",
+                ai_probability=0.5,
+                confidence=0.2,
+                scores={'tier': 'fast'},
+                content_hash=prepared.content_hash
+            )
+
+        with tracer.span("detect.student"):
+            async with scheduler.lane():
+                student_probability = await scheduler.to_thread(student.predict, prepared.text)
+        classification, ai_probability, confidence = classify(
+            student_probability, prepared.word_count, source_platform
+        )
+
+        DETECTION_LATENCY.labels(detector='student').observe(time.perf_counter() - started)
+        return TextDetectionResult(
+            classification=classification.lower(),
+            ai_probability=ai_probability,
+            confidence=confidence,
+            scores={
+                'tier': 'fast',
+                'student': round(student_probability, 4),
+                'student_version': student.meta.get('version')
+            },
+            content_hash=prepared.content_hash
+        )
+
+    async def _pattern_detect(self, prepared: PreparedText) -> Dict:
+        """Pattern analysis on the scheduler's thread pool, holding one slot"""
+        async with scheduler.lane():
+            return await scheduler.to_thread(tracer.traced("patterns")(self._pattern_analysis), prepared)
+
+    async def _provider_detect(self, text: str, provider_result: Dict = None) -> Dict:
+        """External detector score: ZeroGPT, then GPTZero, then the model server if configured"""
+        if provider_result is not None:
+            return provider_result
+        result = await self._zerogpt_detect(text)  # Try ZeroGPT first (best accuracy)
+        if not result.get('available') and settings.AI_MODEL_SERVER_URL:
+            return await self._external_model_detect(text)
+        return result
+
+    def _model_server_first(self) -> bool:
+        """Whether the basic path's first provider call goes to the model server"""
+        return (
+            not ADVANCED_AVAILABLE
+            and bool(settings.AI_MODEL_SERVER_URL)
+            and not settings.ZEROGPT_API_KEY
+            and not self.api_key
+        )
+
+    async def prefetch_provider_results(self, items: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Model-server scores for many (text, tier) items in one /detect/batch
+        call, for the items detect() would send to the model server; None
+        for the rest (pass each entry to detect() as provider_result)
+        """
+        results = [None] * len(items)
+        if not self._model_server_first():
+            return results
+        fast_available = student_loader.get() is not None
+        selected = [
+            i for i, (text, tier) in enumerate(items)
+            if len(text.split()) >= 5 and not ((tier or settings.DETECTOR_TIER) == 'fast' and fast_available)
+        ]
+        if selected:
+            fetched = await self._external_model_detect_batch([items[i][0] for i in selected])
+            for i, result in zip(selected, fetched):
+                results[i] = result
+        return results
+
     async def _external_model_detect(self, text: str) -> Dict:
         """Call external AI model server (if configured)"""
         if not settings.AI_MODEL_SERVER_URL:
@@ -148,31 +261,66 @@ class TextDetector:
             return await self._huggingface_detect(text)
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{settings.AI_MODEL_SERVER_URL}/detect",
-                    headers={"Content-Type": "application/json"},
-                    json={"text": text},
-                    timeout=10.0
-                )
+            response = await _provider_post(
+                model_server.http, 'external_model',
+                model_server.url("/detect"),
+                timeout=10.0,
+                **model_server.encode({"text": text})
+            )
 
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        'ai_probability': data.get('ai_probability', 0.5),
-                        'available': True,
-                        'source': f'external_model:{data.get("model_name", "unknown")}'
-                    }
-                else:
-                    print(f"External model server error: {response.status_code}")
-                    # Fall back to Hugging Face
-                    return await self._huggingface_detect(text)
+            if response.status_code == 200:
+                data = model_server.decode(response)
+                return {
+                    'ai_probability': data.get('ai_probability', 0.5),
+                    'available': True,
+                    'source': f'external_model:{data.get("model_name", "unknown")}'
+                }
+            else:
+                logger.warning("External model server error: %s", response.status_code)
+                # Fall back to Hugging Face
+                return await self._huggingface_detect(text)
 
         except Exception as e:
-            print(f"External model server connection failed: {e}")
+            logger.warning("External model server connection failed: %s", e)
             # Fall back to Hugging Face
             return await self._huggingface_detect(text)
 
+    async def _external_model_detect_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Score many texts with one call to the model server's /detect/batch,
+        falling back to per-text detection if the batch call fails
+        """
+        if not settings.AI_MODEL_SERVER_URL or not texts:
+            return await asyncio.gather(*(self._external_model_detect(text) for text in texts))
+
+        try:
+            response = await _provider_post(
+                model_server.http, 'external_model_batch',
+                model_server.url("/detect/batch"),
+                timeout=10.0 + 0.1 * len(texts),
+                **model_server.encode({"texts": texts})
+            )
+
+            if response.status_code == 200:
+                results = model_server.decode(response).get('results', [])
+                if len(results) == len(texts):
+                    return [
+                        {
+                            'ai_probability': item.get('ai_probability', 0.5),
+                            'available': True,
+                            'source': f'external_model:{item.get("model_name", "unknown")}'
+                        }
+                        for item in results
+                    ]
+                logger.warning("External model server returned %d results for %d texts", len(results), len(texts))
+            else:
+                logger.warning("External model server batch error: %s", response.status_code)
+
+        except Exception as e:
+            logger.warning("External model server batch call failed: %s", e)
+
+        return await asyncio.gather(*(self._external_model_detect(text) for text in texts))
+
     async def _zerogpt_detect(self, text: str) -> Dict:
         """Call ZeroGPT API"""
         if not settings.ZEROGPT_API_KEY:
@@ -181,8 +329,9 @@ class TextDetector:
 
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://api.zerogpt.com/api/detect/detectText",
+                response = await _provider_post(
+                    client, 'zerogpt',
+                    settings.ZEROGPT_API_URL,
                     headers={
                         "ApiKey": settings.ZEROGPT_API_KEY,
                         "Content-Type": "application/json"
@@ -193,7 +342,7 @@ class TextDetector:
 
                 if response.status_code == 200:
                     data = response.json()
-                    print(f"[DEBUG] ZeroGPT response: {data}")
+                    logger.debug("ZeroGPT response: %s", data)
                     # ZeroGPT returns: {"success": true, "data": {"fakePercentage": 85.5, "isHuman": 100}}
                     if data.get('success') and 'data' in data:
                         result_data = data['data']
@@ -201,7 +350,7 @@ class TextDetector:
                         fake_percentage = float(result_data.get('fakePercentage', 50.0))
                         ai_prob = fake_percentage / 100.0  # Convert to 0-1
 
-                        print(f"[DEBUG] ZeroGPT AI probability: {ai_prob * 100:.1f}%")
+                        logger.debug("ZeroGPT AI probability: %.1f%%", ai_prob * 100)
 
                         return {
                             'ai_probability': float(ai_prob),
@@ -209,14 +358,14 @@ class TextDetector:
                             'source': 'zerogpt'
                         }
                     else:
-                        print(f"ZeroGPT unexpected response format: {data}")
+                        logger.warning("ZeroGPT unexpected response format: %s", data)
                         return await self._gptzero_detect(text)
                 else:
-                    print(f"ZeroGPT API error: {response.status_code} - {response.text}")
+                    logger.warning("ZeroGPT API error: %s - %s", response.status_code, response.text[:200])
                     return await self._gptzero_detect(text)
 
         except Exception as e:
-            print(f"ZeroGPT API error: {e}")
+            logger.warning("ZeroGPT API error: %s", e)
             return await self._gptzero_detect(text)
 
     async def _huggingface_detect(self, text: str) -> Dict:
@@ -232,8 +381,9 @@ class TextDetector:
         for model in models_to_try:
             try:
                 async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        f"https://api-inference.huggingface.co/models/{model}",
+                    response = await _provider_post(
+                        client, 'huggingface',
+                        f"{settings.HUGGINGFACE_API_URL}/{model}",
                         headers={
                             "Content-Type": "application/json"
                         },
@@ -272,11 +422,11 @@ class TextDetector:
                     continue
 
             except Exception as e:
-                print(f"Hugging Face model {model} error: {e}")
+                logger.warning("Hugging Face model %s error: %s", model, e)
                 continue
 
         # All models failed, use pattern matching only
-        print("All Hugging Face models failed, using pattern matching only")
+        logger.warning("All Hugging Face models failed, using pattern matching only")
         return {'ai_probability': None, 'available': False}
 
     async def _gptzero_detect(self, text: str) -> Dict:
@@ -286,8 +436,9 @@ class TextDetector:
 
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://api.gptzero.me/v2/predict/text",
+                response = await _provider_post(
+                    client, 'gptzero',
+                    settings.GPTZERO_API_URL,
                     headers={
                         "x-api-key": self.api_key,
                         "Content-Type": "application/json"
@@ -309,13 +460,13 @@ class TextDetector:
                     return {'ai_probability': None, 'available': False}
 
         except Exception as e:
-            print(f"GPTZero API error: {e}")
+            logger.warning("GPTZero API error: %s", e)
             return {'ai_probability': None, 'available': False}
     
-    def _pattern_analysis(self, text: str) -> Dict:
+    def _pattern_analysis(self, prepared: PreparedText) -> Dict:
         """Analyze text for AI/human patterns"""
-        text_lower = text.lower()
-        word_count = len(text.split())
+        text_lower = prepared.lower
+        word_count = prepared.word_count
         
         ai_score = 0
         matches = []
@@ -342,8 +493,7 @@ class TextDetector:
         normalized_score = ai_score / (word_count / 50)  # Per 50 words
         
         # Calculate sentence variance (burstiness)
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
+        sentences = [s for s in prepared.punctuation_sentences if len(s) > 10]
         
         if len(sentences) >= 3:
             lengths = [len(s.split()) for s in sentences]
@@ -445,8 +595,12 @@ class TextDetector:
         )
     
     async def detect_batch(self, texts: list) -> list:
-        """Detect multiple texts in parallel"""
-        tasks = [self.detect(t['content'], t.get('source_platform')) for t in texts]
+        """Detect multiple texts in parallel (one model-server call for all of them)"""
+        provider_results = await self.prefetch_provider_results([(t['content'], None) for t in texts])
+        tasks = [
+            self.detect(t['content'], t.get('source_platform'), provider_result=provider_result)
+            for t, provider_result in zip(texts, provider_results)
+        ]
         return await asyncio.gather(*tasks)
     
     def is_likely_bot(self, result: TextDetectionResult, tweet_metadata: Dict = None) -> bool:
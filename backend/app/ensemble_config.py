@@ -0,0 +1,112 @@
+"""
+Ensemble Config
+Weights, calibration and classification thresholds of
+AdvancedAIDetector._ensemble_scoring. The defaults are the hand-tuned values;
+benchmarks.ensemble_eval fits new ones from cached scorer outputs and writes
+a file that ENSEMBLE_CONFIG_PATH points serving at.
+
+    {
+      "weights": {"short": {"perplexity": 0.2, ...}, "medium": {...}, "long": {...}},
+      "base_confidence": {"short": 0.7, "medium": 0.85, "long": 0.95},
+      "calibration": {"a": 6.1, "b": -3.2},   # p = sigmoid(a * score + b), or null
+      "thresholds": {"human": 0.2, "likely_human": 0.35, "likely_ai": 0.65, "ai": 0.8}
+    }
+
+Scores between likely_human and likely_ai are UNCERTAIN.
+"""
+
+import copy
+import json
+import hashlib
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCORERS = ('perplexity', 'burstiness', 'entropy', 'transformer', 'stylometric')
+
+# Word-count buckets: each has its own weights and base confidence
+SHORT_WORDS = 50
+MEDIUM_WORDS = 150
+
+DEFAULT_CONFIG = {
+    'weights': {
+        # Short text: rely more on transformer and patterns
+        'short': {'perplexity': 0.20, 'burstiness': 0.15, 'entropy': 0.20, 'transformer': 0.35, 'stylometric': 0.10},
+        # Medium text: balanced
+        'medium': {'perplexity': 0.25, 'burstiness': 0.15, 'entropy': 0.25, 'transformer': 0.25, 'stylometric': 0.10},
+        # Long text: all methods reliable
+        'long': {'perplexity': 0.30, 'burstiness': 0.20, 'entropy': 0.25, 'transformer': 0.15, 'stylometric': 0.10},
+    },
+    'base_confidence': {'short': 0.70, 'medium': 0.85, 'long': 0.95},
+    'calibration': None,
+    'thresholds': {'human': 0.20, 'likely_human': 0.35, 'likely_ai': 0.65, 'ai': 0.80},
+}
+
+
+def length_bucket(word_count: int) -> str:
+    if word_count < SHORT_WORDS:
+        return 'short'
+    if word_count < MEDIUM_WORDS:
+        return 'medium'
+    return 'long'
+
+
+def calibrate(score, calibration: Optional[Dict]):
+    """Calibrated probability of a combined score (or array of scores)"""
+    if not calibration:
+        return score
+    return 1.0 / (1.0 + np.exp(-(calibration['a'] * np.asarray(score) + calibration['b'])))
+
+
+def classify(ai_probability: float, thresholds: Dict[str, float]) -> str:
+    if thresholds['likely_human'] < ai_probability < thresholds['likely_ai']:
+        return "UNCERTAIN"
+    if ai_probability >= thresholds['ai']:
+        return "AI"
+    if ai_probability >= thresholds['likely_ai']:
+        return "LIKELY_AI"
+    if ai_probability >= thresholds['human']:
+        return "LIKELY_HUMAN"
+    return "HUMAN"
+
+
+def config_hash(config: Dict) -> str:
+    """Short fingerprint of a loaded config: changes with any weight, calibration or threshold"""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def load_ensemble_config(path: str = "") -> Dict:
+    """The config at path laid over the defaults (the defaults alone if path is empty)"""
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if not path:
+        return config
+
+    with open(path) as f:
+        loaded = json.load(f)
+    for bucket, weights in loaded.get('weights', {}).items():
+        if bucket not in config['weights'] or set(weights) != set(SCORERS):
+            raise ValueError(f"{path}: weights.{bucket} must give a weight for each of {', '.join(SCORERS)}")
+        config['weights'][bucket] = {name: float(weights[name]) for name in SCORERS}
+    config['base_confidence'].update(loaded.get('base_confidence', {}))
+    config['thresholds'].update(loaded.get('thresholds', {}))
+    if loaded.get('calibration'):
+        config['calibration'] = {'a': float(loaded['calibration']['a']), 'b': float(loaded['calibration']['b'])}
+
+    t = config['thresholds']
+    if not t['human'] <= t['likely_human'] <= t['likely_ai'] <= t['ai']:
+        raise ValueError(f"{path}: thresholds must satisfy human <= likely_human <= likely_ai <= ai")
+    logger.info("Loaded ensemble config from %s (version %s)", path, loaded.get('version'))
+    return config
+
+
+# Global instance
+try:
+    ensemble_config = load_ensemble_config(settings.ENSEMBLE_CONFIG_PATH)
+except (OSError, ValueError) as e:
+    logger.warning("Ignoring ensemble config %s, using defaults: %s", settings.ENSEMBLE_CONFIG_PATH, e)
+    ensemble_config = load_ensemble_config()
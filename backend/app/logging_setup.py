@@ -0,0 +1,142 @@
+"""
+Logging Setup
+Structured, non-blocking logging for a service process
+
+Records are handed to a QueueHandler on the calling thread and written by a
+background QueueListener, so request handlers and scorer threads never wait
+on stdout. DEBUG records can be sampled and repeated warnings/errors are
+rate limited per message template.
+
+This is the canonical copy; ai-detector-engine/logging_setup.py is vendored
+from it and differs only in its header and settings import.
+"""
+
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+
+# Attributes every LogRecord has - anything else came from `extra=`
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with any `extra=` fields merged in"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records (higher levels always pass)"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Allow at most `burst` WARNING+ records per message template per interval
+    The first record after a window closes reports how many were suppressed
+    """
+
+    def __init__(self, burst: int, interval: float):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                    record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def configure_logging():
+    """Install the queue-based root handler (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler = _DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATE))
+    queue_handler.addFilter(RateLimitFilter(settings.LOG_RATE_LIMIT_BURST, settings.LOG_RATE_LIMIT_INTERVAL))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in json.loads(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def reconfigure_after_fork():
+    """Start a fresh listener in a forked worker (the parent's thread does not survive fork)"""
+    global _listener
+    _listener = None
+    configure_logging()
@@ -1,10 +1,23 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import time
+import asyncio
 import logging
 
 from app.config import settings
+from app.logging_setup import configure_logging
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
 from app.database import init_db
+from app.scheduler import scheduler
+from app.detection.model_client import model_server
+from app.detection.model_cache import model_cache
+from app.metrics import registry
+from app.tracing import tracer, server_timing_header
 from app.routes import detect_router, stats_router, attention_router
 from app.routes.factcheck import router as factcheck_router
 from app.routes.companion import router as companion_router
@@ -17,22 +30,89 @@ try:
     ML_ROUTER_AVAILABLE = True
 except Exception as e:
     ML_ROUTER_AVAILABLE = False
-    print(f"[WARNING] ML router not available - training features disabled: {e}")
+    logger.warning("ML router not available - training features disabled: %s", e)
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# Seconds spent in each startup phase (GET /models/startup)
+startup_timings = {}
+
+async def _preload_models():
+    """Load the detector models before serving so the first request does not pay for it"""
+    from app.detection.text import ADVANCED_AVAILABLE
+    if not ADVANCED_AVAILABLE:
+        return
+
+    from app.detection.advanced_detector import advanced_detector
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(advanced_detector.preload)
+    except Exception as e:
+        logger.warning("Model preload failed, models will load on first use: %s", e)
+    startup_timings['models'] = round(time.perf_counter() - started, 3)
+
+def _start_registry_watch():
+    """Follow model promotions/rollbacks made through any worker"""
+    from app.detection.text import ADVANCED_AVAILABLE
+    if not ADVANCED_AVAILABLE or settings.MODEL_REGISTRY_POLL_SECONDS <= 0:
+        return None
+
+    from app.detection.advanced_detector import advanced_detector
+    return asyncio.create_task(advanced_detector.watch_registry())
+
+def _start_shadow_scoring() -> bool:
+    """Background worker that scores sampled traffic with the shadow candidate, if one is set"""
+    from app.detection.text import ADVANCED_AVAILABLE
+    if not ADVANCED_AVAILABLE:
+        return False
+
+    from app.detection.advanced_detector import advanced_detector
+    from app.detection.shadow import shadow_scorer
+    shadow_scorer.start(advanced_detector)
+    return True
+
+async def _close_training_collector():
+    """Commit examples still queued for the batched writer"""
+    from app.routes.verify import ML_ENABLED
+    if not ML_ENABLED:
+        return
+
+    from app.ml.training_data_collector import training_collector
+    try:
+        await training_collector.close()
+    except Exception as e:
+        logger.warning("Could not flush training data on shutdown: %s", e)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting PoC MVP API...")
+    started = time.perf_counter()
     try:
         await init_db()
         logger.info("Database initialized")
     except Exception as e:
         logger.warning(f"Database initialization failed: {e}")
         logger.warning("Running without database - verification features disabled")
+    startup_timings['database'] = round(time.perf_counter() - started, 3)
+
+    if settings.MODEL_PRELOAD:
+        await _preload_models()
+
+    startup_timings['total'] = round(time.perf_counter() - started, 3)
+    logger.info("Startup complete in %.2fs %s", startup_timings['total'], startup_timings)
+
+    registry_watch = _start_registry_watch()
+    shadow_scoring = _start_shadow_scoring()
     yield
     logger.info("Shutting down...")
+    if registry_watch is not None:
+        registry_watch.cancel()
+    if shadow_scoring:
+        from app.detection.shadow import shadow_scorer
+        await shadow_scorer.stop()
+    if ML_ROUTER_AVAILABLE:
+        from app.ml.training_jobs import training_jobs
+        await training_jobs.shutdown()
+    await _close_training_collector()
+    await model_server.aclose()
 
 app = FastAPI(
     title="PoC MVP API",
@@ -50,6 +130,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Root span per request plus a Server-Timing header with stage durations"""
+    with tracer.start_trace(
+        f"{request.method} {request.url.path}",
+        traceparent=request.headers.get("traceparent"),
+        **{"http.method": request.method, "http.target": request.url.path}
+    ) as root:
+        response = await call_next(request)
+        root.set_attribute("http.status_code", response.status_code)
+
+    if settings.SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = server_timing_header(root.trace, root)
+    return response
+
 # Include routers
 app.include_router(detect_router, prefix="/api/v1")
 app.include_router(stats_router, prefix="/api/v1")
@@ -76,3 +171,18 @@ async def root():
 async def health():
     return {"status": "healthy"}
 # Force rebuild Wed Feb  4 13:22:00 JST 2026 - Fix ML router and enable custom model
+
+@app.get("/scheduler")
+async def scheduler_stats():
+    """Lane depth, in-flight jobs and queue wait times"""
+    return scheduler.stats()
+
+@app.get("/models/startup")
+async def models_startup():
+    """Startup phase timings and how each model was loaded (cache, safetensors or pretrained)"""
+    return {"startup": startup_timings, "models": model_cache.report()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
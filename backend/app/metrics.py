@@ -0,0 +1,306 @@
+"""
+Metrics Registry
+Prometheus-style counters, gauges and histograms for the detection pipeline
+Rendered in the text exposition format by GET /metrics
+
+Updates are a dict lookup plus a short critical section, so they are safe to
+call from scorer threads and the event loop on every request.
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from contextlib import ContextDecorator
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Default latency buckets (seconds) - 1ms to 30s
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class _Metric:
+    """Base class: a named family of children keyed by label values"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _unlabelled(self):
+        return self._children[()]
+
+    def collect(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}"
+        ]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"]
+
+
+class _CounterChild:
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def get(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ('_value', '_lock', '_function')
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from a callback at scrape time instead"""
+        self._function = function
+
+    def get(self) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._value
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._unlabelled().set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        self._unlabelled().set_function(function)
+
+
+class _Timer(ContextDecorator):
+    """Times a block or function call and observes it into a histogram child"""
+
+    def __init__(self, child: "_HistogramChild"):
+        self._child = child
+        self._start = 0.0
+
+    def _recreate_cm(self):
+        # Fresh timer per decorated call so concurrent calls don't share state
+        return _Timer(self._child)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ('_upper_bounds', '_counts', '_sum', '_lock')
+
+    def __init__(self, buckets: Sequence[float]):
+        self._upper_bounds = tuple(buckets) + (float('inf'),)
+        self._counts = [0] * len(self._upper_bounds)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._unlabelled().observe(value)
+
+    def time(self) -> _Timer:
+        return self._unlabelled().time()
+
+    def _render_child(self, key, child) -> List[str]:
+        counts, total = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(child._upper_bounds, counts):
+            cumulative += count
+            le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry
+registry = Registry()
+
+# Detection pipeline
+SCORER_LATENCY = registry.register(Histogram(
+    "verifily_scorer_latency_seconds",
+    "Latency of individual detection scorers",
+    ["scorer"]
+))
+DETECTION_LATENCY = registry.register(Histogram(
+    "verifily_detection_latency_seconds",
+    "End-to-end latency of a text detection call",
+    ["detector"]
+))
+
+# Model loading
+MODEL_LOAD_SECONDS = registry.register(Gauge(
+    "verifily_model_load_seconds",
+    "Time the last load of each model took, by source format",
+    ["model", "format"]
+))
+
+SHADOW_SAMPLES = registry.register(Counter(
+    "verifily_shadow_samples_total",
+    "Live requests sampled for shadow scoring of a candidate model, by outcome",
+    ["outcome"]
+))
+
+# External detector providers (ZeroGPT, GPTZero, HuggingFace, model server)
+PROVIDER_LATENCY = registry.register(Histogram(
+    "verifily_provider_latency_seconds",
+    "Latency of calls to external detection providers",
+    ["provider"]
+))
+PROVIDER_REQUESTS = registry.register(Counter(
+    "verifily_provider_requests_total",
+    "Calls to external detection providers by outcome",
+    ["provider", "outcome"]
+))
+
+# Caches
+CACHE_REQUESTS = registry.register(Counter(
+    "verifily_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"]
+))
+
+# Scheduler
+SCHEDULER_QUEUE_DEPTH = registry.register(Gauge(
+    "verifily_scheduler_queue_depth",
+    "Jobs waiting for a slot per scheduler lane",
+    ["lane"]
+))
+SCHEDULER_IN_FLIGHT = registry.register(Gauge(
+    "verifily_scheduler_in_flight",
+    "Jobs currently running per scheduler lane",
+    ["lane"]
+))
+SCHEDULER_WAIT = registry.register(Histogram(
+    "verifily_scheduler_wait_seconds",
+    "Time jobs spent queued before getting a slot",
+    ["lane"]
+))
+
+# Database
+DB_QUERY_LATENCY = registry.register(Histogram(
+    "verifily_db_query_seconds",
+    "Database statement execution time",
+    ["operation"]
+))
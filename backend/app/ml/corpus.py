@@ -0,0 +1,267 @@
+"""
+Public Corpus
+Streams the public AI-detection datasets (RAID, HC3, AI Text Detection
+Pile) from the Hugging Face Hub into a local corpus of JSONL shards, for
+pretraining without the network on later runs.
+
+- Records are streamed, never downloaded as whole splits; filtering,
+  deduplication and shard writing happen as they arrive, so memory stays
+  bounded by one shard buffer
+- Deduplication is across all sources, by normalized-text hash, in an
+  on-disk index (corpus.db), not an in-memory set
+- Progress commits together with each finished shard: an interrupted run
+  resumes after the last sealed shard and drops the partial one
+- One ingest at a time (flock on ingest.lock); readers never touch shard
+  files, so status() and iter_examples() are safe during an ingest
+
+    python -m app.ml.corpus raid=100000 hc3=50000 ai_pile=50000
+"""
+
+import os
+import sys
+import json
+import fcntl
+import sqlite3
+import hashlib
+from pathlib import Path
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from app.config import settings
+from app.ml.training_data_collector import normalize_text
+
+
+def raid_records(example: Dict) -> Iterator[Tuple[str, int, str]]:
+    # RAID format: {generation, model, domain, attack}
+    # model: 'human' = human (0), anything else = AI (1)
+    yield example.get('generation') or '', 0 if example.get('model') == 'human' else 1, 'raid'
+
+
+def hc3_records(example: Dict) -> Iterator[Tuple[str, int, str]]:
+    # HC3 format: {question, human_answers, chatgpt_answers}; max 2 answers each
+    question = example.get('question', '')
+    for answer in (example.get('human_answers') or [])[:2]:
+        yield f"{question} {answer}", 0, 'hc3_human'
+    for answer in (example.get('chatgpt_answers') or [])[:2]:
+        yield f"{question} {answer}", 1, 'hc3_chatgpt'
+
+
+def pile_records(example: Dict) -> Iterator[Tuple[str, int, str]]:
+    # Check multiple possible label field names
+    label_value = example.get('label', example.get('source', ''))
+
+    # Map to binary: 0=human, 1=AI
+    if isinstance(label_value, int):
+        label = label_value
+    elif isinstance(label_value, str):
+        label = 1 if label_value.lower() in ['generated', 'ai', 'machine', 'gpt', 'chatgpt', '1'] else 0
+    else:
+        source_str = str(example.get('source', '')).lower()
+        label = 1 if any(model in source_str for model in ['gpt', 'chatgpt', 'ai', 'generated']) else 0
+    yield example.get('text') or '', label, 'ai_pile'
+
+
+# name -> (hub dataset, config, record converter)
+SOURCES: Dict[str, Tuple[str, Optional[str], Callable]] = {
+    'raid': ("liamdugan/raid", None, raid_records),
+    'hc3': ("Hello-SimpleAI/HC3", "all", hc3_records),
+    'ai_pile': ("artem9k/ai-text-detection-pile", None, pile_records),
+}
+
+
+class _Shard:
+    def __init__(self, path: Path):
+        self.path = path
+        self.partial = path.with_suffix('.partial')
+        self._file = open(self.partial, 'w')
+        self.labels = Counter()
+
+    @property
+    def examples(self) -> int:
+        return sum(self.labels.values())
+
+    def write(self, text: str, label: int, source: str):
+        self._file.write(json.dumps({'text': text, 'label': label, 'source': source}) + '\n')
+        self.labels[label] += 1
+
+    def seal(self) -> bool:
+        """Close and move into place; False (and nothing kept) if empty"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        if not self.examples:
+            os.remove(self.partial)
+            return False
+        os.replace(self.partial, self.path)
+        return True
+
+
+class PublicCorpus:
+    def __init__(self, corpus_dir: str, shard_size: int = 50000, min_chars: int = 50):
+        self.corpus_dir = Path(corpus_dir)
+        self.shard_size = shard_size
+        self.min_chars = min_chars
+
+    def _connect(self) -> sqlite3.Connection:
+        self.corpus_dir.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.corpus_dir / "corpus.db")
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS seen (hash BLOB PRIMARY KEY) WITHOUT ROWID")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS progress (
+                source TEXT PRIMARY KEY,
+                consumed INTEGER NOT NULL,  -- upstream records read
+                kept INTEGER NOT NULL,      -- examples written
+                complete BOOLEAN NOT NULL   -- upstream split exhausted
+            )
+        """)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS shards (
+                path TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                human INTEGER NOT NULL,
+                ai INTEGER NOT NULL
+            )
+        """)
+        db.commit()
+        return db
+
+    @contextmanager
+    def _ingest_lock(self):
+        """Exclusive across processes (flock on ingest.lock), held for a whole ingest"""
+        self.corpus_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.corpus_dir / "ingest.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _drop_unsealed(self, db: sqlite3.Connection):
+        """Remove shard files an interrupted ingest wrote but never committed (under the ingest lock)"""
+        sealed = {row[0] for row in db.execute("SELECT path FROM shards")}
+        for path in self.corpus_dir.iterdir():
+            if path.suffix == '.partial' or (path.suffix == '.jsonl' and path.name not in sealed):
+                path.unlink()
+
+    def _commit_shard(self, db: sqlite3.Connection, shard: _Shard, source: str,
+                      consumed: int, kept: int, complete: bool):
+        if shard.seal():
+            db.execute(
+                "INSERT INTO shards (path, source, human, ai) VALUES (?, ?, ?, ?)",
+                (shard.path.name, source, shard.labels[0], shard.labels[1])
+            )
+        db.execute(
+            "INSERT OR REPLACE INTO progress (source, consumed, kept, complete) VALUES (?, ?, ?, ?)",
+            (source, consumed, kept, complete)
+        )
+        db.commit()
+
+    def ingest(self, source: str, max_samples: int) -> Dict:
+        """Stream one source into the corpus until it holds max_samples examples from it"""
+        from datasets import load_dataset
+
+        hub_name, config_name, convert = SOURCES[source]
+        with self._ingest_lock():
+            db = self._connect()
+            try:
+                self._drop_unsealed(db)
+                row = db.execute(
+                    "SELECT consumed, kept, complete FROM progress WHERE source = ?", (source,)
+                ).fetchone()
+                consumed, kept, complete = row if row else (0, 0, False)
+                if complete or kept >= max_samples:
+                    print(f"[Corpus] {source}: {kept} examples cached, nothing to fetch")
+                    return self.status()[source]
+
+                print(f"[Corpus] {source}: streaming {hub_name} (resuming after {consumed} records)")
+                stream = load_dataset(hub_name, config_name, split="train", streaming=True)
+                if consumed:
+                    stream = stream.skip(consumed)
+
+                shard_index = db.execute("SELECT COUNT(*) FROM shards WHERE source = ?", (source,)).fetchone()[0]
+                shard = _Shard(self.corpus_dir / f"{source}-{shard_index:05d}.jsonl")
+                skipped = Counter()
+                complete = True
+
+                for example in stream:
+                    consumed += 1
+                    for text, label, tag in convert(example):
+                        text = (text or '').strip()
+                        if len(text) < self.min_chars:
+                            skipped['short'] += 1
+                            continue
+                        digest = hashlib.sha256(normalize_text(text).encode()).digest()[:16]
+                        if not db.execute("INSERT OR IGNORE INTO seen (hash) VALUES (?)", (digest,)).rowcount:
+                            skipped['duplicate'] += 1
+                            continue
+                        shard.write(text, label, tag)
+                        kept += 1
+
+                    if shard.examples >= self.shard_size:
+                        self._commit_shard(db, shard, source, consumed, kept, complete=False)
+                        shard_index += 1
+                        shard = _Shard(self.corpus_dir / f"{source}-{shard_index:05d}.jsonl")
+                        print(f"[Corpus] {source}: {consumed} records read, {kept} kept, skipped {dict(skipped)}")
+
+                    if kept >= max_samples:
+                        complete = False
+                        break
+
+                self._commit_shard(db, shard, source, consumed, kept, complete=complete)
+                print(f"[Corpus] {source}: done, {kept} examples ({consumed} records read, skipped {dict(skipped)})")
+            finally:
+                db.close()
+            return self.status()[source]
+
+    def status(self) -> Dict:
+        db = self._connect()
+        try:
+            status = {}
+            for source, consumed, kept, complete in db.execute("SELECT * FROM progress"):
+                human, ai, shards = db.execute(
+                    "SELECT COALESCE(SUM(human), 0), COALESCE(SUM(ai), 0), COUNT(*) FROM shards WHERE source = ?",
+                    (source,)
+                ).fetchone()
+                status[source] = {
+                    'records_read': consumed,
+                    'examples': kept,
+                    'human': human,
+                    'ai': ai,
+                    'shards': shards,
+                    'complete': bool(complete)
+                }
+            return status
+        finally:
+            db.close()
+
+    def iter_examples(self, limits: Dict[str, int]) -> Iterator[Dict]:
+        """Stream cached examples, at most limits[source] from each source (no network)"""
+        db = self._connect()
+        try:
+            shards = db.execute("SELECT path, source FROM shards ORDER BY path").fetchall()
+        finally:
+            db.close()
+
+        taken = Counter()
+        for path, source in shards:
+            if taken[source] >= limits.get(source, 0):
+                continue
+            with open(self.corpus_dir / path) as f:
+                for line in f:
+                    if taken[source] >= limits[source]:
+                        break
+                    taken[source] += 1
+                    yield json.loads(line)
+
+
+# Global instance
+public_corpus = PublicCorpus(settings.PUBLIC_CORPUS_DIR)
+
+
+if __name__ == "__main__":
+    for arg in sys.argv[1:]:
+        name, _, count = arg.partition('=')
+        public_corpus.ingest(name, int(count or 100000))
+    print(json.dumps(public_corpus.status(), indent=2))
@@ -0,0 +1,242 @@
+"""
+Distillation
+Trains the distilled student (app.ml.student) on AdvancedAIDetector's soft
+labels and reports how far it is from its teacher on a held-out set.
+
+- Texts come from the training data collector (every stored example, used
+  or not) and/or the local public corpus; no labels are needed to distill
+- The teacher is the full ensemble without a platform, and its
+  probabilities are cached in DISTILLED_MODEL_DIR/teacher.jsonl by content
+  hash, classifier version and ensemble config hash, so a rerun only scores
+  texts the serving model hasn't seen and a retuned config relabels them all
+- The held-out split is a deterministic slice of the content hash, so the
+  same texts are held out on every run
+- report.json: probability error and verdict/classification agreement vs
+  the teacher, accuracy of both against ground-truth labels where the
+  source has them, and the student's latency
+
+    python -m app.ml.distill --source collector --source corpus --corpus raid=20000
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.ml.student import HashingStudent, classify
+from app.ml.training_data_collector import training_collector, hash_content
+
+GOLD_LABELS = {'human': 0, 'ai': 1, 0: 0, 1: 1}
+
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(p / 100 * len(ordered)), len(ordered) - 1)]
+
+
+def is_held_out(content_hash: str, holdout_percent: int) -> bool:
+    return int(content_hash[:8], 16) % 100 < holdout_percent
+
+
+async def gather_texts(sources: List[str], corpus_limits: Dict[str, int], min_words: int = 5) -> List[Dict]:
+    """[{'text', 'hash', 'label'}] from the requested sources, deduplicated by content hash"""
+    examples: Dict[str, Dict] = {}
+
+    def add(text: str, label):
+        if len(text.split()) < min_words:
+            return
+        content_hash = hash_content(text)
+        if content_hash not in examples:
+            examples[content_hash] = {'text': text, 'hash': content_hash, 'label': GOLD_LABELS.get(label)}
+
+    if 'collector' in sources:
+        async for example in training_collector.iter_examples(only_confirmed=False, include_used=True):
+            add(example['content'], example['label'])
+    if 'corpus' in sources:
+        from app.ml.corpus import public_corpus
+        for example in public_corpus.iter_examples(corpus_limits):
+            add(example['text'], example['label'])
+
+    print(f"[Distill] {len(examples)} distinct texts from {', '.join(sources)}")
+    return list(examples.values())
+
+
+async def teacher_labels(examples: List[Dict], cache_path: Path, concurrency: int = 4) -> Dict[str, float]:
+    """
+    Ensemble AI probability per content hash, scoring only what the cache
+    lacks; cached labels from another classifier version or ensemble
+    config (weights, calibration, thresholds) don't count
+    """
+    from app.detection.prepared import PreparedText
+    from app.detection.advanced_detector import advanced_detector
+    from app.ensemble_config import config_hash
+
+    # Load the serving classifier now: its version and the ensemble config decide which cached labels apply
+    model_version = advanced_detector.classifier.version
+    ensemble_hash = config_hash(advanced_detector.ensemble_config)
+
+    labels: Dict[str, float] = {}
+    if cache_path.exists():
+        with open(cache_path) as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get('model_version') == model_version and record.get('ensemble_config') == ensemble_hash:
+                    labels[record['hash']] = record['p']
+
+    pending = [example for example in examples if example['hash'] not in labels]
+    if not pending:
+        return labels
+
+    print(f"[Distill] Scoring {len(pending)} texts with the ensemble {model_version}, config {ensemble_hash} ({len(labels)} cached)")
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    started = time.monotonic()
+    with open(cache_path, 'a') as cache:
+        for start in range(0, len(pending), concurrency):
+            chunk = pending[start:start + concurrency]
+            results = await asyncio.gather(
+                *(advanced_detector.detect(PreparedText(example['text'])) for example in chunk)
+            )
+            for example, result in zip(chunk, results):
+                labels[example['hash']] = result.ai_probability
+                cache.write(json.dumps({
+                    'hash': example['hash'],
+                    'p': result.ai_probability,
+                    'model_version': result.model_version,
+                    'ensemble_config': ensemble_hash
+                }) + '\n')
+            cache.flush()
+            done = start + len(chunk)
+            if done % 500 < concurrency:
+                print(f"[Distill] {done}/{len(pending)} scored ({time.monotonic() - started:.0f}s)")
+    return labels
+
+
+def evaluate(student: HashingStudent, held_out: List[Dict], labels: Dict[str, float]) -> Dict:
+    """Student vs teacher (and both vs ground truth) on the held-out texts"""
+    rows = []
+    latencies = []
+    for example in held_out:
+        started = time.perf_counter()
+        student_p = student.predict(example['text'])
+        latencies.append((time.perf_counter() - started) * 1000)
+        word_count = len(example['text'].split())
+        rows.append({
+            'teacher': labels[example['hash']],
+            'student': student_p,
+            'teacher_class': classify(labels[example['hash']], word_count)[0],
+            'student_class': classify(student_p, word_count)[0],
+            'label': example['label']
+        })
+
+    total = len(rows)
+    if not total:
+        return {'held_out': 0}
+
+    def share(predicate, subset) -> Optional[float]:
+        return round(sum(1 for row in subset if predicate(row)) / len(subset), 4) if subset else None
+
+    labelled = [row for row in rows if row['label'] is not None]
+    teacher_accuracy = share(lambda row: (row['teacher'] >= 0.5) == bool(row['label']), labelled)
+    student_accuracy = share(lambda row: (row['student'] >= 0.5) == bool(row['label']), labelled)
+
+    return {
+        'held_out': total,
+        'vs_teacher': {
+            'mean_abs_probability_delta': round(sum(abs(row['teacher'] - row['student']) for row in rows) / total, 4),
+            'verdict_agreement': share(lambda row: (row['teacher'] >= 0.5) == (row['student'] >= 0.5), rows),
+            'classification_agreement': share(lambda row: row['teacher_class'] == row['student_class'], rows)
+        },
+        'vs_labels': {
+            'labelled': len(labelled),
+            'teacher_accuracy': teacher_accuracy,
+            'student_accuracy': student_accuracy,
+            'accuracy_delta': round(student_accuracy - teacher_accuracy, 4) if labelled else None
+        },
+        'student_latency_ms': {
+            f'p{p}': round(_percentile(latencies, p), 3) for p in (50, 95, 99)
+        }
+    }
+
+
+async def distill(
+    sources: List[str],
+    corpus_limits: Optional[Dict[str, int]] = None,
+    holdout_percent: int = 10,
+    epochs: int = 5,
+    hash_bits: int = 18,
+    learning_rate: float = 0.5,
+    model_dir: str = settings.DISTILLED_MODEL_DIR
+) -> Dict:
+    """Label, train, evaluate and save a student; returns its report"""
+    directory = Path(model_dir)
+    examples = await gather_texts(sources, corpus_limits or {})
+    if not examples:
+        raise ValueError("No texts to distill from")
+    labels = await teacher_labels(examples, directory / "teacher.jsonl")
+
+    train = [example for example in examples if not is_held_out(example['hash'], holdout_percent)]
+    held_out = [example for example in examples if is_held_out(example['hash'], holdout_percent)]
+    print(f"[Distill] Training on {len(train)} texts, {len(held_out)} held out")
+
+    student = HashingStudent(hash_bits=hash_bits)
+    history = student.fit(
+        [example['text'] for example in train],
+        [labels[example['hash']] for example in train],
+        epochs=epochs,
+        learning_rate=learning_rate
+    )
+
+    report = evaluate(student, held_out, labels)
+    report.update({
+        'version': datetime.now().strftime("%Y%m%d_%H%M%S"),
+        'sources': sources,
+        'train_examples': len(train),
+        'epochs': epochs,
+        'loss_history': history
+    })
+    student.save(model_dir, meta={'version': report['version'], 'report': report})
+    with open(directory / "report.json", 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+async def main(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Distill the detection ensemble into a fast student")
+    parser.add_argument('--source', action='append', choices=['collector', 'corpus'],
+                        help="Where texts come from (repeatable; default: collector)")
+    parser.add_argument('--corpus', nargs='*', default=[], metavar='SOURCE=COUNT',
+                        help="Public corpus examples per source, e.g. raid=20000 hc3=10000")
+    parser.add_argument('--holdout', type=int, default=10, help="Percent of texts held out for the report")
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--hash-bits', type=int, default=18)
+    parser.add_argument('--lr', type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    limits = {}
+    for item in args.corpus:
+        name, _, count = item.partition('=')
+        limits[name] = int(count or 10000)
+
+    try:
+        report = await distill(
+            args.source or ['collector'],
+            corpus_limits=limits,
+            holdout_percent=args.holdout,
+            epochs=args.epochs,
+            hash_bits=args.hash_bits,
+            learning_rate=args.lr
+        )
+    finally:
+        await training_collector.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
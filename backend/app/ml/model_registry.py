@@ -0,0 +1,139 @@
+"""
+Model Registry
+Versioned record of trained classifier models and which one is serving,
+kept in a small JSON file next to the models
+
+Promote and rollback rewrite the file atomically (write, then rename), so
+every serving process sees either the old or the new active version.
+Each read-modify-write holds an flock on registry.lock, so trainers and
+admin commands in different processes can't lose each other's updates.
+Serving processes poll it and hot-swap their classifier when the active
+version changes (AdvancedAIDetector.reload_classifier), and score a sample
+of traffic with the shadow candidate if one is set (app.detection.shadow).
+"""
+
+import os
+import json
+import fcntl
+import threading
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+
+class ModelRegistry:
+    def __init__(self, registry_dir: str):
+        self.path = Path(registry_dir) / "registry.json"
+        self.lock_path = Path(registry_dir) / "registry.lock"
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive across threads (the lock) and processes (flock on registry.lock)"""
+        with self._lock:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'versions': {}, 'active': None, 'history': []}
+
+    def _write(self, state: Dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        staging = self.path.with_suffix('.json.tmp')
+        with open(staging, 'w') as f:
+            json.dump(state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staging, self.path)
+
+    def register(self, version: str, path: str, metadata: Optional[Dict] = None) -> Dict:
+        """Record a trained model (does not make it active)"""
+        with self._locked():
+            state = self._read()
+            state['versions'][version] = {
+                'path': str(path),
+                'registered_at': datetime.now().isoformat(),
+                'metadata': metadata or {}
+            }
+            self._write(state)
+            return state['versions'][version]
+
+    def promote(self, version: str) -> Dict:
+        """Make a registered version the serving one"""
+        with self._locked():
+            state = self._read()
+            if version not in state['versions']:
+                raise KeyError(f"Unknown model version: {version}")
+            if state['active'] != version:
+                if state['active']:
+                    state['history'].append(state['active'])
+                state['active'] = version
+                state['promoted_at'] = datetime.now().isoformat()
+                self._write(state)
+            return state
+
+    def rollback(self) -> Dict:
+        """Re-activate the version that was serving before the last promote"""
+        with self._locked():
+            state = self._read()
+            if not state['history']:
+                raise ValueError("No earlier version to roll back to")
+            state['active'] = state['history'].pop()
+            state['promoted_at'] = datetime.now().isoformat()
+            self._write(state)
+            return state
+
+    def set_shadow(self, version: str, sample_rate: float) -> Dict:
+        """Score a sampled fraction of live traffic with a candidate version, off the request path"""
+        with self._locked():
+            state = self._read()
+            if version not in state['versions']:
+                raise KeyError(f"Unknown model version: {version}")
+            state['shadow'] = {
+                'version': version,
+                'path': state['versions'][version]['path'],
+                'sample_rate': sample_rate,
+                'started_at': datetime.now().isoformat()
+            }
+            self._write(state)
+            return state['shadow']
+
+    def clear_shadow(self):
+        with self._locked():
+            state = self._read()
+            if state.pop('shadow', None) is not None:
+                self._write(state)
+
+    def shadow(self) -> Optional[Dict]:
+        """{'version', 'path', 'sample_rate', 'started_at'} of the shadow candidate, or None"""
+        return self._read().get('shadow')
+
+    def active(self) -> Optional[Dict]:
+        """{'version', 'path'} of the serving model, or None if nothing was promoted"""
+        state = self._read()
+        version = state['active']
+        if not version or version not in state['versions']:
+            return None
+        return {'version': version, 'path': state['versions'][version]['path']}
+
+    def state(self) -> Dict:
+        return self._read()
+
+    def versions(self) -> List[str]:
+        return sorted(self._read()['versions'])
+
+
+# Global instance
+model_registry = ModelRegistry(settings.MODEL_REGISTRY_DIR)
@@ -5,11 +5,12 @@ Continuously improves as more users verify content
 
 import os
 import json
+import random
 import torch
 from pathlib import Path
+from collections import Counter
 from datetime import datetime
 from typing import Dict, List, Optional
-from datasets import Dataset
 from transformers import (
     RobertaTokenizer,
     RobertaForSequenceClassification,
@@ -17,11 +18,15 @@ from transformers import (
     TrainingArguments,
     EarlyStoppingCallback
 )
+from transformers.trainer_utils import get_last_checkpoint
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_recall_fscore_support
 import numpy as np
 
 from app.ml.training_data_collector import training_collector
+from app.ml.model_registry import model_registry
+from app.ml.tokenized_cache import tokenized_cache
+from app.config import settings
 
 
 class ModelTrainer:
@@ -37,39 +42,91 @@ class ModelTrainer:
         self.label2id = {'human': 0, 'mixed': 1, 'ai': 2}
         self.id2label = {v: k for k, v in self.label2id.items()}
 
-    async def prepare_dataset(self, min_examples: int = 100) -> Optional[Dict]:
+    def latest_registered_model(self) -> Optional[Dict]:
+        """{'version', 'path'} to continue from: the active version, else the newest registered"""
+        active = model_registry.active()
+        if active:
+            return active
+        state = model_registry.state()
+        for version in sorted(state['versions'], reverse=True):
+            path = state['versions'][version]['path']
+            if Path(path).exists():
+                return {'version': version, 'path': path}
+        return None
+
+    async def prepare_dataset(
+        self,
+        min_examples: int = 100,
+        incremental: bool = False,
+        replay_ratio: float = settings.INCREMENTAL_REPLAY_RATIO
+    ) -> Optional[Dict]:
         """
         Prepare training dataset from collected verifications
         Returns None if not enough data
+
+        Full: every confirmed example, class-balanced, trained from the base model.
+        Incremental: only examples no model was trained on yet, plus a replay
+        sample of older ones (replay_ratio per new example), continued from the
+        latest registered model. Falls back to full if nothing is registered.
+        In both, example_ids are the rows to mark as used once training succeeds.
         """
-        # Get training examples
-        examples = await training_collector.get_training_dataset(
-            min_examples=min_examples,
-            only_confirmed=True,
-            balance_classes=True
-        )
+        base = self.latest_registered_model() if incremental else None
+        if incremental and base is None:
+            print("[Trainer] No registered model to continue from, training from the base model")
+            incremental = False
+
+        if incremental:
+            new_examples = await training_collector.get_training_dataset(
+                only_confirmed=True,
+                balance_classes=False
+            )
+            if len(new_examples) < min_examples:
+                print(f"[Trainer] Not enough new data: {len(new_examples)}/{min_examples}")
+                return None
+            replay = await training_collector.replay_sample(int(len(new_examples) * replay_ratio))
+            examples = new_examples + replay
+            random.shuffle(examples)
+            print(f"[Trainer] Incremental: {len(new_examples)} new + {len(replay)} replayed, from {base['version']}")
+        else:
+            # Get training examples
+            examples = await training_collector.get_training_dataset(
+                min_examples=min_examples,
+                only_confirmed=True,
+                balance_classes=True,
+                include_used=True
+            )
+            new_examples = [ex for ex in examples if not ex.get('used_for_training')]
+            replay = []
 
-        if len(examples) < min_examples:
-            print(f"[Trainer] Not enough data: {len(examples)}/{min_examples}")
-            return None
+            if len(examples) < min_examples:
+                print(f"[Trainer] Not enough data: {len(examples)}/{min_examples}")
+                return None
 
         # Convert to format for training
         texts = [ex['content'] for ex in examples]
         labels = [self.label2id[ex['label']] for ex in examples]
 
-        # Split into train/val/test
+        # Split into train/val/test (stratified unless a class is too small to split)
+        stratify = labels if min(Counter(labels).values()) >= 4 else None
         train_texts, temp_texts, train_labels, temp_labels = train_test_split(
-            texts, labels, test_size=0.3, random_state=42, stratify=labels
+            texts, labels, test_size=0.3, random_state=42, stratify=stratify
         )
+        # The first split can still leave a class with one example in temp
+        temp_stratify = temp_labels if stratify and min(Counter(temp_labels).values()) >= 2 else None
         val_texts, test_texts, val_labels, test_labels = train_test_split(
-            temp_texts, temp_labels, test_size=0.5, random_state=42, stratify=temp_labels
+            temp_texts, temp_labels, test_size=0.5, random_state=42, stratify=temp_stratify
         )
 
         return {
             'train': {'text': train_texts, 'label': train_labels},
             'val': {'text': val_texts, 'label': val_labels},
             'test': {'text': test_texts, 'label': test_labels},
-            'total_examples': len(examples)
+            'total_examples': len(examples),
+            'mode': 'incremental' if incremental else 'full',
+            'base_model': base,
+            'new_examples': len(new_examples),
+            'replay_examples': len(replay),
+            'example_ids': [ex['id'] for ex in new_examples]
         }
 
     def compute_metrics(self, eval_pred):
@@ -95,26 +152,41 @@ class ModelTrainer:
         num_epochs: int = 3,
         batch_size: int = 16,
         learning_rate: float = 2e-5,
-        min_examples: int = 100
+        min_examples: int = 100,
+        dataset_dict: Optional[Dict] = None,
+        model_version: Optional[str] = None,
+        resume: bool = False,
+        callbacks: Optional[List] = None,
+        incremental: bool = False,
+        replay_ratio: float = settings.INCREMENTAL_REPLAY_RATIO
     ) -> Optional[Dict]:
         """
         Fine-tune the model on collected data
 
+        incremental continues from the latest registered model on new
+        examples plus a replay sample (see prepare_dataset). dataset_dict,
+        model_version and resume let a background job (app.ml.training_jobs)
+        continue from the latest checkpoint in the same output directory, on
+        the same data. The examples trained on are marked as used at the end.
+
         Returns training results or None if not enough data
         """
         print(f"[Trainer] Starting fine-tuning process...")
 
         # Prepare dataset
-        dataset_dict = await self.prepare_dataset(min_examples)
+        if dataset_dict is None:
+            dataset_dict = await self.prepare_dataset(min_examples, incremental, replay_ratio)
         if dataset_dict is None:
             return None
+        if dataset_dict.get('mode') == 'incremental':
+            base_model = dataset_dict['base_model']['path']
 
         print(f"[Trainer] Dataset prepared: {dataset_dict['total_examples']} examples")
         print(f"  Train: {len(dataset_dict['train']['text'])}")
         print(f"  Val: {len(dataset_dict['val']['text'])}")
         print(f"  Test: {len(dataset_dict['test']['text'])}")
 
-        # Load tokenizer and model
+        # Load tokenizer and model (a registered model already has the 3-label head)
         print(f"[Trainer] Loading base model: {base_model}")
         tokenizer = RobertaTokenizer.from_pretrained(base_model)
         model = RobertaForSequenceClassification.from_pretrained(
@@ -124,25 +196,13 @@ class ModelTrainer:
             label2id=self.label2id
         )
 
-        # Tokenize datasets
-        def tokenize_function(examples):
-            return tokenizer(
-                examples['text'],
-                padding='max_length',
-                truncation=True,
-                max_length=512
-            )
-
-        train_dataset = Dataset.from_dict(dataset_dict['train'])
-        val_dataset = Dataset.from_dict(dataset_dict['val'])
-        test_dataset = Dataset.from_dict(dataset_dict['test'])
-
-        train_dataset = train_dataset.map(tokenize_function, batched=True)
-        val_dataset = val_dataset.map(tokenize_function, batched=True)
-        test_dataset = test_dataset.map(tokenize_function, batched=True)
+        # Tokenize datasets (cached; unpadded, padded per batch by the collator)
+        train_dataset = tokenized_cache.load_or_tokenize(tokenizer, dataset_dict['train'], name='train')
+        val_dataset = tokenized_cache.load_or_tokenize(tokenizer, dataset_dict['val'], name='val')
+        test_dataset = tokenized_cache.load_or_tokenize(tokenizer, dataset_dict['test'], name='test')
 
         # Training arguments
-        model_version = datetime.now().strftime("%Y%m%d_%H%M%S")
+        model_version = model_version or datetime.now().strftime("%Y%m%d_%H%M%S")
         output_dir = self.model_dir / f"verifily-detector-{model_version}"
 
         training_args = TrainingArguments(
@@ -161,6 +221,9 @@ class ModelTrainer:
             metric_for_best_model="f1",
             greater_is_better=True,
             save_total_limit=2,
+            group_by_length=True,  # Length-bucketed batches, so short examples pad less
+            length_column_name='length',
+            save_safetensors=True,  # Served models are memory-mapped from safetensors
             report_to="none"  # Disable wandb/tensorboard
         )
 
@@ -170,13 +233,17 @@ class ModelTrainer:
             args=training_args,
             train_dataset=train_dataset,
             eval_dataset=val_dataset,
+            data_collator=tokenized_cache.collator(tokenizer),
             compute_metrics=self.compute_metrics,
-            callbacks=[EarlyStoppingCallback(early_stopping_patience=2)]
+            callbacks=[EarlyStoppingCallback(early_stopping_patience=2)] + (callbacks or [])
         )
 
         # Train
+        checkpoint = get_last_checkpoint(str(output_dir)) if resume and output_dir.exists() else None
+        if checkpoint:
+            print(f"[Trainer] Resuming from {checkpoint}")
         print(f"[Trainer] Starting training ({num_epochs} epochs)...")
-        train_result = trainer.train()
+        train_result = trainer.train(resume_from_checkpoint=checkpoint)
 
         # Evaluate on test set
         print(f"[Trainer] Evaluating on test set...")
@@ -191,7 +258,10 @@ class ModelTrainer:
         metadata = {
             'model_version': model_version,
             'base_model': base_model,
+            'training_mode': dataset_dict.get('mode', 'full'),
             'training_examples': dataset_dict['total_examples'],
+            'new_examples': dataset_dict.get('new_examples'),
+            'replay_examples': dataset_dict.get('replay_examples'),
             'train_examples': len(dataset_dict['train']['text']),
             'val_examples': len(dataset_dict['val']['text']),
             'test_examples': len(dataset_dict['test']['text']),
@@ -208,10 +278,18 @@ class ModelTrainer:
         with open(output_dir / 'metadata.json', 'w') as f:
             json.dump(metadata, f, indent=2)
 
+        # Register the version; serving switches to it only once promoted
+        model_registry.register(model_version, str(output_dir), metadata)
+
+        # The next incremental run starts after these
+        if dataset_dict.get('example_ids'):
+            await training_collector.mark_as_used(dataset_dict['example_ids'], model_version)
+
         print(f"[Trainer] Training complete!")
         print(f"  Test Accuracy: {test_results['eval_accuracy']:.4f}")
         print(f"  Test F1: {test_results['eval_f1']:.4f}")
         print(f"  Model saved to: {output_dir}")
+        print(f"  Registered as {model_version} (promote: POST /api/v1/ml/models/{model_version}/promote)")
 
         return {
             'model_path': str(output_dir),
@@ -220,8 +298,11 @@ class ModelTrainer:
         }
 
     def get_latest_model(self) -> Optional[Path]:
-        """Get the latest trained model"""
-        models = sorted(self.model_dir.glob("verifily-detector-*"))
+        """Get the latest trained model (saved as safetensors, so it loads memory-mapped)"""
+        models = sorted(
+            path for path in self.model_dir.glob("verifily-detector-*")
+            if (path / 'model.safetensors').exists() or (path / 'config.json').exists()
+        )
         return models[-1] if models else None
 
 
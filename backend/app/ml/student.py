@@ -0,0 +1,200 @@
+"""
+Distilled Student
+A hashing-trick logistic regression trained on the ensemble's soft labels
+(app.ml.distill), served as the 'fast' detector tier: numpy only, no torch,
+a few milliseconds per text on one CPU core.
+
+- Features: word unigrams and bigrams plus UTF-8 character 3-5 grams of the
+  lowercased text (first MAX_CHARS characters), hashed with crc32 into
+  2^hash_bits signed buckets, log-scaled counts, L2 normalized
+- The model is a weight vector and a bias (student.npz) with its feature
+  settings and distillation report (student.json) in DISTILLED_MODEL_DIR
+- It learns the platform-independent ensemble probability; serving applies
+  the same platform factors and thresholds (ensemble_config) as the ensemble
+"""
+
+import re
+import json
+import time
+import zlib
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.ensemble_config import ensemble_config, length_bucket, classify as classify_band
+
+logger = logging.getLogger(__name__)
+
+# Characters of a text that are featurized; the tail adds latency, not accuracy
+MAX_CHARS = 2000
+
+# How often serving checks DISTILLED_MODEL_DIR for a newly distilled student
+RELOAD_CHECK_SECONDS = 30.0
+
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# crc32 seeds, one per feature family, so 'the' the word and 'the' the trigram differ
+_UNIGRAM, _BIGRAM, _CHARS = 1, 2, 3
+
+
+class HashingStudent:
+    def __init__(self, hash_bits: int = 18, char_ngrams: Tuple[int, ...] = (3, 4, 5)):
+        self.hash_bits = hash_bits
+        self.char_ngrams = tuple(char_ngrams)
+        self.weights = np.zeros(1 << hash_bits, dtype=np.float32)
+        self.bias = 0.0
+        self.meta: Dict = {}
+
+    def features(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Sparse feature vector of a text: (bucket indices, values)"""
+        text = text[:MAX_CHARS].lower()
+        words = WORD_PATTERN.findall(text)
+        data = text.encode('utf-8', 'ignore')
+
+        hashes = [zlib.crc32(word.encode(), _UNIGRAM) for word in words]
+        hashes += [zlib.crc32(f"{a} {b}".encode(), _BIGRAM) for a, b in zip(words, words[1:])]
+        for n in self.char_ngrams:
+            hashes += [zlib.crc32(data[i:i + n], _CHARS + n) for i in range(len(data) - n + 1)]
+        if not hashes:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        hashed = np.asarray(hashes, dtype=np.uint32)
+        buckets = (hashed & ((1 << self.hash_bits) - 1)).astype(np.int64)
+        # The top bit picks a sign, so colliding features cancel rather than add up
+        signs = np.where(hashed >> 31, -1.0, 1.0)
+
+        indices, inverse = np.unique(buckets, return_inverse=True)
+        counts = np.bincount(inverse, weights=signs)
+        values = np.sign(counts) * np.log1p(np.abs(counts))
+        norm = np.linalg.norm(values)
+        if norm > 0:
+            values /= norm
+        return indices, values.astype(np.float32)
+
+    def predict(self, text: str) -> float:
+        """AI probability of a text"""
+        indices, values = self.features(text)
+        logit = float(np.dot(self.weights[indices], values)) + self.bias
+        return float(1.0 / (1.0 + np.exp(-np.clip(logit, -30.0, 30.0))))
+
+    def fit(self, texts: List[str], targets: List[float], epochs: int = 5,
+            learning_rate: float = 0.5, l2: float = 1e-6, seed: int = 42) -> List[float]:
+        """
+        SGD with per-bucket AdaGrad steps on log loss against soft targets
+
+        Features are recomputed each epoch rather than held for the whole set,
+        so memory stays at the weight vector. Returns the mean loss per epoch.
+        """
+        rng = np.random.default_rng(seed)
+        squared = np.full_like(self.weights, 1e-8)
+        bias_squared = 1e-8
+        history = []
+
+        for epoch in range(epochs):
+            loss = 0.0
+            for i in rng.permutation(len(texts)):
+                indices, values = self.features(texts[i])
+                target = float(targets[i])
+                logit = float(np.dot(self.weights[indices], values)) + self.bias
+                p = 1.0 / (1.0 + np.exp(-np.clip(logit, -30.0, 30.0)))
+                loss -= target * np.log(p + 1e-12) + (1 - target) * np.log(1 - p + 1e-12)
+
+                error = p - target
+                gradient = error * values + l2 * self.weights[indices]
+                squared[indices] += gradient ** 2
+                self.weights[indices] -= learning_rate * gradient / np.sqrt(squared[indices])
+                bias_squared += error ** 2
+                self.bias -= learning_rate * error / np.sqrt(bias_squared)
+
+            history.append(round(loss / max(len(texts), 1), 5))
+            print(f"[Student] epoch {epoch + 1}/{epochs}: loss {history[-1]}")
+        return history
+
+    def save(self, model_dir: str, meta: Optional[Dict] = None):
+        """Write student.npz and student.json (meta: version, report, ...)"""
+        directory = Path(model_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.meta = {
+            **(meta or {}),
+            'hash_bits': self.hash_bits,
+            'char_ngrams': list(self.char_ngrams),
+            'max_chars': MAX_CHARS,
+            'saved_at': datetime.now().isoformat()
+        }
+        # Weights first: the metadata file's appearance is what serving reloads on
+        np.savez(directory / "student.tmp.npz", weights=self.weights, bias=np.float64(self.bias))
+        (directory / "student.tmp.npz").replace(directory / "student.npz")
+        with open(directory / "student.json.tmp", 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        (directory / "student.json.tmp").replace(directory / "student.json")
+
+    @classmethod
+    def load(cls, model_dir: str) -> "HashingStudent":
+        directory = Path(model_dir)
+        with open(directory / "student.json") as f:
+            meta = json.load(f)
+        student = cls(meta['hash_bits'], tuple(meta['char_ngrams']))
+        with np.load(directory / "student.npz") as arrays:
+            student.weights = arrays['weights'].astype(np.float32)
+            student.bias = float(arrays['bias'])
+        student.meta = meta
+        return student
+
+
+def classify(ai_probability: float, word_count: int, platform: Optional[str] = None) -> Tuple[str, float, float]:
+    """
+    (classification, ai_probability, confidence) for a student probability,
+    with the ensemble's platform factors, base confidences and thresholds
+
+    The student has no scorer agreement to measure, so confidence comes from
+    the length bucket and the distance from 0.5.
+    """
+    if platform == 'twitter':
+        ai_probability *= 0.85
+    elif platform in ['linkedin', 'facebook']:
+        ai_probability *= 0.90
+
+    base_confidence = ensemble_config['base_confidence'][length_bucket(word_count)]
+    confidence = base_confidence * (0.7 + 0.6 * abs(ai_probability - 0.5))
+
+    classification = classify_band(ai_probability, ensemble_config['thresholds'])
+    if classification == "UNCERTAIN":
+        confidence *= 0.70
+    return classification, round(ai_probability, 4), round(confidence, 4)
+
+
+class StudentLoader:
+    """The serving copy of the distilled student, reloaded when a new one is saved"""
+
+    def __init__(self, model_dir: str):
+        self.model_dir = Path(model_dir)
+        self._student: Optional[HashingStudent] = None
+        self._loaded_mtime = 0.0
+        self._checked = 0.0
+
+    def get(self) -> Optional[HashingStudent]:
+        """The current student, or None if none has been distilled"""
+        now = time.monotonic()
+        if now - self._checked < RELOAD_CHECK_SECONDS and self._checked:
+            return self._student
+        self._checked = now
+        try:
+            mtime = (self.model_dir / "student.json").stat().st_mtime
+        except FileNotFoundError:
+            return self._student
+        if mtime != self._loaded_mtime:
+            try:
+                self._student = HashingStudent.load(str(self.model_dir))
+                self._loaded_mtime = mtime
+                logger.info("Loaded distilled student %s", self._student.meta.get('version'))
+            except Exception as e:
+                logger.warning("Could not load distilled student: %s", e)
+        return self._student
+
+
+# Global instance
+student_loader = StudentLoader(settings.DISTILLED_MODEL_DIR)
@@ -0,0 +1,118 @@
+"""
+Tokenized Dataset Cache
+Tokenizes a training split once and keeps it on disk as Arrow files, which
+datasets memory-maps on load, so repeat training runs skip tokenization.
+
+Entries are keyed by a fingerprint of the tokenizer (class, name, vocabulary,
+max_length) and of the split's texts and labels; any change in either gives
+a new entry. Entries are named after their split ('train-<key>') and only
+the TOKENIZED_CACHE_KEEP most recently used per split are kept, so
+incremental runs don't pile up one dataset per snapshot. Sequences are stored unpadded with a 'length' column: pad per
+batch at train time (collator()) and batch similar lengths together
+(TrainingArguments(group_by_length=True)) so short examples cost less.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from datasets import Dataset, load_from_disk
+from transformers import DataCollatorWithPadding
+
+from app.config import settings
+
+
+def tokenizer_fingerprint(tokenizer, max_length: int) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps([
+        type(tokenizer).__name__,
+        tokenizer.name_or_path,
+        len(tokenizer),
+        tokenizer.truncation_side,
+        max_length
+    ]).encode())
+    for token, token_id in sorted(tokenizer.get_vocab().items()):
+        digest.update(f"{token}\t{token_id}\n".encode())
+    return digest.hexdigest()
+
+
+def data_fingerprint(texts: List[str], labels: List[int]) -> str:
+    digest = hashlib.sha256()
+    for text, label in zip(texts, labels):
+        digest.update(f"{label}\t{len(text)}\t".encode())
+        digest.update(text.encode())
+    return digest.hexdigest()
+
+
+class TokenizedDatasetCache:
+    def __init__(self, cache_dir: str, keep: int = 3):
+        self.cache_dir = Path(cache_dir)
+        self.keep = keep
+
+    def _evict(self, name: str, keep: int) -> int:
+        """Remove all but the `keep` most recently used entries of a split; returns how many went"""
+        if not self.cache_dir.exists():
+            return 0
+        entries = []
+        for path in self.cache_dir.iterdir():
+            entry_name, _, key = path.name.rpartition('-')
+            if entry_name == name and len(key) == 32 and path.is_dir():
+                entries.append(path)
+        entries.sort(key=lambda path: path.stat().st_mtime, reverse=True)
+        for path in entries[keep:]:
+            shutil.rmtree(path, ignore_errors=True)
+        return len(entries[keep:])
+
+    def load_or_tokenize(self, tokenizer, split: Dict[str, List], max_length: int = 512, name: str = "split") -> Dataset:
+        """
+        Tokenized Dataset for {'text': [...], 'label': [...]}, from the cache if present
+
+        Columns: input_ids, attention_mask, label, length (unpadded).
+        """
+        key = hashlib.sha256(
+            (tokenizer_fingerprint(tokenizer, max_length) + data_fingerprint(split['text'], split['label'])).encode()
+        ).hexdigest()[:32]
+        path = self.cache_dir / f"{name}-{key}"
+
+        if path.exists():
+            # mtime marks last use for eviction
+            os.utime(path)
+            evicted = self._evict(name, self.keep)
+            print(f"[Tokenized Cache] {name}: hit ({path}), evicted {evicted} old entries")
+            return load_from_disk(str(path))
+
+        # Room for the entry about to be written
+        evicted = self._evict(name, max(self.keep - 1, 0))
+        print(f"[Tokenized Cache] {name}: tokenizing {len(split['text'])} examples, evicted {evicted} old entries")
+
+        def tokenize_function(examples):
+            encoded = tokenizer(examples['text'], truncation=True, max_length=max_length)
+            encoded['length'] = [len(ids) for ids in encoded['input_ids']]
+            return encoded
+
+        dataset = Dataset.from_dict({'text': split['text'], 'label': split['label']})
+        dataset = dataset.map(tokenize_function, batched=True, remove_columns=['text'])
+
+        # Written beside the final path and renamed, so a crashed run leaves no partial entry
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.cache_dir, prefix='.writing-')
+        dataset.save_to_disk(staging)
+        if path.exists():
+            shutil.rmtree(staging)
+        else:
+            os.replace(staging, path)
+
+        # Reload so training reads the memory-mapped copy rather than the in-memory one
+        return load_from_disk(str(path))
+
+    def collator(self, tokenizer) -> DataCollatorWithPadding:
+        """Pads each batch to its longest sequence (multiple of 8 for tensor cores)"""
+        return DataCollatorWithPadding(tokenizer, pad_to_multiple_of=8)
+
+
+# Global instance
+tokenized_cache = TokenizedDatasetCache(settings.TOKENIZED_CACHE_DIR, settings.TOKENIZED_CACHE_KEEP)
@@ -2,16 +2,49 @@
 Training Data Collector
 Collects verified human/AI content for model fine-tuning
 Network effect: More users = better model
+
+Each unique text (by normalized content hash) is stored once. Repeat
+verifications become votes for a label, and the row carries the consensus
+label, its vote count and label agreement, so a viral post verified by 500
+users is one training example, not 500.
+
+One long-lived write connection in WAL mode, fed by a background writer
+that groups queued examples into one transaction (one fsync per batch
+instead of per row), and a separate read connection for stats and dataset
+queries, which WAL lets run alongside the writer.
 """
 
 import json
+import random
 import asyncio
+import hashlib
+import logging
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from pathlib import Path
 import aiosqlite
 from dataclasses import dataclass, asdict
 
+from app.config import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for deduplication (same rules as verification hashes)"""
+    return ' '.join(text.lower().strip().split())
+
+
+def hash_content(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode()).hexdigest()
+
 
 @dataclass
 class TrainingExample:
@@ -32,51 +65,151 @@ class TrainingDataCollector:
     Collects and manages training data from verifications
     """
 
-    def __init__(self, db_path: str = "training_data.db"):
+    def __init__(
+        self,
+        db_path: str = "training_data.db",
+        batch_size: int = 100,
+        flush_ms: float = 50,
+        queue_size: int = 10000
+    ):
         self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_ms = flush_ms
+        self.queue_size = queue_size
         self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._db: Optional[aiosqlite.Connection] = None
+        self._reader: Optional[aiosqlite.Connection] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
 
     async def initialize(self):
-        """Initialize the training data database"""
+        """Open the write/read connections, create the schema and start the writer"""
         if self._initialized:
             return
 
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS training_examples (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    content TEXT NOT NULL,
-                    label TEXT NOT NULL,
-                    platform TEXT,
-                    verified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    user_handle TEXT,
-                    confidence_at_detection REAL,
-                    ai_probability_at_detection REAL,
-                    user_confirmed BOOLEAN DEFAULT FALSE,
-                    metadata TEXT,
-                    used_for_training BOOLEAN DEFAULT FALSE,
-                    model_version TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
-            # Index for efficient queries
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_label ON training_examples(label)
-            """)
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_used_for_training
-                ON training_examples(used_for_training)
-            """)
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_user_confirmed
-                ON training_examples(user_confirmed)
-            """)
-
-            await db.commit()
-
-        self._initialized = True
-        print("[Training Data Collector] Initialized")
+        async with self._init_lock:
+            if self._initialized:
+                return
+
+            db = await aiosqlite.connect(self.db_path)
+            await db.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only fsyncs at checkpoints; a crash can lose the
+            # last batches but never corrupts the database
+            await db.execute("PRAGMA synchronous=NORMAL")
+            await self._create_schema(db)
+            self._db = db
+
+            self._reader = await aiosqlite.connect(self.db_path)
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._writer = asyncio.create_task(self._write_batches())
+
+            self._initialized = True
+        logger.info("Training data collector initialized (WAL, batched writes)")
+
+    async def _create_schema(self, db: aiosqlite.Connection):
+        legacy = await self._detach_legacy_table(db)
+
+        # One row per unique (normalized) text; label is the consensus of its votes
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS training_examples (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_hash TEXT NOT NULL,
+                content TEXT NOT NULL,
+                label TEXT NOT NULL,
+                platform TEXT,
+                verified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                user_handle TEXT,
+                confidence_at_detection REAL,
+                ai_probability_at_detection REAL,
+                user_confirmed BOOLEAN DEFAULT FALSE,
+                metadata TEXT,
+                votes INTEGER DEFAULT 1,
+                label_agreement REAL DEFAULT 1.0,
+                used_for_training BOOLEAN DEFAULT FALSE,
+                model_version TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Votes per label for each text
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS training_votes (
+                example_id INTEGER NOT NULL,
+                label TEXT NOT NULL,
+                votes INTEGER DEFAULT 0,
+                confirmed_votes INTEGER DEFAULT 0,
+                PRIMARY KEY (example_id, label)
+            )
+        """)
+
+        # Index for efficient queries
+        await db.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_content_hash
+            ON training_examples(content_hash)
+        """)
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_label ON training_examples(label)
+        """)
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_used_for_training
+            ON training_examples(used_for_training)
+        """)
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_user_confirmed
+            ON training_examples(user_confirmed)
+        """)
+
+        if legacy:
+            await self._migrate_legacy_rows(db)
+
+        await db.commit()
+
+    async def _detach_legacy_table(self, db: aiosqlite.Connection) -> bool:
+        """Move a pre-dedup training_examples table (one row per vote) aside"""
+        cursor = await db.execute("PRAGMA table_info(training_examples)")
+        columns = {row[1] for row in await cursor.fetchall()}
+        if not columns or 'content_hash' in columns:
+            return False
+
+        await db.execute("ALTER TABLE training_examples RENAME TO training_examples_legacy")
+        for index in ('idx_label', 'idx_used_for_training', 'idx_user_confirmed'):
+            await db.execute(f"DROP INDEX IF EXISTS {index}")
+        return True
+
+    async def _migrate_legacy_rows(self, db: aiosqlite.Connection):
+        """Fold the legacy rows into the deduplicated tables, as votes"""
+        migrated = 0
+        last_id = 0
+        while True:
+            cursor = await db.execute("""
+                SELECT id, content, label, platform, user_handle,
+                       confidence_at_detection, ai_probability_at_detection,
+                       user_confirmed, metadata, used_for_training, model_version
+                FROM training_examples_legacy
+                WHERE id > ?
+                ORDER BY id
+                LIMIT 1000
+            """, (last_id,))
+            rows = await cursor.fetchall()
+            if not rows:
+                break
+
+            for row in rows:
+                example_id = await self._upsert(db, tuple(row[1:9]))
+                if row[9]:
+                    await db.execute("""
+                        UPDATE training_examples
+                        SET used_for_training = TRUE, model_version = ?
+                        WHERE id = ?
+                    """, (row[10], example_id))
+            migrated += len(rows)
+            last_id = rows[-1][0]
+
+        await db.execute("DROP TABLE training_examples_legacy")
+        logger.info("Migrated %d legacy training rows to the deduplicated store", migrated)
 
     async def add_example(
         self,
@@ -87,109 +220,308 @@ class TrainingDataCollector:
         confidence: float = 0.0,
         ai_probability: float = 0.0,
         user_confirmed: bool = True,
-        metadata: Dict = None
-    ) -> int:
+        metadata: Dict = None,
+        wait: bool = True
+    ) -> Optional[int]:
         """
         Add a training example to the database
-        Returns the example ID
+        Returns the example ID once its batch is committed, or None right
+        away with wait=False (the request path should not wait on a flush)
         """
         await self.initialize()
 
-        metadata_json = json.dumps(metadata or {})
-
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                INSERT INTO training_examples (
-                    content, label, platform, user_handle,
-                    confidence_at_detection, ai_probability_at_detection,
-                    user_confirmed, metadata
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                content, label, platform, user_handle,
-                confidence, ai_probability, user_confirmed, metadata_json
-            ))
-            await db.commit()
-            example_id = cursor.lastrowid
-
-        print(f"[Training Data] Added example {example_id}: {label} ({len(content)} chars)")
+        row = (
+            content, label, platform, user_handle,
+            confidence, ai_probability, user_confirmed, json.dumps(metadata or {})
+        )
+        committed = asyncio.get_running_loop().create_future() if wait else None
+        await self._queue.put((row, committed))
+        return await committed if wait else None
+
+    async def _write_batches(self):
+        """Background writer: drain the queue in batches, one transaction each"""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.flush_ms / 1000
+            while len(batch) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                ids = await self._insert(batch)
+                for (_, committed), example_id in zip(batch, ids):
+                    if committed is not None and not committed.done():
+                        committed.set_result(example_id)
+            except Exception as e:
+                logger.warning("Failed to write training data batch of %d: %s", len(batch), e)
+                for _, committed in batch:
+                    if committed is not None and not committed.done():
+                        committed.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _insert(self, batch: List) -> List[int]:
+        ids = []
+        async with self._write_lock:
+            try:
+                for row, _ in batch:
+                    ids.append(await self._upsert(self._db, row))
+                await self._db.commit()
+            except Exception:
+                await self._db.rollback()
+                raise
+        logger.debug("Wrote %d training examples", len(batch))
+        return ids
+
+    async def _upsert(self, db: aiosqlite.Connection, row: Tuple) -> int:
+        """
+        Record one vote: insert the text if it is new, otherwise count the vote
+        against the existing row and recompute its consensus label
+        """
+        content, label, platform, user_handle, confidence, ai_probability, user_confirmed, metadata_json = row
+        content_hash = hash_content(content)
+
+        await db.execute("""
+            INSERT INTO training_examples (
+                content_hash, content, label, platform, user_handle,
+                confidence_at_detection, ai_probability_at_detection,
+                user_confirmed, metadata
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(content_hash) DO UPDATE SET
+                votes = votes + 1,
+                user_confirmed = user_confirmed OR excluded.user_confirmed,
+                updated_at = CURRENT_TIMESTAMP
+        """, (
+            content_hash, content, label, platform, user_handle,
+            confidence, ai_probability, user_confirmed, metadata_json
+        ))
+        cursor = await db.execute(
+            "SELECT id, votes FROM training_examples WHERE content_hash = ?", (content_hash,)
+        )
+        example_id, votes = await cursor.fetchone()
+
+        await db.execute("""
+            INSERT INTO training_votes (example_id, label, votes, confirmed_votes)
+            VALUES (?, ?, 1, ?)
+            ON CONFLICT(example_id, label) DO UPDATE SET
+                votes = votes + 1,
+                confirmed_votes = confirmed_votes + excluded.confirmed_votes
+        """, (example_id, label, int(bool(user_confirmed))))
+
+        if votes > 1:
+            # Consensus: most confirmed votes, then most votes overall
+            await db.execute("""
+                UPDATE training_examples
+                SET label = (
+                        SELECT label FROM training_votes WHERE example_id = :id
+                        ORDER BY confirmed_votes DESC, votes DESC, label
+                        LIMIT 1
+                    ),
+                    label_agreement = (
+                        SELECT CAST(MAX(votes) AS REAL) / SUM(votes)
+                        FROM training_votes WHERE example_id = :id
+                    )
+                WHERE id = :id
+            """, {'id': example_id})
         return example_id
 
-    async def get_training_dataset(
+    async def flush(self):
+        """Wait until every queued example is committed"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """Flush pending examples and close both connections"""
+        if not self._initialized:
+            return
+        await self.flush()
+        self._writer.cancel()
+        await self._db.close()
+        await self._reader.close()
+        self._initialized = False
+
+    def _filter(self, only_confirmed: bool, include_used: bool = False) -> str:
+        where = "TRUE" if include_used else "used_for_training = FALSE"
+        if only_confirmed:
+            where += " AND user_confirmed = TRUE"
+        return where
+
+    @staticmethod
+    def _to_example(row) -> Dict:
+        return {
+            'id': row[0],
+            'content': row[1],
+            'label': row[2],
+            'platform': row[3],
+            'confidence': row[4],
+            'ai_probability': row[5],
+            'metadata': json.loads(row[6] or '{}'),
+            'votes': row[7],
+            'weight': row[8],  # Share of votes agreeing with the consensus label
+            'used_for_training': bool(row[9])
+        }
+
+    async def iter_examples(
         self,
-        min_examples: int = 100,
         only_confirmed: bool = True,
-        balance_classes: bool = True
-    ) -> List[Dict]:
+        chunk_size: int = 1000,
+        max_id: Optional[int] = None,
+        include_used: bool = False
+    ) -> AsyncIterator[Dict]:
         """
-        Get training dataset for model fine-tuning
+        Stream unused (or, with include_used, all) examples in id order, one page at a time
+
+        Keyset pagination (id > last id) keeps every page an index range scan
+        and holds no read transaction open between pages.
         """
         await self.initialize()
+        await self.flush()
+
+        where = self._filter(only_confirmed, include_used)
+        if max_id is not None:
+            where += f" AND id <= {int(max_id)}"
+        last_id = 0
+        while True:
+            cursor = await self._reader.execute(f"""
+                SELECT id, content, label, platform, confidence_at_detection,
+                       ai_probability_at_detection, metadata, votes, label_agreement,
+                   used_for_training
+                FROM training_examples
+                WHERE {where} AND id > ?
+                ORDER BY id
+                LIMIT ?
+            """, (last_id, chunk_size))
+            rows = await cursor.fetchall()
+            if not rows:
+                return
 
-        query = """
-            SELECT content, label, platform, confidence_at_detection,
-                   ai_probability_at_detection, metadata
-            FROM training_examples
-            WHERE used_for_training = FALSE
-        """
+            for row in rows:
+                yield self._to_example(row)
+            last_id = rows[-1][0]
 
-        if only_confirmed:
-            query += " AND user_confirmed = TRUE"
+    async def label_counts(self, only_confirmed: bool = True, include_used: bool = False) -> Tuple[Dict[str, int], int]:
+        """Examples per label (unused only, unless include_used), and the highest id counted"""
+        await self.initialize()
+        await self.flush()
+        cursor = await self._reader.execute(f"""
+            SELECT label, COUNT(*), MAX(id)
+            FROM training_examples
+            WHERE {self._filter(only_confirmed, include_used)}
+            GROUP BY label
+        """)
+        rows = await cursor.fetchall()
+        return {row[0]: row[1] for row in rows}, max((row[2] for row in rows), default=0)
 
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(query)
-            rows = await cursor.fetchall()
+    async def iter_dataset(
+        self,
+        only_confirmed: bool = True,
+        balance_classes: bool = True,
+        shuffle_buffer: int = 10000,
+        include_used: bool = False
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream the training dataset in bounded memory
 
-        examples = []
-        for row in rows:
-            examples.append({
-                'content': row[0],
-                'label': row[1],
-                'platform': row[2],
-                'confidence': row[3],
-                'ai_probability': row[4],
-                'metadata': json.loads(row[5] or '{}')
-            })
-
-        # Balance classes if requested
+        Balancing keeps exactly min(label count) examples of every label in a
+        single pass: each example is kept with probability
+        (still needed / still unseen) for its label (selection sampling), a
+        uniform sample that needs only two counters per label. Output goes
+        through a fixed-size shuffle buffer, so order is locally random.
+        """
+        # Rows collected while streaming are left for the next export, so the
+        # counts the quotas are based on stay exact
+        counts, max_id = await self.label_counts(only_confirmed, include_used)
+        needed = None
         if balance_classes:
-            examples = self._balance_classes(examples)
+            quota = min(counts.values()) if counts else 0
+            needed = {label: quota for label in counts}
+            unseen = dict(counts)
+
+        buffer: List[Dict] = []
+        async for example in self.iter_examples(only_confirmed, max_id=max_id, include_used=include_used):
+            if needed is not None:
+                label = example['label']
+                keep = random.random() * unseen[label] < needed[label]
+                unseen[label] -= 1
+                if not keep:
+                    continue
+                needed[label] -= 1
+
+            if len(buffer) < shuffle_buffer:
+                buffer.append(example)
+                continue
+            i = random.randrange(len(buffer))
+            buffer[i], example = example, buffer[i]
+            yield example
+
+        random.shuffle(buffer)
+        for example in buffer:
+            yield example
+
+    async def get_training_dataset(
+        self,
+        min_examples: int = 100,
+        only_confirmed: bool = True,
+        balance_classes: bool = True,
+        include_used: bool = False
+    ) -> List[Dict]:
+        """
+        Get training dataset for model fine-tuning
+        (the whole dataset in memory; use iter_dataset/export_for_training for large sets)
+        """
+        examples = [
+            example async for example in self.iter_dataset(
+                only_confirmed=only_confirmed,
+                balance_classes=balance_classes,
+                include_used=include_used
+            )
+        ]
+        random.shuffle(examples)
 
         print(f"[Training Data] Retrieved {len(examples)} examples")
         return examples
 
-    def _balance_classes(self, examples: List[Dict]) -> List[Dict]:
-        """Balance the dataset across classes"""
-        from collections import defaultdict
-        import random
-
-        # Group by label
-        by_label = defaultdict(list)
-        for ex in examples:
-            by_label[ex['label']].append(ex)
-
-        # Find minimum class size
-        min_size = min(len(v) for v in by_label.values()) if by_label else 0
-
-        # Sample equally from each class
-        balanced = []
-        for label, label_examples in by_label.items():
-            balanced.extend(random.sample(label_examples, min(min_size, len(label_examples))))
-
-        random.shuffle(balanced)
-        return balanced
+    async def replay_sample(self, count: int, only_confirmed: bool = True) -> List[Dict]:
+        """
+        Random sample of already-used examples, mixed into incremental training
+        so the model keeps seeing older data (LIMIT keeps SQLite's sort bounded)
+        """
+        await self.initialize()
+        if count <= 0:
+            return []
+        where = "used_for_training = TRUE" + (" AND user_confirmed = TRUE" if only_confirmed else "")
+        cursor = await self._reader.execute(f"""
+            SELECT id, content, label, platform, confidence_at_detection,
+                   ai_probability_at_detection, metadata, votes, label_agreement,
+                   used_for_training
+            FROM training_examples
+            WHERE {where}
+            ORDER BY RANDOM()
+            LIMIT ?
+        """, (count,))
+        return [self._to_example(row) for row in await cursor.fetchall()]
 
     async def mark_as_used(self, example_ids: List[int], model_version: str):
         """Mark examples as used for training"""
         await self.initialize()
 
-        async with aiosqlite.connect(self.db_path) as db:
-            placeholders = ','.join('?' * len(example_ids))
-            await db.execute(f"""
-                UPDATE training_examples
-                SET used_for_training = TRUE, model_version = ?
-                WHERE id IN ({placeholders})
-            """, [model_version] + example_ids)
-            await db.commit()
+        async with self._write_lock:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(example_ids), 10000):
+                chunk = example_ids[start:start + 10000]
+                placeholders = ','.join('?' * len(chunk))
+                await self._db.execute(f"""
+                    UPDATE training_examples
+                    SET used_for_training = TRUE, model_version = ?
+                    WHERE id IN ({placeholders})
+                """, [model_version] + chunk)
+            await self._db.commit()
 
         print(f"[Training Data] Marked {len(example_ids)} examples as used")
 
@@ -197,37 +529,43 @@ class TrainingDataCollector:
         """Get training data statistics"""
         await self.initialize()
 
-        async with aiosqlite.connect(self.db_path) as db:
-            # Total examples
-            cursor = await db.execute("SELECT COUNT(*) FROM training_examples")
-            total = (await cursor.fetchone())[0]
+        db = self._reader
+        # Total examples
+        cursor = await db.execute("SELECT COUNT(*) FROM training_examples")
+        total = (await cursor.fetchone())[0]
 
-            # By label
-            cursor = await db.execute("""
-                SELECT label, COUNT(*)
-                FROM training_examples
-                GROUP BY label
-            """)
-            by_label = dict(await cursor.fetchall())
+        # By label
+        cursor = await db.execute("""
+            SELECT label, COUNT(*)
+            FROM training_examples
+            GROUP BY label
+        """)
+        by_label = dict(await cursor.fetchall())
 
-            # Confirmed vs unconfirmed
-            cursor = await db.execute("""
-                SELECT user_confirmed, COUNT(*)
-                FROM training_examples
-                GROUP BY user_confirmed
-            """)
-            by_confirmation = dict(await cursor.fetchall())
+        # Confirmed vs unconfirmed
+        cursor = await db.execute("""
+            SELECT user_confirmed, COUNT(*)
+            FROM training_examples
+            GROUP BY user_confirmed
+        """)
+        by_confirmation = dict(await cursor.fetchall())
 
-            # Used for training
-            cursor = await db.execute("""
-                SELECT COUNT(*)
-                FROM training_examples
-                WHERE used_for_training = TRUE
-            """)
-            used = (await cursor.fetchone())[0]
+        # Used for training
+        cursor = await db.execute("""
+            SELECT COUNT(*)
+            FROM training_examples
+            WHERE used_for_training = TRUE
+        """)
+        used = (await cursor.fetchone())[0]
+
+        # Verifications folded into existing texts
+        cursor = await db.execute("SELECT COALESCE(SUM(votes), 0) FROM training_examples")
+        votes = (await cursor.fetchone())[0]
 
         return {
             'total_examples': total,
+            'total_votes': votes,
+            'duplicate_votes': votes - total,
             'by_label': by_label,
             'confirmed': by_confirmation.get(1, 0),
             'unconfirmed': by_confirmation.get(0, 0),
@@ -235,25 +573,134 @@ class TrainingDataCollector:
             'available_for_training': total - used
         }
 
-    async def export_for_training(self, output_path: str = "training_data.jsonl"):
-        """Export training data in JSONL format for model fine-tuning"""
+    async def export_for_training(
+        self,
+        output_path: str = "training_data.jsonl",
+        shard_size: int = 100000,
+        balance_classes: bool = True,
+        only_confirmed: bool = True
+    ) -> Dict:
+        """
+        Export training data for model fine-tuning, streaming
+
+        Format follows the extension: .parquet (needs pyarrow) or JSONL.
+        Exports larger than shard_size are split into numbered shards
+        (training_data-00000.jsonl, ...); each shard is written as rows
+        arrive, so memory stays flat however large the table is.
+        """
         await self.initialize()
 
-        examples = await self.get_training_dataset(only_confirmed=True)
+        path = Path(output_path)
+        parquet = path.suffix == '.parquet'
+        if parquet and not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+        counts, _ = await self.label_counts(only_confirmed)
+        if balance_classes:
+            expected = min(counts.values()) * len(counts) if counts else 0
+        else:
+            expected = sum(counts.values())
+        sharded = shard_size > 0 and expected > shard_size
+
+        def shard_path(index: int) -> Path:
+            return path.with_name(f"{path.stem}-{index:05d}{path.suffix}") if sharded else path
+
+        writer_cls = _ParquetShardWriter if parquet else _JsonlShardWriter
+        shards: List[str] = []
+        writer = None
+        count = 0
+
+        try:
+            async for ex in self.iter_dataset(only_confirmed=only_confirmed, balance_classes=balance_classes):
+                if writer is None or (sharded and writer.rows >= shard_size):
+                    if writer is not None:
+                        await asyncio.to_thread(writer.close)
+                    target = shard_path(len(shards))
+                    writer = await asyncio.to_thread(writer_cls, target)
+                    shards.append(str(target))
 
-        with open(output_path, 'w') as f:
-            for ex in examples:
                 # Format for transformer training
-                json_line = json.dumps({
+                writer.add({
                     'text': ex['content'],
                     'label': ex['label'],
+                    'weight': ex['weight'],
+                    'votes': ex['votes'],
                     'metadata': ex['metadata']
                 })
-                f.write(json_line + '\n')
+                count += 1
+                if writer.pending >= EXPORT_WRITE_ROWS:
+                    await asyncio.to_thread(writer.write_pending)
+        finally:
+            if writer is not None:
+                await asyncio.to_thread(writer.close)
+
+        print(f"[Training Data] Exported {count} examples to {len(shards)} shard(s) at {output_path}")
+        return {'count': count, 'shards': shards}
+
+
+# Rows buffered before a shard write (a Parquet row group)
+EXPORT_WRITE_ROWS = 5000
+
+
+class _JsonlShardWriter:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, 'w')
+        self._pending: List[Dict] = []
+        self.rows = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add(self, row: Dict):
+        self._pending.append(row)
+        self.rows += 1
+
+    def write_pending(self):
+        self._file.writelines(json.dumps(row) + '\n' for row in self._pending)
+        self._pending = []
+
+    def close(self):
+        self.write_pending()
+        self._file.close()
+
+
+class _ParquetShardWriter(_JsonlShardWriter):
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._schema = pa.schema([
+            ('text', pa.string()),
+            ('label', pa.string()),
+            ('weight', pa.float32()),
+            ('votes', pa.int32()),
+            ('metadata', pa.string())
+        ])
+        self._writer = pq.ParquetWriter(str(path), self._schema)
+        self._pending = []
+        self.rows = 0
+
+    def write_pending(self):
+        if not self._pending:
+            return
+        table = pa.table({
+            'text': [row['text'] for row in self._pending],
+            'label': [row['label'] for row in self._pending],
+            'weight': [row['weight'] for row in self._pending],
+            'votes': [row['votes'] for row in self._pending],
+            'metadata': [json.dumps(row['metadata']) for row in self._pending]
+        }, schema=self._schema)
+        self._writer.write_table(table)
+        self._pending = []
 
-        print(f"[Training Data] Exported {len(examples)} examples to {output_path}")
-        return len(examples)
+    def close(self):
+        self.write_pending()
+        self._writer.close()
 
 
 # Global instance
-training_collector = TrainingDataCollector()
+training_collector = TrainingDataCollector(
+    batch_size=settings.TRAINING_WRITE_BATCH_SIZE,
+    flush_ms=settings.TRAINING_WRITE_FLUSH_MS,
+    queue_size=settings.TRAINING_WRITE_QUEUE_SIZE
+)
@@ -0,0 +1,310 @@
+"""
+Training Jobs
+Runs ModelTrainer.fine_tune as a background job in a separate process, so a
+training run never shares the serving process's CPU threads or event loop.
+
+- The child is spawned (not forked), caps its CPU threads at
+  TRAINING_CPU_THREADS and lowers its priority (TRAINING_NICE)
+- Job state is a JSON file per job in TRAINING_JOBS_DIR, rewritten
+  atomically by the child as training progresses; any API worker can poll it
+- Cancel drops a flag file the child checks every step: it saves a
+  checkpoint and stops, and the job can be resumed from that checkpoint
+  (shutdown of the serving process cancels its running job the same way)
+- A job whose process died (crash, deploy) shows as 'interrupted' and
+  resumes from the latest HF Trainer checkpoint, on the same dataset
+  snapshot it started with
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+# Job states; 'interrupted' and 'cancelled' jobs can be resumed
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED, INTERRUPTED = (
+    'queued', 'running', 'completed', 'failed', 'cancelled', 'interrupted'
+)
+ACTIVE = (QUEUED, RUNNING)
+RESUMABLE = (CANCELLED, INTERRUPTED, FAILED)
+
+# Least time between progress writes from the training process
+PROGRESS_INTERVAL_SECONDS = 2.0
+
+# How long a queued job may take to start (spawn + importing torch) before it counts as lost
+START_GRACE_SECONDS = 120.0
+
+
+class TrainingCancelled(Exception):
+    pass
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TrainingJobRunner:
+    def __init__(self, jobs_dir: str, cpu_threads: int = 2, nice: int = 10):
+        self.jobs_dir = Path(jobs_dir)
+        self.cpu_threads = cpu_threads
+        self.nice = nice
+        self._processes: Dict[str, multiprocessing.Process] = {}
+
+    def _path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _cancel_flag(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.cancel"
+
+    def _read(self, job_id: str) -> Optional[Dict]:
+        try:
+            with open(self._path(job_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, job: Dict):
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        staging = self._path(job['id']).with_suffix('.json.tmp')
+        with open(staging, 'w') as f:
+            json.dump(job, f, indent=2)
+        os.replace(staging, self._path(job['id']))
+
+    def _refresh(self, job: Dict) -> Dict:
+        """Mark a job whose process is gone as interrupted"""
+        process = self._processes.get(job['id'])
+        exited = process is not None and not process.is_alive()
+        if exited:
+            self._processes.pop(job['id'], None)  # is_alive() reaped it
+        if job['status'] == QUEUED and not exited:
+            queued_for = (datetime.now() - datetime.fromisoformat(job['queued_at'])).total_seconds()
+            if queued_for < START_GRACE_SECONDS:
+                return job
+        if job['status'] in ACTIVE and not _pid_alive(job.get('pid')):
+            job = self._read(job['id']) or job  # It may have just finished
+            if job['status'] in ACTIVE:
+                job['status'] = INTERRUPTED
+                job['finished_at'] = datetime.now().isoformat()
+                self._write(job)
+        if job['status'] in ACTIVE:
+            job['cancel_requested'] = self._cancel_flag(job['id']).exists()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        job = self._read(job_id)
+        return self._refresh(job) if job else None
+
+    def list(self) -> List[Dict]:
+        if not self.jobs_dir.exists():
+            return []
+        jobs = [self.get(path.stem) for path in self.jobs_dir.glob("*.json")]
+        return sorted((job for job in jobs if job), key=lambda job: job['created_at'], reverse=True)
+
+    def active(self) -> Optional[Dict]:
+        return next((job for job in self.list() if job['status'] in ACTIVE), None)
+
+    def submit(self, params: Dict) -> Dict:
+        """Start a new training job (one at a time; ValueError if one is running)"""
+        running = self.active()
+        if running:
+            raise ValueError(f"Training job {running['id']} is still {running['status']}")
+
+        now = datetime.now()
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'params': params,
+            'model_version': now.strftime("%Y%m%d_%H%M%S"),
+            'created_at': now.isoformat(),
+            'attempts': 0,
+            'progress': {}
+        }
+        return self._start(job, resume=False)
+
+    def resume(self, job_id: str) -> Dict:
+        """Continue a cancelled/interrupted/failed job from its latest checkpoint"""
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(f"Unknown training job: {job_id}")
+        if job['status'] not in RESUMABLE:
+            raise ValueError(f"Job {job_id} is {job['status']}, not resumable")
+        running = self.active()
+        if running:
+            raise ValueError(f"Training job {running['id']} is still {running['status']}")
+        return self._start(job, resume=True)
+
+    def cancel(self, job_id: str) -> Dict:
+        """Ask the job to checkpoint and stop at its next step"""
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(f"Unknown training job: {job_id}")
+        if job['status'] in ACTIVE:
+            # Only the flag: the job file belongs to the training process while it runs
+            self._cancel_flag(job_id).touch()
+            job['cancel_requested'] = True
+        return job
+
+    def _start(self, job: Dict, resume: bool) -> Dict:
+        self._cancel_flag(job['id']).unlink(missing_ok=True)
+        job.update({
+            'status': QUEUED,
+            'queued_at': datetime.now().isoformat(),
+            'pid': None,
+            'attempts': job.get('attempts', 0) + 1,
+            'resumed': resume,
+            'error': None,
+            'finished_at': None
+        })
+        self._write(job)
+
+        # spawn: a fresh interpreter, not a fork of the serving process and its threads
+        process = multiprocessing.get_context('spawn').Process(
+            target=_run_job,
+            args=(str(self.jobs_dir), job['id'], resume, self.cpu_threads, self.nice),
+            name=f"training-{job['id']}",
+            daemon=False
+        )
+        process.start()
+        self._processes[job['id']] = process
+        return job  # The child records its pid and status from here on
+
+    async def shutdown(self, timeout: float = 10.0):
+        """Checkpoint and stop this process's running jobs on the way down (resumable)"""
+        for job_id, process in list(self._processes.items()):
+            if process.is_alive():
+                self._cancel_flag(job_id).touch()
+        deadline = time.monotonic() + timeout
+        for process in list(self._processes.values()):
+            await asyncio.to_thread(process.join, max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.terminate()
+
+
+def _job_callback(runner: TrainingJobRunner, job: Dict):
+    """TrainerCallback that reports progress and turns a cancel flag into a checkpointed stop"""
+    from transformers import TrainerCallback
+
+    class JobProgress(TrainerCallback):
+        cancelled = False
+        last_write = 0.0
+
+        def _report(self, state, force: bool = False):
+            now = time.monotonic()
+            if not force and now - self.last_write < PROGRESS_INTERVAL_SECONDS:
+                return
+            self.last_write = now
+            logged = state.log_history[-1] if state.log_history else {}
+            job['progress'] = {
+                'step': state.global_step,
+                'max_steps': state.max_steps,
+                'epoch': round(state.epoch or 0.0, 3),
+                'percent': round(100 * state.global_step / state.max_steps, 1) if state.max_steps else 0.0,
+                'loss': logged.get('loss', job['progress'].get('loss')),
+                'eval_f1': logged.get('eval_f1', job['progress'].get('eval_f1')),
+                'updated_at': datetime.now().isoformat()
+            }
+            runner._write(job)
+
+        def on_step_end(self, args, state, control, **kwargs):
+            if runner._cancel_flag(job['id']).exists():
+                self.cancelled = True
+                control.should_save = True
+                control.should_training_stop = True
+            self._report(state)
+
+        def on_evaluate(self, args, state, control, **kwargs):
+            self._report(state, force=True)
+
+        def on_train_end(self, args, state, control, **kwargs):
+            self._report(state, force=True)
+            if self.cancelled:
+                raise TrainingCancelled()
+
+    return JobProgress()
+
+
+async def _with_collector(coro):
+    """Run coro, then close the collector's connections (their threads would keep the process alive)"""
+    from app.ml.training_data_collector import training_collector
+    try:
+        return await coro
+    finally:
+        await training_collector.close()
+
+
+def _run_job(jobs_dir: str, job_id: str, resume: bool, cpu_threads: int, nice: int):
+    """Training process entry point"""
+    # Thread limits must be set before torch is imported
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'TOKENIZERS_PARALLELISM'):
+        os.environ[var] = 'false' if var == 'TOKENIZERS_PARALLELISM' else str(cpu_threads)
+    if nice:
+        os.nice(nice)
+
+    runner = TrainingJobRunner(jobs_dir, cpu_threads, nice)
+    job = runner._read(job_id)
+    job.update({'status': RUNNING, 'pid': os.getpid(), 'started_at': datetime.now().isoformat()})
+    runner._write(job)
+
+    params = job['params']
+    snapshot = runner.jobs_dir / f"{job_id}.dataset.json"
+    try:
+        import torch
+        from app.ml.model_trainer import model_trainer
+        torch.set_num_threads(cpu_threads)
+
+        # The dataset is frozen at the first attempt so a resumed checkpoint sees the same data
+        if snapshot.exists():
+            with open(snapshot) as f:
+                dataset_dict = json.load(f)
+        else:
+            dataset_dict = asyncio.run(_with_collector(model_trainer.prepare_dataset(
+                params['min_examples'],
+                incremental=params.get('incremental', False),
+                replay_ratio=params.get('replay_ratio', settings.INCREMENTAL_REPLAY_RATIO)
+            )))
+            if dataset_dict is None:
+                raise ValueError("Not enough training data")
+            with open(snapshot, 'w') as f:
+                json.dump(dataset_dict, f)
+
+        result = asyncio.run(_with_collector(model_trainer.fine_tune(
+            num_epochs=params['num_epochs'],
+            batch_size=params['batch_size'],
+            learning_rate=params['learning_rate'],
+            min_examples=params['min_examples'],
+            dataset_dict=dataset_dict,
+            model_version=job['model_version'],
+            resume=resume,
+            callbacks=[_job_callback(runner, job)]
+        )))
+        job.update({'status': COMPLETED, 'result': result})
+        snapshot.unlink(missing_ok=True)
+    except TrainingCancelled:
+        job['status'] = CANCELLED
+    except Exception as e:
+        job.update({'status': FAILED, 'error': str(e)})
+    finally:
+        runner._cancel_flag(job_id).unlink(missing_ok=True)
+        job['finished_at'] = datetime.now().isoformat()
+        runner._write(job)
+
+
+# Global instance
+training_jobs = TrainingJobRunner(
+    settings.TRAINING_JOBS_DIR,
+    cpu_threads=settings.TRAINING_CPU_THREADS,
+    nice=settings.TRAINING_NICE
+)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import Dict, List, Optional
 import json
 import uuid
 
@@ -13,6 +13,7 @@ from app.schemas import (
     TweetDetectRequest, TweetDetectResponse, TweetResult
 )
 from app.detection import text_detector, image_detector
+from app.scheduler import scheduler, INTERACTIVE, BULK
 
 router = APIRouter(prefix="/detect", tags=["Detection"])
 
@@ -22,12 +23,27 @@ async def detect_content(
     db: AsyncSession = Depends(get_db)
 ):
     """Detect if content is AI-generated"""
+    with scheduler.priority(INTERACTIVE):
+        return await _detect_and_store(request, db)
+
+
+async def _detect_and_store(
+    request: DetectRequest,
+    db: AsyncSession,
+    provider_result: Optional[Dict] = None
+) -> DetectResponse:
+    """
+    Detect one item and record the scan (provider_result: prefetched text
+    provider score); detectors queue for slots at the caller's priority
+    """
     
     # Route to appropriate detector
     if request.content_type == "text" or request.content_type == "tweet":
         result = await text_detector.detect(
             request.content,
-            request.source_platform
+            request.source_platform,
+            request.tier,
+            provider_result=provider_result
         )
         content_type = ContentType.TEXT if request.content_type == "text" else ContentType.TWEET
         
@@ -87,6 +103,14 @@ async def detect_batch(
     results = []
     ai_count = 0
     human_count = 0
+
+    # Text items the model server would score go to it in one /detect/batch call
+    # (network only, so no scheduler slot)
+    text_items = [item for item in request.items if item.content_type in ("text", "tweet")]
+    prefetched = await text_detector.prefetch_provider_results(
+        [(item.content, item.tier) for item in text_items]
+    )
+    provider_results = {id(item): result for item, result in zip(text_items, prefetched)}
     
     for item in request.items:
         # Reuse single detect logic
@@ -94,11 +118,14 @@ async def detect_batch(
             content=item.content,
             content_type=item.content_type,
             source_url=item.source_url,
-            source_platform=item.source_platform
+            source_platform=item.source_platform,
+            tier=item.tier
         )
         
         try:
-            result = await detect_content(single_request, db)
+            # Each item's model work is its own bulk-lane job so interactive scans can interleave
+            with scheduler.priority(BULK):
+                result = await _detect_and_store(single_request, db, provider_results.get(id(item)))
             results.append(result)
             
             if result.ai_probability >= 0.5:
@@ -151,7 +178,8 @@ async def detect_tweets(
             continue
         
         # Detect
-        result = await text_detector.detect(text, 'twitter')
+        with scheduler.priority(INTERACTIVE):
+            result = await text_detector.detect(text, 'twitter')
         is_bot = text_detector.is_likely_bot(result, tweet)
         
         # Store in database
@@ -7,6 +7,12 @@ from typing import Optional
 
 from app.ml.training_data_collector import training_collector
 from app.ml.model_trainer import model_trainer
+from app.ml.training_jobs import training_jobs
+from app.ml.model_registry import model_registry
+from app.detection.shadow import shadow_scorer
+from app.config import settings
+from app.detection.text import ADVANCED_AVAILABLE
+from app.scheduler import scheduler, BULK
 
 router = APIRouter(prefix="/api/v1/ml", tags=["machine-learning"])
 
@@ -16,6 +22,8 @@ class TrainRequest(BaseModel):
     num_epochs: int = 3
     batch_size: int = 16
     learning_rate: float = 2e-5
+    incremental: bool = False  # Continue from the latest registered model on new examples only
+    replay_ratio: float = settings.INCREMENTAL_REPLAY_RATIO
 
 
 @router.get("/training-data/stats")
@@ -34,44 +42,74 @@ async def get_training_stats():
 @router.post("/train")
 async def train_model(request: TrainRequest):
     """
-    Trigger model fine-tuning on collected data
-    Requires at least 100 verified examples
+    Start model fine-tuning on collected data as a background job
+    Requires at least 100 verified examples; poll /train/jobs/{job_id} for progress
     """
-    # Check if we have enough data
+    # Check if we have enough data (full runs also reuse examples earlier models saw)
     stats = await training_collector.get_stats()
+    available = stats['available_for_training'] if request.incremental else stats['confirmed']
 
-    if stats['available_for_training'] < request.min_examples:
+    if available < request.min_examples:
         raise HTTPException(
             status_code=400,
-            detail=f"Not enough training data. Have {stats['available_for_training']}, need {request.min_examples}"
+            detail=f"Not enough training data. Have {available}, need {request.min_examples}"
         )
 
-    # Start training (async - this takes a while)
     try:
-        result = await model_trainer.fine_tune(
-            num_epochs=request.num_epochs,
-            batch_size=request.batch_size,
-            learning_rate=request.learning_rate,
-            min_examples=request.min_examples
-        )
+        job = training_jobs.submit(request.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
-        if result is None:
-            raise HTTPException(
-                status_code=500,
-                detail="Training failed - not enough data or other error"
-            )
+    return {
+        "success": True,
+        "message": "Training started in the background",
+        "job": job
+    }
 
-        return {
-            "success": True,
-            "message": "Model training complete",
-            **result
-        }
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Training failed: {str(e)}"
-        )
+@router.get("/train/jobs")
+async def list_training_jobs():
+    """
+    All training jobs, newest first
+    """
+    return {"success": True, "jobs": training_jobs.list()}
+
+
+@router.get("/train/jobs/{job_id}")
+async def get_training_job(job_id: str):
+    """
+    Status and progress (step, epoch, loss) of a training job
+    """
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown training job: {job_id}")
+    return {"success": True, "job": job}
+
+
+@router.post("/train/jobs/{job_id}/cancel")
+async def cancel_training_job(job_id: str):
+    """
+    Stop a training job at its next step, after saving a checkpoint
+    """
+    try:
+        job = training_jobs.cancel(job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"success": True, "job": job}
+
+
+@router.post("/train/jobs/{job_id}/resume")
+async def resume_training_job(job_id: str):
+    """
+    Continue a cancelled, interrupted or failed job from its latest checkpoint
+    """
+    try:
+        job = training_jobs.resume(job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"success": True, "job": job}
 
 
 @router.get("/models")
@@ -85,7 +123,9 @@ async def list_models():
         return {
             "success": True,
             "models": [],
-            "latest": None
+            "latest": None,
+            "registry": model_registry.state(),
+            "serving_version": _serving_version()
         }
 
     # Read metadata
@@ -103,22 +143,144 @@ async def list_models():
         "latest": {
             "path": str(latest_model),
             **metadata
-        }
+        },
+        "registry": model_registry.state(),
+        "serving_version": _serving_version()
+    }
+
+
+def _serving_version() -> Optional[str]:
+    if not ADVANCED_AVAILABLE:
+        return None
+    from app.detection.advanced_detector import advanced_detector
+    return advanced_detector.model_version
+
+
+async def _swap_serving_model() -> Optional[str]:
+    """Hot-swap this process's classifier now; other workers follow on their next registry poll"""
+    if not ADVANCED_AVAILABLE:
+        return None
+    from app.detection.advanced_detector import advanced_detector
+    try:
+        return await advanced_detector.reload_classifier()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Model promoted but could not be loaded here: {str(e)}"
+        )
+
+
+@router.get("/models/registry")
+async def get_registry():
+    """
+    Registered model versions, the active one and promotion history
+    """
+    return {
+        "success": True,
+        "registry": model_registry.state(),
+        "serving_version": _serving_version()
+    }
+
+
+@router.post("/models/{version}/promote")
+async def promote_model(version: str):
+    """
+    Make a registered model version the serving one (zero-downtime swap)
+    """
+    try:
+        model_registry.promote(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return {
+        "success": True,
+        "active": version,
+        "serving_version": await _swap_serving_model()
+    }
+
+
+@router.post("/models/rollback")
+async def rollback_model():
+    """
+    Return to the version that was serving before the last promote
+    """
+    try:
+        state = model_registry.rollback()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return {
+        "success": True,
+        "active": state['active'],
+        "serving_version": await _swap_serving_model()
+    }
+
+
+@router.post("/models/{version}/shadow")
+async def start_shadow(version: str, sample_rate: Optional[float] = None):
+    """
+    Score a sampled fraction of live traffic with a candidate version, off the request path
+    """
+    if sample_rate is None:
+        sample_rate = settings.SHADOW_DEFAULT_SAMPLE_RATE
+    if not 0 < sample_rate <= 1:
+        raise HTTPException(status_code=400, detail="sample_rate must be in (0, 1]")
+
+    try:
+        shadow = model_registry.set_shadow(version, sample_rate)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return {
+        "success": True,
+        "shadow": shadow,
+        "serving_version": _serving_version()
+    }
+
+
+@router.delete("/models/shadow")
+async def stop_shadow():
+    """
+    Stop shadow scoring (results already recorded are kept)
+    """
+    model_registry.clear_shadow()
+    return {"success": True}
+
+
+@router.get("/shadow/report")
+async def get_shadow_report():
+    """
+    Agreement rate and latency delta of the shadow candidate vs production
+    """
+    return {
+        "success": True,
+        "serving_version": _serving_version(),
+        "report": shadow_scorer.report()
     }
 
 
 @router.post("/export-data")
-async def export_training_data(output_path: str = "training_data.jsonl"):
+@scheduler.job(BULK)
+async def export_training_data(
+    output_path: str = "training_data.jsonl",
+    shard_size: int = 100000,
+    balance_classes: bool = True
+):
     """
-    Export collected training data to JSONL format
+    Export collected training data to JSONL (or .parquet) shards, streaming
     """
     try:
-        count = await training_collector.export_for_training(output_path)
+        export = await training_collector.export_for_training(
+            output_path,
+            shard_size=shard_size,
+            balance_classes=balance_classes
+        )
         return {
             "success": True,
-            "message": f"Exported {count} examples to {output_path}",
-            "count": count,
-            "path": output_path
+            "message": f"Exported {export['count']} examples to {output_path}",
+            "count": export['count'],
+            "path": output_path,
+            "shards": export['shards']
         }
     except Exception as e:
         raise HTTPException(
@@ -6,10 +6,12 @@ from datetime import datetime, timedelta
 from app.database import get_db
 from app.models import ContentScan, AttentionRecord, Classification, ContentType
 from app.schemas import StatsResponse
+from app.scheduler import scheduler, BULK
 
 router = APIRouter(prefix="/stats", tags=["Statistics"])
 
 @router.get("", response_model=StatsResponse)
+@scheduler.job(BULK)
 async def get_stats(db: AsyncSession = Depends(get_db)):
     """Get aggregated statistics"""
     
@@ -114,6 +116,7 @@ async def get_stats(db: AsyncSession = Depends(get_db)):
     )
 
 @router.get("/realtime")
+@scheduler.job(BULK)
 async def get_realtime_stats(db: AsyncSession = Depends(get_db)):
     """Get stats for last hour (for live dashboard)"""
 
@@ -143,6 +146,7 @@ async def get_realtime_stats(db: AsyncSession = Depends(get_db)):
     }
 
 @router.get("/admin/global")
+@scheduler.job(BULK)
 async def get_global_admin_stats(db: AsyncSession = Depends(get_db)):
     """
     Admin endpoint: Get comprehensive statistics across ALL users
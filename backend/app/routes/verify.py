@@ -10,10 +10,16 @@ from typing import Optional
 from datetime import datetime
 import hashlib
 import json
+import logging
 
 from app.database import get_db
 from app.models import Verification, Classification, ContentScan, ContentType, Waitlist
 from app.detection.text import text_detector
+from app.scheduler import scheduler, INTERACTIVE, BULK
+from app.metrics import CACHE_REQUESTS
+from app.tracing import tracer
+
+logger = logging.getLogger(__name__)
 
 # ML Training Data Collection
 try:
@@ -21,7 +27,7 @@ try:
     ML_ENABLED = True
 except ImportError:
     ML_ENABLED = False
-    print("[Warning] ML training data collection not available")
+    logger.warning("ML training data collection not available")
 
 router = APIRouter(prefix="/api/v1", tags=["verification"])
 
@@ -115,25 +121,29 @@ async def verify_content(
     4. If not: run AI detection, save result, return new verification
     """
     # Generate content hash
-    content_hash = hash_content(request.content)
+    with tracer.span("hash"):
+        content_hash = hash_content(request.content)
 
     # Check if already verified
-    result = await db.execute(
-        select(Verification).where(Verification.content_hash == content_hash)
-    )
-    existing = result.scalar_one_or_none()
+    with tracer.span("db.lookup"):
+        result = await db.execute(
+            select(Verification).where(Verification.content_hash == content_hash)
+        )
+        existing = result.scalar_one_or_none()
+    CACHE_REQUESTS.labels(cache='verification_db', result='hit' if existing else 'miss').inc()
 
     if existing:
         # Already verified - increment view count and return
-        await db.execute(
-            update(Verification)
-            .where(Verification.content_hash == content_hash)
-            .values(
-                view_count=Verification.view_count + 1,
-                last_verified=datetime.utcnow()
+        with tracer.span("db.commit"):
+            await db.execute(
+                update(Verification)
+                .where(Verification.content_hash == content_hash)
+                .values(
+                    view_count=Verification.view_count + 1,
+                    last_verified=datetime.utcnow()
+                )
             )
-        )
-        await db.commit()
+            await db.commit()
 
         return VerifyResponse(
             content_hash=content_hash,
@@ -148,10 +158,12 @@ async def verify_content(
         )
 
     # Not verified yet - run detection
-    detection_result = await text_detector.detect(
-        request.content,
-        source_platform=request.platform
-    )
+    with scheduler.priority(INTERACTIVE):
+        with tracer.span("detect"):
+            detection_result = await text_detector.detect(
+                request.content,
+                source_platform=request.platform
+            )
 
     # Determine classification enum
     classification_map = {
@@ -198,7 +210,8 @@ async def verify_content(
     )
     db.add(content_scan)
 
-    await db.commit()
+    with tracer.span("db.commit"):
+        await db.commit()
 
     return VerifyResponse(
         content_hash=content_hash,
@@ -213,6 +226,7 @@ async def verify_content(
     )
 
 @router.get("/stats/verifications")
+@scheduler.job(BULK)
 async def get_verification_stats(db: AsyncSession = Depends(get_db)):
     """Get overall verification statistics"""
     from sqlalchemy import func
@@ -386,11 +400,12 @@ async def verify_as_human(
                     'verification_type': 'author_self_verification',
                     'post_id': request.post_id,
                     'post_url': request.post_url
-                }
+                },
+                wait=False  # Committed by the collector's batched writer
             )
-            print(f"[ML] Collected training example from @{request.username}")
+            logger.info("Collected training example from @%s", request.username)
         except Exception as e:
-            print(f"[ML] Failed to collect training data: {e}")
+            logger.warning("Failed to collect training data: %s", e)
             # Don't fail the request if training collection fails
 
     return VerifyResponse(
@@ -0,0 +1,252 @@
+"""
+Workload Scheduler
+Priority-aware admission control shared by every route that runs detection
+Interactive extension scans and bulk jobs get separate lanes, weighted fair
+queuing between them, and their own thread pools for CPU-bound model work
+
+Routes pick a priority; detectors take a slot in that lane only around
+CPU-bound scoring, so requests waiting on external HTTP providers don't
+hold one.
+"""
+
+import time
+import asyncio
+import functools
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.metrics import SCHEDULER_QUEUE_DEPTH, SCHEDULER_IN_FLIGHT, SCHEDULER_WAIT
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Lane of the job currently running in this context (None outside a job)
+_current_lane: contextvars.ContextVar = contextvars.ContextVar("scheduler_lane", default=None)
+
+# Lane that jobs started in this context queue in (None = interactive)
+_priority: contextvars.ContextVar = contextvars.ContextVar("scheduler_priority", default=None)
+
+
+class Lane:
+    """
+    One queue of jobs with its own weight, concurrency cap and executor
+    """
+
+    def __init__(self, name: str, weight: float, max_in_flight: int, threads: int):
+        self.name = name
+        self.weight = weight
+        self.max_in_flight = max_in_flight
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=f"lane-{name}")
+
+        self.waiters: Deque[Tuple[asyncio.Future, float]] = deque()
+        self.in_flight = 0
+        self.virtual_time = 0.0
+
+        # Metrics
+        self.admitted = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._recent_waits: Deque[float] = deque(maxlen=1024)
+        self._wait_histogram = SCHEDULER_WAIT.labels(lane=name)
+        SCHEDULER_QUEUE_DEPTH.labels(lane=name).set_function(lambda: self.depth)
+        SCHEDULER_IN_FLIGHT.labels(lane=name).set_function(lambda: self.in_flight)
+
+    @property
+    def depth(self) -> int:
+        return len(self.waiters)
+
+    def record_wait(self, seconds: float):
+        self.admitted += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        self._recent_waits.append(seconds)
+        self._wait_histogram.observe(seconds)
+
+    def stats(self) -> Dict:
+        waits = sorted(self._recent_waits)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(int(p * len(waits)), len(waits) - 1)]
+
+        return {
+            'weight': self.weight,
+            'max_in_flight': self.max_in_flight,
+            'depth': self.depth,
+            'in_flight': self.in_flight,
+            'admitted': self.admitted,
+            'wait_ms': {
+                'mean': round(self.wait_seconds_total / self.admitted * 1000, 3) if self.admitted else 0.0,
+                'p50': round(percentile(0.50) * 1000, 3),
+                'p99': round(percentile(0.99) * 1000, 3),
+                'max': round(self.wait_seconds_max * 1000, 3)
+            }
+        }
+
+
+class JobScheduler:
+    """
+    Weighted fair queuing over a fixed number of execution slots
+
+    Each lane carries a virtual time that advances by 1/weight per admitted
+    job; a freed slot always goes to the waiting lane with the smallest
+    virtual time. A lane that was idle restarts at the scheduler clock so it
+    cannot bank credit while empty. Per-lane max_in_flight keeps a slot free
+    for interactive work even when bulk jobs are queued.
+    """
+
+    def __init__(self, max_concurrency: int, lanes: List[Lane]):
+        self.max_concurrency = max_concurrency
+        self.lanes = {lane.name: lane for lane in lanes}
+        self._in_flight = 0
+        self._clock = 0.0
+
+    def _has_capacity(self, lane: Lane) -> bool:
+        return self._in_flight < self.max_concurrency and lane.in_flight < lane.max_in_flight
+
+    def _grant(self, lane: Lane, waited: float):
+        self._in_flight += 1
+        lane.in_flight += 1
+        self._clock = lane.virtual_time
+        lane.virtual_time += 1.0 / lane.weight
+        lane.record_wait(waited)
+
+    def _dispatch(self):
+        """Hand free slots to waiting lanes in virtual-time order"""
+        while self._in_flight < self.max_concurrency:
+            eligible = [
+                lane for lane in self.lanes.values()
+                if lane.waiters and lane.in_flight < lane.max_in_flight
+            ]
+            if not eligible:
+                return
+
+            lane = min(eligible, key=lambda l: l.virtual_time)
+            future, enqueued_at = lane.waiters.popleft()
+            if future.done():
+                # Waiter was cancelled while queued
+                continue
+
+            self._grant(lane, time.perf_counter() - enqueued_at)
+            future.set_result(None)
+
+    async def acquire(self, lane_name: str):
+        """Wait for an execution slot in the given lane"""
+        lane = self.lanes[lane_name]
+
+        if not lane.waiters:
+            lane.virtual_time = max(lane.virtual_time, self._clock)
+            if self._has_capacity(lane):
+                self._grant(lane, 0.0)
+                return
+
+        future = asyncio.get_running_loop().create_future()
+        lane.waiters.append((future, time.perf_counter()))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted right before cancellation - give it back
+                self.release(lane_name)
+            raise
+
+    def release(self, lane_name: str):
+        lane = self.lanes[lane_name]
+        lane.in_flight -= 1
+        self._in_flight -= 1
+        self._dispatch()
+
+    @contextmanager
+    def priority(self, lane_name: str):
+        """
+        Lane for the jobs started inside the block, without taking a slot
+
+        Nested use keeps the outer priority, so a bulk route that reuses an
+        interactive handler stays in the bulk lane.
+        """
+        if _priority.get() is not None:
+            yield
+            return
+        token = _priority.set(lane_name)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    @asynccontextmanager
+    async def lane(self, lane_name: Optional[str] = None):
+        """
+        Run the enclosed block as one job in the given lane (default: the
+        current priority's)
+
+        Nested use keeps the outer job's slot.
+        """
+        if _current_lane.get() is not None:
+            yield
+            return
+
+        lane_name = lane_name or _priority.get() or INTERACTIVE
+
+        await self.acquire(lane_name)
+        token = _current_lane.set(lane_name)
+        try:
+            yield
+        finally:
+            _current_lane.reset(token)
+            self.release(lane_name)
+
+    def job(self, lane_name: str):
+        """Decorator running a whole async route handler as one job in a lane"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                async with self.lane(lane_name):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def current_lane(self) -> Optional[str]:
+        return _current_lane.get()
+
+    async def to_thread(self, func, *args, **kwargs):
+        """
+        asyncio.to_thread replacement that runs on the current lane's executor
+        Work started outside any job uses the current priority's pool
+        """
+        lane = self.lanes[_current_lane.get() or _priority.get() or INTERACTIVE]
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, func, *args, **kwargs)
+        return await loop.run_in_executor(lane.executor, call)
+
+    def stats(self) -> Dict:
+        return {
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self._in_flight,
+            'lanes': {name: lane.stats() for name, lane in self.lanes.items()}
+        }
+
+
+# Global instance
+scheduler = JobScheduler(
+    max_concurrency=settings.SCHEDULER_MAX_CONCURRENCY,
+    lanes=[
+        Lane(
+            INTERACTIVE,
+            weight=settings.SCHEDULER_INTERACTIVE_WEIGHT,
+            max_in_flight=settings.SCHEDULER_MAX_CONCURRENCY,
+            threads=settings.SCHEDULER_INTERACTIVE_THREADS
+        ),
+        Lane(
+            BULK,
+            weight=settings.SCHEDULER_BULK_WEIGHT,
+            max_in_flight=settings.SCHEDULER_BULK_MAX_IN_FLIGHT,
+            threads=settings.SCHEDULER_BULK_THREADS
+        ),
+    ]
+)
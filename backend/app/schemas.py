@@ -15,6 +15,7 @@ class DetectRequest(BaseModel):
     content_type: ContentTypeEnum = ContentTypeEnum.text
     source_url: Optional[str] = None
     source_platform: Optional[str] = None
+    tier: Optional[str] = Field(None, pattern="^(full|fast)$", description="Text detector tier (default: DETECTOR_TIER)")
     
 class BatchDetectRequest(BaseModel):
     items: List[DetectRequest] = Field(..., max_length=50)
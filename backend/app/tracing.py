@@ -0,0 +1,317 @@
+"""
+Request Tracing
+Lightweight OpenTelemetry-compatible spans around detection stages
+
+Every request gets a trace; stage timings always feed the Server-Timing
+response header, while full span trees are exported (OTLP/JSON to a local
+file or an OTLP/HTTP collector) only for sampled traces.
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import logging
+import asyncio
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "verifily-backend"
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+# Lowercase only, as the W3C Trace Context spec requires
+_HEX_DIGITS = frozenset('0123456789abcdef')
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(num_bytes: int) -> str:
+    return random.getrandbits(num_bytes * 8).to_bytes(num_bytes, 'big').hex()
+
+
+def _is_hex(value: str, length: int) -> bool:
+    return len(value) == length and all(c in _HEX_DIGITS for c in value)
+
+
+def parse_traceparent(header: str) -> Optional[Tuple[str, str, int]]:
+    """
+    (trace_id, parent_id, flags) of a W3C traceparent header, or None if it is
+    malformed; the caller then starts a fresh root trace
+    """
+    parts = header.strip().split('-')
+    if len(parts) < 4:
+        return None
+    version, trace_id, parent_id, flags = parts[:4]
+    # Version ff is invalid; version 00 has exactly four fields, later ones may add more
+    if not _is_hex(version, 2) or version == 'ff' or (version == '00' and len(parts) != 4):
+        return None
+    if not (_is_hex(trace_id, 32) and _is_hex(parent_id, 16) and _is_hex(flags, 2)):
+        return None
+    if trace_id == '0' * 32 or parent_id == '0' * 16:
+        return None
+    return trace_id, parent_id, int(flags, 16)
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Trace:
+    """All spans recorded for one request (shared across threads)"""
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.root_span_id: Optional[str] = None
+        self.spans: List["Span"] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span"):
+        with self._lock:
+            self.spans.append(span)
+
+    def stage_timings(self) -> Dict[str, float]:
+        """Total milliseconds per span name, excluding the root span"""
+        timings: Dict[str, float] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            if span.span_id == self.root_span_id or span.end_ns is None:
+                continue
+            timings[span.name] = timings.get(span.name, 0.0) + span.duration_ms
+        return timings
+
+
+class Span:
+    __slots__ = (
+        'trace', 'span_id', 'parent_span_id', 'name', 'kind',
+        'start_ns', 'end_ns', 'attributes', 'status'
+    )
+
+    def __init__(self, trace: Trace, name: str, parent_span_id: Optional[str] = None,
+                 kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict] = None):
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes or {})
+        self.status = STATUS_UNSET
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException):
+        self.status = STATUS_ERROR
+        self.attributes['exception.type'] = type(exc).__name__
+        self.attributes['exception.message'] = str(exc)
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        self.trace.add(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict:
+        span = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in self.attributes.items()],
+            'status': {'code': self.status}
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+        return span
+
+
+def _otlp_payload(trace: Trace) -> Dict:
+    return {
+        'resourceSpans': [{
+            'resource': {
+                'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]
+            },
+            'scopeSpans': [{
+                'scope': {'name': 'app.tracing'},
+                'spans': [span.to_otlp() for span in trace.spans]
+            }]
+        }]
+    }
+
+
+class SpanExporter:
+    """
+    Exports finished traces from a background thread so the request path
+    never blocks on file or network I/O. Drops traces if the queue is full.
+    """
+
+    def __init__(self, max_queue: int = 1000):
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, trace: Trace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            pass
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                self.export(trace)
+            except Exception as e:
+                logger.warning("Trace export failed: %s", e)
+
+    def export(self, trace: Trace):
+        raise NotImplementedError
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends one OTLP/JSON document per trace to a local file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        super().__init__()
+
+    def export(self, trace: Trace):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(_otlp_payload(trace)) + '\n')
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """Posts OTLP/JSON to a collector's /v1/traces endpoint"""
+
+    def __init__(self, endpoint: str):
+        self.url = endpoint.rstrip('/') + '/v1/traces'
+        self._client = httpx.Client(timeout=5.0)
+        super().__init__()
+
+    def export(self, trace: Trace):
+        self._client.post(self.url, json=_otlp_payload(trace))
+
+
+class Tracer:
+    def __init__(self, sample_rate: float = 0.0, exporter: Optional[SpanExporter] = None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    def _should_sample(self) -> bool:
+        return self.exporter is not None and random.random() < self.sample_rate
+
+    @contextmanager
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes):
+        """
+        Start the root span for a request
+        Honours an incoming W3C traceparent header (trace id + sampled flag)
+        """
+        trace_id, parent_id, sampled = None, None, self._should_sample()
+        parsed = parse_traceparent(traceparent) if traceparent else None
+        if parsed:
+            trace_id, parent_id, flags = parsed
+            sampled = self.exporter is not None and flags & 1 == 1
+
+        trace = Trace(trace_id or _new_id(16), sampled)
+        root = Span(trace, name, parent_span_id=parent_id, kind=SPAN_KIND_SERVER, attributes=attributes)
+        trace.root_span_id = root.span_id
+        token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            root.end()
+            if trace.sampled:
+                self.exporter.submit(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Child span of the current span; a no-op outside a trace"""
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+
+        span = Span(parent.trace, name, parent_span_id=parent.span_id, attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def traced(self, name: str):
+        """Decorator wrapping a sync or async function in a span"""
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def current_trace(self) -> Optional[Trace]:
+        span = _current_span.get()
+        return span.trace if span is not None else None
+
+
+def server_timing_header(trace: Trace, root: Span) -> str:
+    """Format stage timings as a Server-Timing header value"""
+    entries = [f"total;dur={root.duration_ms:.2f}"]
+    for name, duration in trace.stage_timings().items():
+        entries.append(f"{name};dur={duration:.2f}")
+    return ", ".join(entries)
+
+
+def _build_exporter() -> Optional[SpanExporter]:
+    if settings.TRACE_EXPORTER == "file":
+        os.makedirs(os.path.dirname(os.path.abspath(settings.TRACE_FILE_PATH)), exist_ok=True)
+        return FileSpanExporter(settings.TRACE_FILE_PATH)
+    if settings.TRACE_EXPORTER == "otlp":
+        return OTLPHttpSpanExporter(settings.TRACE_OTLP_ENDPOINT)
+    return None
+
+
+# Global instance
+tracer = Tracer(sample_rate=settings.TRACE_SAMPLE_RATE, exporter=_build_exporter())
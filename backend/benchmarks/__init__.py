@@ -0,0 +1,7 @@
+"""
+Detection benchmarks
+Replays a fixed corpus through the detectors and HTTP endpoints
+
+    python -m benchmarks.run --save baselines/local.json
+    python -m benchmarks.run --compare baselines/local.json
+"""
@@ -0,0 +1,95 @@
+"""
+Benchmark Corpus
+Deterministic tweets, medium posts and long articles built from fixed
+sentence pools, mixing casual human-style and formal AI-style writing
+"""
+
+import random
+import hashlib
+from typing import Dict, List
+
+HUMAN_SENTENCES = [
+    "lol just spent 3hrs debugging and the issue was a missing semicolon",
+    "honestly the new update is kinda mid, idk why everyone is hyped",
+    "grabbed coffee with my sister and we ended up talking for like four hours",
+    "my cat knocked the router off the shelf again so that's my evening sorted",
+    "anyone else think the old way was overcomplicated? maybe i'm just lazy",
+    "ok so the train was late AGAIN and i missed the first half of the meeting...",
+    "tried the new ramen place downtown, broth was great but the noodles were soggy",
+    "i mean it works, but i wouldn't ship it on a friday tbh",
+    "we lost 3-1 but the second half was actually fun to watch",
+    "my landlord finally fixed the heating after two weeks of emails lol",
+    "not gonna lie, that ending made me cry on the bus",
+    "why does every app need an account now, i just want to check the weather",
+]
+
+AI_SENTENCES = [
+    "Furthermore, it is important to note that artificial intelligence has significantly transformed various industries.",
+    "Additionally, these advancements have facilitated unprecedented levels of efficiency and productivity.",
+    "Moreover, a comprehensive analysis of data enables organizations to leverage robust solutions.",
+    "Consequently, stakeholders must delve into the strategic implications of these technological innovations.",
+    "In conclusion, leveraging modern cloud infrastructure can facilitate robust and comprehensive solutions.",
+    "It is essential to consider the multifaceted nature of this complex and evolving landscape.",
+    "By implementing best practices, teams can ensure optimal performance across distributed systems.",
+    "This holistic approach fosters collaboration and streamlines the overall decision-making process.",
+    "Ultimately, the integration of these methodologies paves the way for sustainable long-term growth.",
+    "Navigating these challenges requires a nuanced understanding of both technical and human factors.",
+    "In today's fast-paced digital world, adaptability remains a crucial component of success.",
+    "These insights underscore the pivotal role of innovation in shaping the future of the industry.",
+]
+
+# size -> (sentences per item, items)
+SIZES = {
+    'tweet': (2, 40),
+    'post': (8, 20),
+    'article': (60, 6),
+}
+
+
+def _compose(rng: random.Random, style: str, sentences: int) -> str:
+    if style == 'human':
+        pool = HUMAN_SENTENCES
+    elif style == 'ai':
+        pool = AI_SENTENCES
+    else:
+        pool = HUMAN_SENTENCES + AI_SENTENCES
+
+    parts = [rng.choice(pool) for _ in range(sentences)]
+    text = " ".join(p if p[-1] in ".!?" else p + "." for p in parts)
+
+    if sentences > 10:
+        # Break long texts into paragraphs
+        words = text.split(". ")
+        paragraphs = [". ".join(words[i:i + 6]) for i in range(0, len(words), 6)]
+        text = ".\n\n".join(p.rstrip(".") for p in paragraphs) + "."
+    return text
+
+
+def build_corpus(seed: int = 1337) -> List[Dict]:
+    """
+    Build the benchmark corpus
+
+    Returns:
+        List of {'id', 'size', 'style', 'text'} dicts, identical for a given seed
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for size, (sentences, count) in SIZES.items():
+        for i in range(count):
+            style = ('human', 'ai', 'mixed')[i % 3]
+            corpus.append({
+                'id': f"{size}-{i:03d}",
+                'size': size,
+                'style': style,
+                'text': _compose(rng, style, sentences)
+            })
+    return corpus
+
+
+def fingerprint(corpus: List[Dict]) -> str:
+    """Stable hash of the corpus so baselines are only compared like for like"""
+    digest = hashlib.sha256()
+    for item in corpus:
+        digest.update(item['id'].encode())
+        digest.update(item['text'].encode())
+    return digest.hexdigest()[:16]
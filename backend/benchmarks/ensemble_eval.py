@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Ensemble Evaluation Harness
+Runs every scorer once over a labeled corpus, caches the per-scorer outputs,
+then fits ensemble weights, calibration and thresholds over the cached
+matrix in seconds, without touching a model again
+
+Usage (from backend/):
+    python -m benchmarks.ensemble_eval collect --detector advanced --data labeled.jsonl --corpus raid=5000
+    python -m benchmarks.ensemble_eval tune --detector advanced --output models/ensemble.json
+    python -m benchmarks.ensemble_eval collect --detector engine --collector
+    python -m benchmarks.ensemble_eval tune --detector engine --output ../ai-detector-engine/ensemble.json
+
+Detectors:
+    advanced  AdvancedAIDetector: perplexity, burstiness, entropy, transformer
+              and stylometric scores; weights per length bucket
+    engine    ai-detector-engine EnsembleDetector: pattern, statistical and
+              ml scores; weights with ML and without it (fallback)
+
+collect appends one line per text to <cache-dir>/<detector>.jsonl, tagged
+with the model that produced it; texts already scored by the same model are
+skipped, so a rerun only scores what is new. Labeled texts come from --data
+(JSON lines with 'text' and 'label': 0/1 or 'human'/'ai'), the training data
+collector and the local public corpus.
+
+tune holds out a hash-selected share of the cache, then:
+- weights: exhaustive search over the simplex (--step) for the weighted
+  sum that best separates the classes
+- calibration: Platt scaling of the weighted sum, p = sigmoid(a * s + b)
+- thresholds: the loosest cut-offs at which the AI bands keep the target
+  precisions (over a sliding window of rows) and the human bands the same
+  share of human texts
+and reports current vs fitted metrics on the held-out rows. The output is
+read by ENSEMBLE_CONFIG_PATH (backend and ai-detector-engine).
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.run import ENGINE_DIR
+
+DETECTORS = {
+    'advanced': ('perplexity', 'burstiness', 'entropy', 'transformer', 'stylometric'),
+    'engine': ('pattern', 'statistical', 'ml'),
+}
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eval_cache')
+
+
+# ============================================================================
+# Collect
+# ============================================================================
+
+def load_labeled_file(path: str) -> List[Dict]:
+    from app.ml.distill import GOLD_LABELS
+    from app.ml.training_data_collector import hash_content
+
+    examples = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            label = GOLD_LABELS.get(record.get('label'))
+            if label is not None and record.get('text'):
+                examples.append({'text': record['text'], 'hash': hash_content(record['text']), 'label': label})
+    return examples
+
+
+async def load_labeled(args) -> List[Dict]:
+    """Labeled texts from every requested source, deduplicated by content hash"""
+    from app.ml.distill import gather_texts
+
+    examples = load_labeled_file(args.data) if args.data else []
+    sources = (['collector'] if args.collector else []) + (['corpus'] if args.corpus else [])
+    if sources:
+        limits = {}
+        for item in args.corpus:
+            name, _, count = item.partition('=')
+            limits[name] = int(count or 10000)
+        try:
+            examples += [example for example in await gather_texts(sources, limits) if example['label'] is not None]
+        finally:
+            from app.ml.training_data_collector import training_collector
+            await training_collector.close()
+
+    unique = {example['hash']: example for example in examples}
+    return list(unique.values())
+
+
+class AdvancedScorers:
+    """AdvancedAIDetector's five scorers, without the ensemble on top"""
+
+    def __init__(self):
+        from app.detection.advanced_detector import advanced_detector
+        self.detector = advanced_detector
+
+    @property
+    def model(self) -> str:
+        # Loads the classifier if needed: before the first score, model_version is still None
+        return self.detector.classifier.version
+
+    async def score(self, examples: List[Dict]) -> List[Dict[str, Optional[float]]]:
+        from app.detection.prepared import PreparedText
+
+        results = await asyncio.gather(*(
+            self.detector._detect_uncached(PreparedText(example['text']), example['hash'])
+            for example in examples
+        ))
+        self.detector._cache.clear()
+        return [
+            {
+                'perplexity': result.perplexity_score,
+                'burstiness': result.burstiness_score,
+                'entropy': result.entropy_score,
+                'transformer': result.transformer_score,
+                'stylometric': result.stylometric_score
+            } if result.detailed_scores else None  # Too short to score
+            for result in results
+        ]
+
+
+class EngineScorers:
+    """ai-detector-engine EnsembleDetector's pattern, statistical and ML detectors"""
+
+    def __init__(self):
+        if ENGINE_DIR not in sys.path:
+            sys.path.insert(0, ENGINE_DIR)
+        from detector import EnsembleDetector
+        from config import settings as engine_settings
+        self.detector = EnsembleDetector()
+        self.settings = engine_settings
+
+    @property
+    def model(self) -> str:
+        return self.settings.MODEL_NAME if self.detector.ml_detector.loaded else 'no-ml'
+
+    async def score(self, examples: List[Dict]) -> List[Dict[str, Optional[float]]]:
+        return await asyncio.to_thread(self._score, [example['text'] for example in examples])
+
+    def _score(self, texts: List[str]) -> List[Dict[str, Optional[float]]]:
+        # Same validation as EnsembleDetector.detect; too-short texts stay None
+        valid = [i for i, text in enumerate(texts) if len(text.strip()) >= self.settings.MIN_TEXT_LENGTH]
+        truncated = [texts[i][:self.settings.MAX_TEXT_LENGTH] for i in valid]
+        statistical = self.detector.statistical_detector.detect_batch(truncated)
+        scores: List[Optional[Dict]] = [None] * len(texts)
+        for i, text, statistical_result in zip(valid, truncated, statistical):
+            ml_result = self.detector.ml_detector.detect(text)
+            scores[i] = {
+                'pattern': self.detector.pattern_detector.detect(text)['pattern_score'],
+                'statistical': statistical_result['statistical_score'],
+                'ml': ml_result['ml_score'] if ml_result.get('available') else None
+            }
+        return scores
+
+
+def cached_hashes(path: str, model: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {row['hash'] for row in map(json.loads, f) if row['model'] == model}
+
+
+async def collect(args) -> int:
+    examples = await load_labeled(args)
+    if not examples:
+        print("✗ No labeled texts (use --data, --collector or --corpus)")
+        return 1
+
+    scorers = AdvancedScorers() if args.detector == 'advanced' else EngineScorers()
+    path = os.path.join(args.cache_dir, f"{args.detector}.jsonl")
+    done = cached_hashes(path, scorers.model)
+    pending = [example for example in examples if example['hash'] not in done]
+    print(f"▶ {args.detector} ({scorers.model}): {len(examples)} labeled texts, "
+          f"{len(examples) - len(pending)} cached, {len(pending)} to score")
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    started = time.perf_counter()
+    skipped = 0
+    with open(path, 'a') as cache:
+        for start in range(0, len(pending), args.batch_size):
+            batch = pending[start:start + args.batch_size]
+            for example, scores in zip(batch, await scorers.score(batch)):
+                if scores is None:
+                    skipped += 1
+                    continue
+                cache.write(json.dumps({
+                    'hash': example['hash'],
+                    'model': scorers.model,
+                    'label': example['label'],
+                    'words': len(example['text'].split()),
+                    'scores': {name: None if value is None else round(float(value), 6) for name, value in scores.items()}
+                }) + '\n')
+            cache.flush()
+            done_count = start + len(batch)
+            print(f"  {done_count}/{len(pending)} scored ({time.perf_counter() - started:.0f}s)", end='\r')
+
+    print(f"\n✓ {len(pending) - skipped} texts cached in {path} ({skipped} too short to score)")
+    return 0
+
+
+# ============================================================================
+# Fit
+# ============================================================================
+
+def load_matrix(path: str, scorers: Tuple[str, ...], model: Optional[str]) -> Dict:
+    """Cached rows of one model as arrays: X (rows x scorers, NaN = missing), y, words, hashes"""
+    with open(path) as f:
+        rows = [json.loads(line) for line in f]
+    if not rows:
+        raise ValueError(f"{path} is empty")
+    model = model or rows[-1]['model']
+    rows = list({row['hash']: row for row in rows if row['model'] == model}.values())
+    return {
+        'model': model,
+        'X': np.array([[np.nan if row['scores'].get(name) is None else row['scores'][name] for name in scorers]
+                       for row in rows], dtype=np.float64),
+        'y': np.array([row['label'] for row in rows], dtype=np.float64),
+        'words': np.array([row['words'] for row in rows]),
+        'held_out': np.array([int(row['hash'][:8], 16) % 100 for row in rows])
+    }
+
+
+def simplex_grid(dimensions: int, step: float) -> np.ndarray:
+    """Every weight vector with entries in multiples of step that sums to 1"""
+    parts = int(round(1 / step))
+    grid = []
+    for bars in itertools.combinations(range(parts + dimensions - 1), dimensions - 1):
+        edges = (-1,) + bars + (parts + dimensions - 1,)
+        grid.append([edges[i + 1] - edges[i] - 1 for i in range(dimensions)])
+    return np.array(grid, dtype=np.float64) / parts
+
+
+def fit_weights(X: np.ndarray, y: np.ndarray, step: float, chunk: int = 4096) -> Tuple[np.ndarray, float]:
+    """
+    Weights on the simplex that best separate the classes: the largest
+    (mean AI - mean human) / pooled std of X @ w. Scale and offset are left to
+    calibration, so this ranks candidates the way AUC would, from two
+    covariance matrices instead of a pass over the rows per candidate.
+    """
+    grid = simplex_grid(X.shape[1], step)
+    ai, human = X[y == 1], X[y == 0]
+    mean_gap = ai.mean(axis=0) - human.mean(axis=0)
+    pooled = (np.atleast_2d(np.cov(ai, rowvar=False)) + np.atleast_2d(np.cov(human, rowvar=False))) / 2
+    best, best_separation = None, -np.inf
+    for start in range(0, len(grid), chunk):
+        candidates = grid[start:start + chunk]
+        spread = np.sqrt(np.maximum(np.einsum('ij,jk,ik->i', candidates, pooled, candidates), 1e-12))
+        separation = (candidates @ mean_gap) / spread
+        i = int(np.argmax(separation))
+        if separation[i] > best_separation:
+            best, best_separation = candidates[i], float(separation[i])
+    return best, best_separation
+
+
+def fit_platt(scores: np.ndarray, y: np.ndarray, iterations: int = 50) -> Dict[str, float]:
+    """Logistic regression of y on the combined score (Newton's method)"""
+    # Platt's smoothed targets keep a separable set from diverging
+    positives, negatives = y.sum(), len(y) - y.sum()
+    targets = np.where(y == 1, (positives + 1) / (positives + 2), 1 / (negatives + 2))
+    a, b = 1.0, 0.0
+    for _ in range(iterations):
+        p = 1 / (1 + np.exp(-(a * scores + b)))
+        weights = np.maximum(p * (1 - p), 1e-12)
+        gradient = np.array([np.dot(p - targets, scores), np.sum(p - targets)])
+        hessian = np.array([
+            [np.dot(weights, scores * scores), np.dot(weights, scores)],
+            [np.dot(weights, scores), weights.sum()]
+        ]) + np.eye(2) * 1e-9
+        delta = np.linalg.solve(hessian, gradient)
+        a, b = a - delta[0], b - delta[1]
+        if np.abs(delta).max() < 1e-8:
+            break
+    return {'a': round(float(a), 6), 'b': round(float(b), 6)}
+
+
+def calibrate(scores: np.ndarray, calibration: Optional[Dict]) -> np.ndarray:
+    if not calibration:
+        return scores
+    return 1 / (1 + np.exp(-(calibration['a'] * scores + calibration['b'])))
+
+
+def precision_cutoff(p: np.ndarray, y: np.ndarray, target: float, window: int) -> Optional[float]:
+    """
+    Lowest t such that, going down from the top score, every run of `window`
+    consecutive rows above t is at least `target` AI: the band's own
+    precision, not a cumulative one diluted by the confident rows above it
+    """
+    order = np.argsort(-p, kind='mergesort')
+    if len(order) < window:
+        return None
+    rolling = np.convolve(y[order], np.ones(window) / window, mode='valid')
+    below = np.nonzero(rolling < target)[0]
+    end = below[0] if len(below) else len(rolling)
+    if end == 0:
+        return None
+    return float(p[order][end - 1 + window // 2])
+
+
+def balanced_cutoff(p: np.ndarray, y: np.ndarray) -> float:
+    """Threshold with the best balanced accuracy"""
+    best, best_score = 0.5, -1.0
+    for t in np.unique(np.round(p, 3)):
+        predicted = p >= t
+        score = (predicted[y == 1].mean() + (~predicted[y == 0]).mean()) / 2
+        if score > best_score:
+            best, best_score = float(t), score
+    return best
+
+
+def fit_thresholds(p: np.ndarray, y: np.ndarray, precisions: Tuple[float, float], min_support: int,
+                   defaults: Dict[str, float]) -> Dict[str, float]:
+    """Band edges: AI / likely AI at the precision targets, human / likely human mirrored"""
+    strict, loose = precisions
+    decision = balanced_cutoff(p, y)
+    ai = precision_cutoff(p, y, strict, min_support)
+    likely_ai = precision_cutoff(p, y, loose, min_support)
+    # Mirrored: 1 - p ranks human-ness, and human labels are the hits
+    human = precision_cutoff(1 - p, 1 - y, strict, min_support)
+    likely_human = precision_cutoff(1 - p, 1 - y, loose, min_support)
+
+    likely_ai = max(likely_ai if likely_ai is not None else defaults['likely_ai'], decision)
+    ai = max(ai if ai is not None else defaults['ai'], likely_ai)
+    # A human cut-off of c on 1 - p is p <= 1 - c
+    likely_human = min(1 - likely_human if likely_human is not None else defaults['likely_human'], decision)
+    human = min(1 - human if human is not None else defaults['human'], likely_human)
+    return {
+        'human': round(human, 4), 'likely_human': round(likely_human, 4),
+        'likely_ai': round(likely_ai, 4), 'ai': round(ai, 4), 'decision': round(decision, 4)
+    }
+
+
+def metrics(p: np.ndarray, y: np.ndarray, thresholds: Dict[str, float]) -> Dict:
+    if not len(y):
+        return {'rows': 0}
+    ranks = np.empty(len(p))
+    ranks[np.argsort(p, kind='mergesort')] = np.arange(1, len(p) + 1)
+    positives, negatives = y.sum(), len(y) - y.sum()
+    auc = (ranks[y == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives) if positives and negatives else None
+    clipped = np.clip(p, 1e-6, 1 - 1e-6)
+    predicted = p >= 0.5
+    uncertain = (p > thresholds['likely_human']) & (p < thresholds['likely_ai'])
+    ai_band = p >= thresholds['ai']
+    return {
+        'rows': int(len(y)),
+        'auc': round(float(auc), 4) if auc is not None else None,
+        'brier': round(float(((p - y) ** 2).mean()), 4),
+        'log_loss': round(float(-(y * np.log(clipped) + (1 - y) * np.log(1 - clipped)).mean()), 4),
+        'accuracy': round(float((predicted == (y == 1)).mean()), 4),
+        'uncertain_share': round(float(uncertain.mean()), 4),
+        'ai_band_share': round(float(ai_band.mean()), 4),
+        'ai_band_precision': round(float(y[ai_band].mean()), 4) if ai_band.any() else None
+    }
+
+
+def advanced_current(args) -> Dict:
+    from app.ensemble_config import load_ensemble_config
+    return load_ensemble_config(args.current or "")
+
+
+def engine_current(args) -> Dict:
+    if ENGINE_DIR not in sys.path:
+        sys.path.insert(0, ENGINE_DIR)
+    from config import settings as engine_settings
+    current = {
+        'weights': {'pattern': engine_settings.PATTERN_WEIGHT, 'statistical': engine_settings.STATISTICAL_WEIGHT,
+                    'ml': engine_settings.ML_WEIGHT},
+        'fallback_weights': {'pattern': 0.55, 'statistical': 0.45},
+        'calibration': None,
+        'thresholds': {'human': engine_settings.LIKELY_HUMAN_THRESHOLD,
+                       'likely_human': engine_settings.MIXED_THRESHOLD,
+                       'likely_ai': engine_settings.LIKELY_AI_THRESHOLD,
+                       'ai': engine_settings.AI_THRESHOLD}
+    }
+    if args.current:
+        with open(args.current) as f:
+            loaded = json.load(f)
+        for key in ('weights', 'fallback_weights', 'thresholds'):
+            current[key].update(loaded.get(key, {}))
+        current['calibration'] = loaded.get('calibration') or None
+        if 'mixed' in loaded.get('thresholds', {}):
+            current['thresholds']['human'] = loaded['thresholds']['likely_human']
+            current['thresholds']['likely_human'] = loaded['thresholds']['mixed']
+    return current
+
+
+def advanced_groups(data: Dict) -> Dict[str, np.ndarray]:
+    """Row mask per weight set (length bucket)"""
+    from app.ensemble_config import length_bucket
+    buckets = np.array([length_bucket(words) for words in data['words']])
+    return {bucket: buckets == bucket for bucket in ('short', 'medium', 'long')}
+
+
+def engine_groups(data: Dict) -> Dict[str, np.ndarray]:
+    """Rows with an ML score use 'weights', the rest 'fallback_weights'"""
+    has_ml = ~np.isnan(data['X'][:, 2])
+    return {'weights': has_ml, 'fallback_weights': ~has_ml}
+
+
+def combine(data: Dict, weight_sets: Dict[str, Dict[str, float]], groups: Dict[str, np.ndarray],
+            scorers: Tuple[str, ...]) -> np.ndarray:
+    scores = np.zeros(len(data['y']))
+    for group, mask in groups.items():
+        weights = np.array([weight_sets[group].get(name, 0.0) for name in scorers])
+        scores[mask] = np.nan_to_num(data['X'][mask]) @ weights
+    return scores
+
+
+def tune(args) -> int:
+    scorers = DETECTORS[args.detector]
+    data = load_matrix(os.path.join(args.cache_dir, f"{args.detector}.jsonl"), scorers, args.model)
+    train = data['held_out'] >= args.holdout
+    test = ~train
+    y = data['y']
+    print(f"▶ {args.detector} ({data['model']}): {int(train.sum())} rows to fit, {int(test.sum())} held out")
+
+    started = time.perf_counter()
+    if args.detector == 'advanced':
+        current = advanced_current(args)
+        groups = advanced_groups(data)
+        weight_sets = {group: current['weights'][group] for group in groups}
+    else:
+        current = engine_current(args)
+        groups = engine_groups(data)
+        weight_sets = {'weights': current['weights'], 'fallback_weights': current['fallback_weights']}
+    current_sets = dict(weight_sets)
+
+    # Weights, one set per group; a group too small (or one-sided) to fit keeps its current weights
+    fitted_sets, fit_report = {}, {}
+    for group, mask in groups.items():
+        rows = mask & train
+        columns = [i for i, name in enumerate(scorers) if name in weight_sets[group]]
+        if rows.sum() < args.min_rows or len(np.unique(y[rows])) < 2:
+            fitted_sets[group] = weight_sets[group]
+            fit_report[group] = {'rows': int(rows.sum()), 'fitted': False}
+            continue
+        weights, separation = fit_weights(np.nan_to_num(data['X'][rows][:, columns]), y[rows], args.step)
+        fitted_sets[group] = {scorers[i]: round(float(w), 4) for i, w in zip(columns, weights)}
+        fit_report[group] = {'rows': int(rows.sum()), 'fitted': True, 'separation': round(separation, 4)}
+
+    raw = combine(data, fitted_sets, groups, scorers)
+    calibration = fit_platt(raw[train], y[train]) if not args.no_calibration else None
+    probabilities = calibrate(raw, calibration)
+    thresholds = fit_thresholds(probabilities[train], y[train], args.precision, args.min_support, current['thresholds'])
+    fit_seconds = time.perf_counter() - started
+
+    current_p = calibrate(combine(data, current_sets, groups, scorers), current['calibration'])
+    report = {
+        'model': data['model'],
+        'rows': {'fit': int(train.sum()), 'held_out': int(test.sum())},
+        'groups': fit_report,
+        'fit_seconds': round(fit_seconds, 3),
+        'held_out': {
+            'current': metrics(current_p[test], y[test], current['thresholds']),
+            'fitted': metrics(probabilities[test], y[test], thresholds)
+        }
+    }
+
+    config = {
+        'version': time.strftime('%Y%m%d_%H%M%S'),
+        'detector': args.detector,
+        'calibration': calibration,
+        'report': report
+    }
+    if args.detector == 'advanced':
+        config['weights'] = fitted_sets
+        config['thresholds'] = {key: thresholds[key] for key in ('human', 'likely_human', 'likely_ai', 'ai')}
+    else:
+        config['weights'] = fitted_sets['weights']
+        config['fallback_weights'] = fitted_sets['fallback_weights']
+        # The engine's bands: HUMAN < likely_human <= LIKELY_HUMAN < mixed <= MIXED < likely_ai ...
+        config['thresholds'] = {
+            'likely_human': thresholds['human'],
+            'mixed': thresholds['likely_human'],
+            'likely_ai': thresholds['likely_ai'],
+            'ai': thresholds['ai']
+        }
+
+    print(f"  fitted in {fit_seconds:.2f}s")
+    for name, result in report['held_out'].items():
+        print(f"  {name:<8} auc {result.get('auc')}  brier {result.get('brier')}  log loss {result.get('log_loss')}  "
+              f"accuracy {result.get('accuracy')}  uncertain {result.get('uncertain_share')}  "
+              f"AI-band precision {result.get('ai_band_precision')}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(config, f, indent=2)
+        print(f"\n✓ Config saved to {args.output} (point ENSEMBLE_CONFIG_PATH at it)")
+    else:
+        print(json.dumps(config, indent=2))
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cache scorer outputs and fit ensemble weights")
+    parser.add_argument('command', choices=['collect', 'tune'])
+    parser.add_argument('--detector', choices=sorted(DETECTORS), default='advanced')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    # collect
+    parser.add_argument('--data', default=None, help="JSON lines with 'text' and 'label'")
+    parser.add_argument('--collector', action='store_true', help="Include the training data collector's examples")
+    parser.add_argument('--corpus', nargs='*', default=[], metavar='SOURCE=COUNT',
+                        help="Public corpus examples per source, e.g. raid=5000 hc3=5000")
+    parser.add_argument('--batch-size', type=int, default=8)
+    # tune
+    parser.add_argument('--model', default=None, help="Fit on rows of this model (default: the latest cached)")
+    parser.add_argument('--current', default=None, help="Config to compare against (default: built-in values)")
+    parser.add_argument('--holdout', type=int, default=20, help="Percent of rows held out for the report")
+    parser.add_argument('--step', type=float, default=0.05, help="Weight grid resolution")
+    parser.add_argument('--precision', default="0.90,0.75", help="Target precision of the AI and likely-AI bands")
+    parser.add_argument('--min-support', type=int, default=50, help="Rows in the sliding window a band cut-off rests on")
+    parser.add_argument('--min-rows', type=int, default=50, help="Fewest rows to fit a weight set on")
+    parser.add_argument('--no-calibration', action='store_true')
+    parser.add_argument('--output', default=None, help="Write the fitted config here")
+    args = parser.parse_args(argv)
+    args.precision = tuple(float(p) for p in args.precision.split(','))
+
+    if args.command == 'collect':
+        return asyncio.run(collect(args))
+    return tune(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
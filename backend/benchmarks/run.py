@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+Benchmark Runner
+Replays the fixed corpus through AdvancedAIDetector, TextDetector, the
+ai-detector-engine EnsembleDetector and the /api/v1/detect endpoint, and
+reports per-stage p50/p95/p99, throughput per concurrency level and peak RSS
+(each target runs in its own subprocess, so its peak RSS is its own)
+
+Usage (from backend/):
+    DATABASE_URL=sqlite+aiosqlite:///./bench.db python -m benchmarks.run
+    python -m benchmarks.run --targets text,http --concurrency 1,8 --save benchmarks/baselines/local.json
+    python -m benchmarks.run --compare benchmarks/baselines/local.json
+
+Detector caches are cleared before every call so each run measures the
+uncached path. --compare exits non-zero if throughput, p95 latency or any
+stage p95 regressed by more than --tolerance against the baseline.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import resource
+import threading
+import subprocess
+from contextlib import AsyncExitStack
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import build_corpus, fingerprint
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENGINE_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'ai-detector-engine')
+
+ALL_TARGETS = ['advanced', 'text', 'ensemble', 'http']
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Linear-interpolated percentile of an unsorted list (p in 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100.0
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        'count': len(values),
+        'mean': round(sum(values) / len(values), 3) if values else 0.0,
+        'p50': round(percentile(values, 50), 3),
+        'p95': round(percentile(values, 95), 3),
+        'p99': round(percentile(values, 99), 3)
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (one target per process)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    if sys.platform == 'darwin':
+        return round(rss / (1024 * 1024), 1)
+    return round(rss / 1024, 1)
+
+
+# ============================================================================
+# Targets
+# ============================================================================
+
+class BenchmarkTarget:
+    """
+    One thing to benchmark. call() returns stage timings in milliseconds,
+    always including 'total'.
+    """
+
+    name = ""
+
+    async def setup(self):
+        pass
+
+    async def teardown(self):
+        pass
+
+    def set_concurrency(self, concurrency: int):
+        pass
+
+    async def call(self, text: str) -> Dict[str, float]:
+        raise NotImplementedError
+
+
+class AdvancedDetectorTarget(BenchmarkTarget):
+    name = "advanced"
+
+    async def setup(self):
+        from app.detection.advanced_detector import advanced_detector
+        from app.scheduler import scheduler
+        from app.tracing import tracer
+        self.detector = advanced_detector
+        self.scheduler = scheduler
+        self.tracer = tracer
+
+    async def call(self, text: str) -> Dict[str, float]:
+        from app.scheduler import INTERACTIVE
+
+        self.detector._cache.clear()
+        with self.tracer.start_trace("bench.advanced") as root:
+            with self.scheduler.priority(INTERACTIVE):
+                await self.detector.detect(text)
+        timings = root.trace.stage_timings()
+        timings['total'] = root.duration_ms
+        return timings
+
+
+class TextDetectorTarget(BenchmarkTarget):
+    name = "text"
+
+    async def setup(self):
+        from app.detection import text as text_module
+        from app.scheduler import scheduler
+        from app.tracing import tracer
+        self.text_module = text_module
+        self.scheduler = scheduler
+        self.tracer = tracer
+
+    async def call(self, text: str) -> Dict[str, float]:
+        from app.scheduler import INTERACTIVE
+
+        if self.text_module.ADVANCED_AVAILABLE:
+            self.text_module.advanced_detector._cache.clear()
+        with self.tracer.start_trace("bench.text") as root:
+            with self.scheduler.priority(INTERACTIVE):
+                await self.text_module.text_detector.detect(text)
+        timings = root.trace.stage_timings()
+        timings['total'] = root.duration_ms
+        return timings
+
+
+class EnsembleDetectorTarget(BenchmarkTarget):
+    """ai-detector-engine EnsembleDetector, run on a thread pool sized to the concurrency level"""
+
+    name = "ensemble"
+
+    async def setup(self):
+        if ENGINE_DIR not in sys.path:
+            sys.path.insert(0, ENGINE_DIR)
+        from detector import EnsembleDetector
+
+        self.detector = EnsembleDetector()
+        self._local = threading.local()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Time each sub-detector so the ensemble reports stages too
+        for stage in ('pattern_detector', 'statistical_detector', 'ml_detector'):
+            component = getattr(self.detector, stage)
+            component.detect = self._timed(stage.replace('_detector', ''), component.detect)
+
+    def _timed(self, stage: str, func):
+        def wrapper(text):
+            started = time.perf_counter()
+            try:
+                return func(text)
+            finally:
+                self._local.timings[stage] = (time.perf_counter() - started) * 1000
+        return wrapper
+
+    def set_concurrency(self, concurrency: int):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench-ensemble")
+
+    def _detect(self, text: str) -> Dict[str, float]:
+        self._local.timings = {}
+        started = time.perf_counter()
+        self.detector.detect(text)
+        timings = dict(self._local.timings)
+        timings['total'] = (time.perf_counter() - started) * 1000
+        return timings
+
+    async def call(self, text: str) -> Dict[str, float]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._detect, text)
+
+    async def teardown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+class HttpTarget(BenchmarkTarget):
+    """
+    POST /api/v1/detect, in-process through ASGITransport by default or
+    against a running server with --base-url. Stage timings come from the
+    Server-Timing response header.
+    """
+
+    name = "http"
+
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = base_url
+        self._stack = AsyncExitStack()
+
+    async def setup(self):
+        import httpx
+
+        self._advanced_cache = None
+        if self.base_url:
+            self.client = await self._stack.enter_async_context(
+                httpx.AsyncClient(base_url=self.base_url, timeout=60.0)
+            )
+            return
+
+        from app.main import app
+        from app.detection import text as text_module
+        if text_module.ADVANCED_AVAILABLE:
+            self._advanced_cache = text_module.advanced_detector._cache
+
+        await self._stack.enter_async_context(app.router.lifespan_context(app))
+        self.client = await self._stack.enter_async_context(
+            httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60.0)
+        )
+
+    async def teardown(self):
+        await self._stack.aclose()
+
+    async def call(self, text: str) -> Dict[str, float]:
+        if self._advanced_cache is not None:
+            self._advanced_cache.clear()
+
+        started = time.perf_counter()
+        response = await self.client.post(
+            "/api/v1/detect",
+            json={"content": text, "content_type": "text", "source_platform": "benchmark"}
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+        response.raise_for_status()
+
+        timings = {}
+        for entry in response.headers.get('server-timing', '').split(','):
+            name, _, params = entry.strip().partition(';')
+            if name and params.startswith('dur='):
+                timings[f"server.{name}"] = float(params[4:])
+        timings['total'] = elapsed
+        return timings
+
+
+def build_target(name: str, args) -> BenchmarkTarget:
+    if name == 'advanced':
+        return AdvancedDetectorTarget()
+    if name == 'text':
+        return TextDetectorTarget()
+    if name == 'ensemble':
+        return EnsembleDetectorTarget()
+    if name == 'http':
+        return HttpTarget(args.base_url)
+    raise ValueError(f"Unknown target: {name}")
+
+
+# ============================================================================
+# Runner
+# ============================================================================
+
+async def run_level(target: BenchmarkTarget, corpus: List[Dict], concurrency: int, iterations: int) -> Dict:
+    """Drive `iterations` calls through `concurrency` workers and aggregate"""
+    target.set_concurrency(concurrency)
+
+    totals: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    sizes: Dict[str, List[float]] = {}
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < iterations:
+            item = corpus[next_index % len(corpus)]
+            next_index += 1
+            try:
+                timings = await target.call(item['text'])
+            except Exception as e:
+                errors += 1
+                if errors == 1:
+                    print(f"  ⚠ {target.name} call failed: {e}")
+                continue
+
+            totals.append(timings.pop('total'))
+            sizes.setdefault(item['size'], []).append(totals[-1])
+            for stage, duration in timings.items():
+                stages.setdefault(stage, []).append(duration)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    return {
+        'requests': iterations,
+        'errors': errors,
+        'wall_s': round(wall, 3),
+        'throughput_rps': round(len(totals) / wall, 3) if wall > 0 else 0.0,
+        'latency_ms': summarize(totals),
+        'sizes': {size: summarize(values) for size, values in sorted(sizes.items())},
+        'stages': {stage: summarize(values) for stage, values in sorted(stages.items())}
+    }
+
+
+async def run_target(target: BenchmarkTarget, corpus: List[Dict], args) -> Optional[Dict]:
+    print(f"\n▶ {target.name}")
+    try:
+        await target.setup()
+    except Exception as e:
+        print(f"  ⚠ Skipped: {e}")
+        return None
+
+    try:
+        # Warm up model loading and lazy initialisation outside the measurements
+        target.set_concurrency(1)
+        for item in corpus[:args.warmup]:
+            try:
+                await target.call(item['text'])
+            except Exception as e:
+                print(f"  ⚠ Warmup call failed: {e}")
+
+        levels = {}
+        for concurrency in args.concurrency:
+            result = await run_level(target, corpus, concurrency, args.iterations)
+            levels[str(concurrency)] = result
+            latency = result['latency_ms']
+            print(
+                f"  c={concurrency:<3} {result['throughput_rps']:8.2f} req/s  "
+                f"p50 {latency['p50']:8.2f}ms  p95 {latency['p95']:8.2f}ms  "
+                f"p99 {latency['p99']:8.2f}ms  errors {result['errors']}"
+            )
+            for stage, summary in result['stages'].items():
+                print(f"        {stage:<28} p50 {summary['p50']:8.2f}  p95 {summary['p95']:8.2f}  p99 {summary['p99']:8.2f}")
+    finally:
+        await target.teardown()
+
+    rss = peak_rss_mb()
+    print(f"  peak RSS {rss:.1f} MB (target process)")
+    return {'levels': levels, 'peak_rss_mb': rss}
+
+
+def run_isolated(name: str, args) -> Optional[Dict]:
+    """
+    Run one target in a fresh interpreter and return its result: ru_maxrss
+    is a process-wide high-water mark, so targets sharing a process would
+    each report the largest model loaded before them
+    """
+    import tempfile
+
+    fd, result_path = tempfile.mkstemp(prefix=f"bench-{name}-", suffix=".json")
+    os.close(fd)
+    command = [
+        sys.executable, '-m', 'benchmarks.run',
+        '--targets', name,
+        '--concurrency', ",".join(str(c) for c in args.concurrency),
+        '--iterations', str(args.iterations),
+        '--warmup', str(args.warmup),
+        '--sizes', ",".join(sorted(args.sizes)),
+        '--seed', str(args.seed),
+        '--result-file', result_path
+    ]
+    if args.base_url:
+        command += ['--base-url', args.base_url]
+    try:
+        subprocess.run(command, cwd=BACKEND_DIR, check=False)
+        with open(result_path) as f:
+            return json.load(f).get(name)
+    except (OSError, ValueError) as e:
+        print(f"  ⚠ {name} produced no result: {e}")
+        return None
+    finally:
+        os.remove(result_path)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+# ============================================================================
+# Baselines
+# ============================================================================
+
+def compare(current: Dict, baseline: Dict, tolerance: float, min_ms: float) -> List[str]:
+    """
+    Return human-readable regressions of `current` against `baseline`
+    Stages faster than min_ms in the baseline are ignored as noise
+    """
+    regressions = []
+    for target, result in current['targets'].items():
+        base_target = baseline.get('targets', {}).get(target)
+        if not base_target:
+            continue
+
+        for level, stats in result['levels'].items():
+            base = base_target['levels'].get(level)
+            if not base:
+                continue
+
+            if stats['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+                regressions.append(
+                    f"{target} c={level}: throughput {stats['throughput_rps']:.2f} req/s "
+                    f"< baseline {base['throughput_rps']:.2f}"
+                )
+
+            if stats['latency_ms']['p95'] > base['latency_ms']['p95'] * (1 + tolerance):
+                regressions.append(
+                    f"{target} c={level}: p95 {stats['latency_ms']['p95']:.2f}ms "
+                    f"> baseline {base['latency_ms']['p95']:.2f}ms"
+                )
+
+            for stage, summary in stats['stages'].items():
+                base_stage = base['stages'].get(stage)
+                if not base_stage or base_stage['p95'] < min_ms:
+                    continue
+                if summary['p95'] > base_stage['p95'] * (1 + tolerance):
+                    regressions.append(
+                        f"{target} c={level}: stage {stage} p95 {summary['p95']:.2f}ms "
+                        f"> baseline {base_stage['p95']:.2f}ms"
+                    )
+
+        # Baselines from before targets ran in their own processes hold cumulative peaks
+        if not baseline.get('rss_per_target'):
+            continue
+        if result['peak_rss_mb'] > base_target['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(
+                f"{target}: peak RSS {result['peak_rss_mb']:.1f} MB > baseline {base_target['peak_rss_mb']:.1f} MB"
+            )
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Verifily detection benchmarks")
+    parser.add_argument('--targets', default=",".join(ALL_TARGETS),
+                        help=f"Comma separated targets ({', '.join(ALL_TARGETS)})")
+    parser.add_argument('--concurrency', default="1,4,16",
+                        help="Comma separated concurrency levels")
+    parser.add_argument('--iterations', type=int, default=100, help="Calls per concurrency level")
+    parser.add_argument('--warmup', type=int, default=3, help="Untimed calls before measuring")
+    parser.add_argument('--sizes', default="tweet,post,article", help="Corpus size classes to include")
+    parser.add_argument('--seed', type=int, default=1337, help="Corpus seed")
+    parser.add_argument('--base-url', default=None, help="Benchmark a running server instead of in-process")
+    parser.add_argument('--save', default=None, help="Write results as a JSON baseline")
+    parser.add_argument('--compare', default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument('--min-stage-ms', type=float, default=1.0, help="Ignore stages faster than this")
+    parser.add_argument('--result-file', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    args.targets = [t.strip() for t in args.targets.split(',') if t.strip()]
+    args.concurrency = [int(c) for c in args.concurrency.split(',')]
+    args.sizes = {s.strip() for s in args.sizes.split(',')}
+    return args
+
+
+async def main(argv=None) -> int:
+    args = parse_args(argv)
+    # One INFO line per request would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    corpus = [item for item in build_corpus(args.seed) if item['size'] in args.sizes]
+    corpus_id = fingerprint(corpus)
+
+    if args.result_file:
+        # Child of run_isolated: run the one target and hand its result back
+        targets = {}
+        for name in args.targets:
+            result = await run_target(build_target(name, args), corpus, args)
+            if result is not None:
+                targets[name] = result
+        with open(args.result_file, 'w') as f:
+            json.dump(targets, f)
+        return 0
+
+    print("=" * 80)
+    print("VERIFILY DETECTION BENCHMARK")
+    print("=" * 80)
+    print(f"Corpus: {len(corpus)} texts ({corpus_id}), concurrency {args.concurrency}, "
+          f"{args.iterations} calls per level")
+
+    results = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'corpus': {'seed': args.seed, 'sizes': sorted(args.sizes), 'fingerprint': corpus_id},
+        'iterations': args.iterations,
+        'rss_per_target': True,
+        'targets': {}
+    }
+
+    for name in args.targets:
+        result = run_isolated(name, args)
+        if result is not None:
+            results['targets'][name] = result
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Baseline saved to {args.save}")
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+
+    print("\n" + "=" * 80)
+    print(f"COMPARISON against {args.compare} ({baseline.get('git_commit')})")
+    print("=" * 80)
+    if baseline.get('corpus', {}).get('fingerprint') != corpus_id:
+        print("⚠ Corpus differs from the baseline - results are not comparable")
+        return 2
+
+    regressions = compare(results, baseline, args.tolerance, args.min_stage_ms)
+    if regressions:
+        for regression in regressions:
+            print(f"❌ {regression}")
+        return 1
+
+    print(f"✅ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Stylometry Engine Benchmark
+Accuracy and speed of the fast stylometry engine against the NLTK
+reference, per corpus size, to pick STYLOMETRY_ENGINE for a deployment
+
+Usage (from backend/):
+    python -m benchmarks.stylometry
+    python -m benchmarks.stylometry --texts samples.txt --iterations 5 --output stylometry.json
+    python -m benchmarks.stylometry --texts samples.txt --build-lexicon models/stylometry_lexicon.json
+
+Accuracy is measured as the scorer sees it: the JJ and RB ratios, whether
+each crosses its threshold (10% / 5%, the only thing that moves the score),
+per-token JJ/RB precision and recall, and sentence counts. Without NLTK
+installed only the fast engine's speed is reported.
+
+--build-lexicon tags the texts with NLTK and writes each word's majority
+tag (JJ, RB or -) as a lexicon for STYLOMETRY_LEXICON_PATH.
+"""
+
+import sys
+import json
+import time
+import argparse
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import build_corpus
+from benchmarks.run import percentile
+
+from app.detection.prepared import PreparedText
+from app.detection.stylometry import (
+    ADJECTIVE, ADVERB, OTHER, FastStylometry, NltkStylometry, TOKEN_PATTERN
+)
+
+# Thresholds used by AdvancedAIDetector._stylometric_analysis
+ADJECTIVE_THRESHOLD = 0.1
+ADVERB_THRESHOLD = 0.05
+
+
+def nltk_available() -> bool:
+    try:
+        import nltk
+        nltk.pos_tag(nltk.word_tokenize("A quick check."))
+        nltk.sent_tokenize("A quick check.")
+        return True
+    except (ImportError, LookupError):
+        return False
+
+
+def load_texts(path: Optional[str], seed: int) -> List[Dict]:
+    """The benchmark corpus, or one text per line (or JSON lines with 'text') from a file"""
+    if not path:
+        return build_corpus(seed)
+
+    texts = []
+    with open(path) as f:
+        for i, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            text = json.loads(line)['text'] if line.startswith('{') else line
+            size = 'tweet' if len(text) < 280 else 'post' if len(text) < 2000 else 'article'
+            texts.append({'id': f"file-{i}", 'size': size, 'text': text})
+    return texts
+
+
+def time_engine(engine, texts: List[Dict], iterations: int) -> Dict[str, Dict[str, float]]:
+    """Microseconds per text for sentences + POS ratios on a fresh PreparedText"""
+    by_size = defaultdict(list)
+    for _ in range(iterations):
+        for item in texts:
+            start = time.perf_counter()
+            prepared = PreparedText(item['text'])
+            engine.sentences(prepared)
+            engine.pos_ratios(prepared)
+            by_size[item['size']].append((time.perf_counter() - start) * 1e6)
+
+    return {
+        size: {
+            'p50_us': round(percentile(samples, 50), 1),
+            'p95_us': round(percentile(samples, 95), 1),
+            'mean_us': round(sum(samples) / len(samples), 1)
+        }
+        for size, samples in by_size.items()
+    }
+
+
+def compare_accuracy(reference: NltkStylometry, fast: FastStylometry, texts: List[Dict]) -> Dict:
+    by_size = defaultdict(lambda: defaultdict(list))
+    token_counts = Counter()  # (reference class, fast class) over texts with equal token counts
+    aligned_texts = 0
+
+    for item in texts:
+        stats = by_size[item['size']]
+        prepared = PreparedText(item['text'])
+
+        ref_sentences = reference.sentences(prepared)
+        fast_sentences = fast.sentences(prepared)
+        stats['sentence_count_match'].append(len(ref_sentences) == len(fast_sentences))
+        # The burstiness scorer skips texts with fewer than 3 sentences
+        stats['burstiness_gate_match'].append((len(ref_sentences) < 3) == (len(fast_sentences) < 3))
+
+        ref_ratios = reference.pos_ratios(prepared) or (0.0, 0.0)
+        fast_ratios = fast.pos_ratios(prepared) or (0.0, 0.0)
+        stats['adjective_abs_error'].append(abs(ref_ratios[0] - fast_ratios[0]))
+        stats['adverb_abs_error'].append(abs(ref_ratios[1] - fast_ratios[1]))
+        stats['adjective_threshold_match'].append(
+            (ref_ratios[0] > ADJECTIVE_THRESHOLD) == (fast_ratios[0] > ADJECTIVE_THRESHOLD)
+        )
+        stats['adverb_threshold_match'].append(
+            (ref_ratios[1] > ADVERB_THRESHOLD) == (fast_ratios[1] > ADVERB_THRESHOLD)
+        )
+
+        ref_tags = [_tag_class(tag) for _, tag in prepared.pos_tags]
+        fast_tags = fast.tag(item['text'])
+        if len(ref_tags) == len(fast_tags):
+            aligned_texts += 1
+            token_counts.update(zip(ref_tags, fast_tags))
+
+    report = {'sizes': {}, 'tokens': {}, 'aligned_texts': aligned_texts, 'texts': len(texts)}
+    for size, stats in by_size.items():
+        report['sizes'][size] = {
+            name: round(sum(values) / len(values), 4) for name, values in stats.items()
+        }
+    for tag in (ADJECTIVE, ADVERB):
+        true_positive = token_counts[(tag, tag)]
+        predicted = sum(count for (_, fast_tag), count in token_counts.items() if fast_tag == tag)
+        actual = sum(count for (ref_tag, _), count in token_counts.items() if ref_tag == tag)
+        report['tokens'][tag] = {
+            'precision': round(true_positive / predicted, 4) if predicted else None,
+            'recall': round(true_positive / actual, 4) if actual else None
+        }
+    return report
+
+
+def _tag_class(tag: str) -> str:
+    return tag if tag in (ADJECTIVE, ADVERB) else OTHER
+
+
+def build_lexicon(texts: List[Dict], path: str, min_count: int):
+    """Write each word's majority NLTK tag class, for words seen at least min_count times"""
+    import nltk
+
+    tag_counts: Dict[str, Counter] = defaultdict(Counter)
+    for item in texts:
+        tokens = TOKEN_PATTERN.findall(item['text'])
+        for word, tag in nltk.pos_tag(tokens):
+            tag_counts[word.lower()][_tag_class(tag)] += 1
+
+    lexicon = {
+        word: counts.most_common(1)[0][0]
+        for word, counts in tag_counts.items()
+        if sum(counts.values()) >= min_count
+    }
+    with open(path, 'w') as f:
+        json.dump(lexicon, f, sort_keys=True)
+    print(f"✓ Wrote {len(lexicon)} words to {path}")
+
+
+def print_report(report: Dict):
+    print("\nSpeed (µs per text, sentences + POS ratios):")
+    for engine, sizes in report['speed'].items():
+        for size, timing in sorted(sizes.items()):
+            print(f"  {engine:<6} {size:<8} p50 {timing['p50_us']:>9.1f}  p95 {timing['p95_us']:>9.1f}  "
+                  f"mean {timing['mean_us']:>9.1f}")
+
+    accuracy = report.get('accuracy')
+    if not accuracy:
+        print("\nAccuracy: skipped (NLTK with punkt and the perceptron tagger is not installed)")
+        return
+
+    print("\nAccuracy vs NLTK (share of texts agreeing, mean absolute ratio error):")
+    for size, stats in sorted(accuracy['sizes'].items()):
+        print(f"  {size:<8} JJ threshold {stats['adjective_threshold_match']:.1%}  "
+              f"RB threshold {stats['adverb_threshold_match']:.1%}  "
+              f"JJ err {stats['adjective_abs_error']:.4f}  RB err {stats['adverb_abs_error']:.4f}  "
+              f"sentences {stats['sentence_count_match']:.1%}  burstiness gate {stats['burstiness_gate_match']:.1%}")
+    print(f"  per-token ({accuracy['aligned_texts']}/{accuracy['texts']} texts with equal token counts):")
+    for tag, scores in accuracy['tokens'].items():
+        print(f"    {tag}: precision {scores['precision']}  recall {scores['recall']}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fast vs NLTK stylometry engine benchmark")
+    parser.add_argument('--texts', default=None, help="One text per line, or JSON lines with a 'text' field")
+    parser.add_argument('--seed', type=int, default=1337)
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--regex-max-chars', type=int, default=1000)
+    parser.add_argument('--lexicon', default="", help="Compiled lexicon for the fast engine")
+    parser.add_argument('--build-lexicon', default=None, metavar='PATH')
+    parser.add_argument('--min-count', type=int, default=2, help="Minimum occurrences for a lexicon entry")
+    parser.add_argument('--output', default=None, help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    texts = load_texts(args.texts, args.seed)
+    has_nltk = nltk_available()
+
+    if args.build_lexicon:
+        if not has_nltk:
+            print("✗ --build-lexicon needs NLTK and its tagger data")
+            return 1
+        build_lexicon(texts, args.build_lexicon, args.min_count)
+        return 0
+
+    print("=" * 80)
+    print(f"STYLOMETRY ENGINES ({len(texts)} texts)")
+    print("=" * 80)
+
+    reference = NltkStylometry()
+    fast = FastStylometry(regex_max_chars=args.regex_max_chars, lexicon_path=args.lexicon)
+
+    report = {'speed': {'fast': time_engine(fast, texts, args.iterations)}}
+    if has_nltk:
+        report['speed']['nltk'] = time_engine(reference, texts, args.iterations)
+        report['accuracy'] = compare_accuracy(reference, fast, texts)
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+"""
+Load testing
+Offline stand-ins for the external detector APIs plus an open-loop load
+generator for the backend (see loadtest/generate.py)
+"""
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Fake Detection Providers
+Local stand-in for ZeroGPT, GPTZero, the Hugging Face Inference API and the
+ai-model-server, returning the same response shapes the backend parses
+
+Each provider has a configurable latency distribution and error, timeout
+and malformed-response rates, so fallback paths can be exercised without
+touching the real APIs. Scores are derived from a hash of the text, so the
+same input always gets the same verdict.
+
+Usage:
+    python -m loadtest.fake_providers --port 9100 \\
+        --latency zerogpt=lognormal:150,0.5 --error-rate zerogpt=0.05 \\
+        --timeout-rate gptzero=0.01
+
+Then point the backend at it:
+    ZEROGPT_API_KEY=fake ZEROGPT_API_URL=http://127.0.0.1:9100/api/detect/detectText
+    GPTZERO_API_KEY=fake GPTZERO_API_URL=http://127.0.0.1:9100/v2/predict/text
+    HUGGINGFACE_API_URL=http://127.0.0.1:9100/models
+    AI_MODEL_SERVER_URL=http://127.0.0.1:9100
+
+Provider settings can be changed while running with
+POST /_config/{provider} and inspected with GET /_stats.
+"""
+
+import math
+import random
+import asyncio
+import hashlib
+import argparse
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+PROVIDERS = ['zerogpt', 'gptzero', 'huggingface', 'model_server']
+
+# Long enough to trip every client timeout the backend uses
+TIMEOUT_SLEEP_SECONDS = 60.0
+
+
+class LatencyDistribution:
+    """
+    Parsed latency spec, in milliseconds:
+        fixed:120 | uniform:50,200 | normal:120,30 | lognormal:120,0.5
+    lognormal takes the median and sigma of the underlying normal.
+    """
+
+    def __init__(self, spec: str):
+        kind, _, params = spec.partition(':')
+        values = [float(v) for v in params.split(',')] if params else []
+        expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+        if kind not in expected or len(values) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+
+    def sample(self, rng: random.Random) -> float:
+        """Latency in seconds"""
+        if self.kind == 'fixed':
+            ms = self.values[0]
+        elif self.kind == 'uniform':
+            ms = rng.uniform(*self.values)
+        elif self.kind == 'normal':
+            ms = rng.gauss(*self.values)
+        else:
+            median, sigma = self.values
+            ms = rng.lognormvariate(math.log(median), sigma)
+        return max(ms, 0.0) / 1000.0
+
+
+@dataclass
+class ProviderConfig:
+    latency: str = "lognormal:120,0.4"
+    error_rate: float = 0.0
+    error_status: int = 500
+    timeout_rate: float = 0.0
+    malformed_rate: float = 0.0
+
+
+@dataclass
+class ProviderStats:
+    requests: int = 0
+    ok: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    malformed: int = 0
+
+
+class FakeProvider:
+    def __init__(self, name: str, config: ProviderConfig, rng: random.Random):
+        self.name = name
+        self.rng = rng
+        self.stats = ProviderStats()
+        self.configure(config)
+
+    def configure(self, config: ProviderConfig):
+        self._latency = LatencyDistribution(config.latency)
+        self.config = config
+
+    async def respond(self, text: str, build_body) -> JSONResponse:
+        """Sleep for a sampled latency, then return an error, a bad body or build_body(score)"""
+        self.stats.requests += 1
+        roll = self.rng.random()
+
+        if roll < self.config.timeout_rate:
+            self.stats.timeouts += 1
+            await asyncio.sleep(TIMEOUT_SLEEP_SECONDS)
+            return JSONResponse({'error': 'timeout'}, status_code=504)
+
+        await asyncio.sleep(self._latency.sample(self.rng))
+        roll -= self.config.timeout_rate
+
+        if roll < self.config.error_rate:
+            self.stats.errors += 1
+            return JSONResponse({'error': 'simulated failure'}, status_code=self.config.error_status)
+        roll -= self.config.error_rate
+
+        if roll < self.config.malformed_rate:
+            self.stats.malformed += 1
+            return JSONResponse({'success': False, 'message': 'simulated malformed response'})
+
+        self.stats.ok += 1
+        return JSONResponse(build_body(text_score(text)))
+
+
+def text_score(text: str) -> float:
+    """Deterministic pseudo AI-probability in [0, 1] for a text"""
+    digest = hashlib.sha256(text.encode()).digest()
+    return int.from_bytes(digest[:4], 'big') / 0xFFFFFFFF
+
+
+async def _model_server_body(request: Request) -> Dict:
+    """The model server accepts msgpack bodies too (responses here are always JSON)"""
+    if request.headers.get('content-type', '').startswith('application/msgpack'):
+        import msgpack
+        return msgpack.unpackb(await request.body(), raw=False)
+    return await request.json()
+
+
+def create_app(configs: Optional[Dict[str, ProviderConfig]] = None, seed: int = 0) -> FastAPI:
+    rng = random.Random(seed)
+    configs = configs or {}
+    providers = {name: FakeProvider(name, configs.get(name, ProviderConfig()), rng) for name in PROVIDERS}
+
+    app = FastAPI(title="Fake Detection Providers")
+
+    @app.post("/api/detect/detectText")
+    async def zerogpt(request: Request):
+        body = await request.json()
+        return await providers['zerogpt'].respond(
+            body.get('input_text', ''),
+            lambda score: {
+                'success': True,
+                'data': {'fakePercentage': round(score * 100, 2), 'isHuman': round((1 - score) * 100, 2)}
+            }
+        )
+
+    @app.post("/v2/predict/text")
+    async def gptzero(request: Request):
+        body = await request.json()
+        return await providers['gptzero'].respond(
+            body.get('document', ''),
+            lambda score: {
+                'documents': [{
+                    'completely_generated_prob': round(score, 4),
+                    'average_generated_prob': round(score * 0.9, 4)
+                }]
+            }
+        )
+
+    @app.post("/models/{model:path}")
+    async def huggingface(model: str, request: Request):
+        body = await request.json()
+        return await providers['huggingface'].respond(
+            body.get('inputs', ''),
+            lambda score: [[
+                {'label': 'Fake', 'score': round(score, 4)},
+                {'label': 'Real', 'score': round(1 - score, 4)}
+            ]]
+        )
+
+    @app.post("/detect")
+    async def model_server(request: Request):
+        body = await _model_server_body(request)
+        return await providers['model_server'].respond(
+            body.get('text', ''),
+            lambda score: {'ai_probability': round(score, 4), 'model_name': 'fake-provider'}
+        )
+
+    @app.post("/detect/batch")
+    async def model_server_batch(request: Request):
+        body = await _model_server_body(request)
+        texts = body.get('texts', [])
+        return await providers['model_server'].respond(
+            '\n'.join(texts),
+            lambda _: {
+                'results': [
+                    {'ai_probability': round(text_score(text), 4), 'model_name': 'fake-provider'}
+                    for text in texts
+                ],
+                'model_name': 'fake-provider'
+            }
+        )
+
+    @app.get("/_stats")
+    async def stats():
+        return {
+            name: {'config': asdict(provider.config), 'stats': asdict(provider.stats)}
+            for name, provider in providers.items()
+        }
+
+    @app.post("/_config/{name}")
+    async def configure(name: str, request: Request):
+        """Update a provider's settings mid-run (fields not given are kept)"""
+        if name not in providers:
+            raise HTTPException(404, f"Unknown provider: {name}")
+        provider = providers[name]
+        updated = {**asdict(provider.config), **(await request.json())}
+        try:
+            provider.configure(ProviderConfig(**updated))
+        except (TypeError, ValueError) as e:
+            raise HTTPException(400, str(e))
+        return asdict(provider.config)
+
+    @app.post("/_reset")
+    async def reset():
+        for provider in providers.values():
+            provider.stats = ProviderStats()
+        return {'status': 'reset'}
+
+    return app
+
+
+def _parse_overrides(values, cast) -> Dict[str, object]:
+    """Parse repeated provider=value flags; provider 'all' applies to every provider"""
+    parsed = {}
+    for value in values or []:
+        name, _, raw = value.partition('=')
+        targets = PROVIDERS if name == 'all' else [name]
+        for target in targets:
+            if target not in PROVIDERS:
+                raise SystemExit(f"Unknown provider {target!r} (choose from {', '.join(PROVIDERS)})")
+            parsed[target] = cast(raw)
+    return parsed
+
+
+def parse_configs(args) -> Dict[str, ProviderConfig]:
+    configs = {name: ProviderConfig() for name in PROVIDERS}
+    for attr, values, cast in (
+        ('latency', args.latency, str),
+        ('error_rate', args.error_rate, float),
+        ('error_status', args.error_status, int),
+        ('timeout_rate', args.timeout_rate, float),
+        ('malformed_rate', args.malformed_rate, float),
+    ):
+        for name, value in _parse_overrides(values, cast).items():
+            setattr(configs[name], attr, value)
+    for config in configs.values():
+        LatencyDistribution(config.latency)  # Validate early
+    return configs
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Fake external detection providers")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', action='append', metavar='PROVIDER=SPEC',
+                        help="e.g. zerogpt=lognormal:150,0.5 or all=fixed:50")
+    parser.add_argument('--error-rate', action='append', metavar='PROVIDER=RATE')
+    parser.add_argument('--error-status', action='append', metavar='PROVIDER=CODE')
+    parser.add_argument('--timeout-rate', action='append', metavar='PROVIDER=RATE')
+    parser.add_argument('--malformed-rate', action='append', metavar='PROVIDER=RATE')
+    return parser
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = build_parser().parse_args()
+    uvicorn.run(create_app(parse_configs(args), args.seed), host=args.host, port=args.port, log_level="warning")
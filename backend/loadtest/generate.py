@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Load Generator
+Drives POST /api/v1/detect at fixed target rates (open loop) and reports
+tail latency, status codes and how provider calls fell back
+
+Usage (from backend/):
+    # Everything offline: spawns the fake providers and a backend on SQLite
+    python -m loadtest.generate --spawn --rps 5,20,50 --duration 30 \\
+        --provider-args "--latency zerogpt=lognormal:150,0.5 --error-rate zerogpt=0.1"
+
+    # Against an already running backend (and optionally its fake providers)
+    python -m loadtest.generate --base-url http://127.0.0.1:8000 \\
+        --providers-url http://127.0.0.1:9100 --rps 10 --duration 60
+
+Latency is measured from each request's scheduled send time, so queueing in
+the generator itself (coordinated omission) shows up in the tail rather than
+being hidden. Provider fallback is read from the backend's /metrics
+(verifily_provider_requests_total) before and after each step.
+
+Note: when the advanced detector is installed the backend answers from its
+local models and never calls the external providers.
+"""
+
+import os
+import sys
+import json
+import time
+import shlex
+import random
+import asyncio
+import argparse
+import subprocess
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.corpus import build_corpus
+from benchmarks.run import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROVIDER_METRIC = "verifily_provider_requests_total"
+
+
+def parse_provider_counts(metrics_text: str) -> Dict[str, Dict[str, float]]:
+    """Extract {provider: {outcome: count}} from a Prometheus exposition"""
+    counts: Dict[str, Dict[str, float]] = {}
+    for line in metrics_text.splitlines():
+        if not line.startswith(PROVIDER_METRIC + "{"):
+            continue
+        labels_part, _, value = line.rpartition(' ')
+        labels = dict(
+            pair.split('=', 1) for pair in labels_part[len(PROVIDER_METRIC) + 1:-1].split(',')
+        )
+        provider = labels.get('provider', '').strip('"')
+        outcome = labels.get('outcome', '').strip('"')
+        counts.setdefault(provider, {})[outcome] = float(value)
+    return counts
+
+
+def diff_counts(after: Dict, before: Dict) -> Dict[str, Dict[str, int]]:
+    delta = {}
+    for provider, outcomes in after.items():
+        for outcome, value in outcomes.items():
+            change = int(value - before.get(provider, {}).get(outcome, 0))
+            if change:
+                delta.setdefault(provider, {})[outcome] = change
+    return delta
+
+
+async def fetch_provider_counts(client: httpx.AsyncClient) -> Dict:
+    try:
+        response = await client.get("/metrics")
+        return parse_provider_counts(response.text)
+    except httpx.HTTPError:
+        return {}
+
+
+async def fetch_fake_stats(providers_url: Optional[str]) -> Dict:
+    if not providers_url:
+        return {}
+    async with httpx.AsyncClient(base_url=providers_url, timeout=5.0) as client:
+        response = await client.get("/_stats")
+        return {name: entry['stats'] for name, entry in response.json().items()}
+
+
+async def run_step(client: httpx.AsyncClient, corpus: List[Dict], rps: float, args, rng: random.Random) -> Dict:
+    """Send requests at `rps` for args.duration seconds without waiting for responses"""
+    loop = asyncio.get_running_loop()
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    in_flight = 0
+    dropped = 0
+    tasks = []
+
+    async def send(text: str, scheduled_at: float):
+        nonlocal in_flight
+        in_flight += 1
+        try:
+            response = await client.post(
+                args.endpoint,
+                json={"content": text, "content_type": "text", "source_platform": "loadtest"}
+            )
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = f"error:{type(e).__name__}"
+        finally:
+            in_flight -= 1
+
+        statuses[status] = statuses.get(status, 0) + 1
+        if status == "200":
+            latencies.append((loop.time() - scheduled_at) * 1000)
+
+    start = loop.time()
+    next_at = start
+    sent = 0
+    while True:
+        next_at += rng.expovariate(rps) if args.arrival == 'poisson' else 1.0 / rps
+        if next_at - start >= args.duration:
+            break
+        await asyncio.sleep(max(0.0, next_at - loop.time()))
+
+        if in_flight >= args.max_in_flight:
+            dropped += 1
+            continue
+        tasks.append(asyncio.create_task(send(corpus[sent % len(corpus)]['text'], next_at)))
+        sent += 1
+
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+
+    return {
+        'target_rps': rps,
+        'sent': sent,
+        'dropped': dropped,
+        'completed': len(latencies),
+        'achieved_rps': round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        'statuses': statuses,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 2),
+            'p90': round(percentile(latencies, 90), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'p999': round(percentile(latencies, 99.9), 2),
+            'max': round(max(latencies), 2) if latencies else 0.0
+        }
+    }
+
+
+def print_step(step: Dict):
+    latency = step['latency_ms']
+    print(f"\n▶ target {step['target_rps']:g} req/s → achieved {step['achieved_rps']:g} req/s "
+          f"({step['completed']}/{step['sent']} ok, {step['dropped']} dropped at the generator)")
+    print(f"  latency ms  p50 {latency['p50']:.1f}  p90 {latency['p90']:.1f}  p95 {latency['p95']:.1f}  "
+          f"p99 {latency['p99']:.1f}  p99.9 {latency['p999']:.1f}  max {latency['max']:.1f}")
+    print(f"  statuses    {step['statuses']}")
+
+    providers = step.get('provider_outcomes') or {}
+    if providers:
+        print("  provider calls (backend /metrics):")
+        for provider, outcomes in sorted(providers.items()):
+            print(f"    {provider:<16} {outcomes}")
+        answered = sum(outcomes.get('ok', 0) for outcomes in providers.values())
+        print(f"  answered by a provider: {answered}, pattern-only fallback: ~{max(step['completed'] - answered, 0)}")
+    for provider, stats in sorted((step.get('fake_provider_stats') or {}).items()):
+        if stats.get('requests'):
+            print(f"    fake {provider:<11} {stats}")
+
+
+# ============================================================================
+# Spawned environment
+# ============================================================================
+
+class SpawnedStack:
+    """Fake providers plus a uvicorn backend wired to them, as subprocesses"""
+
+    def __init__(self, args):
+        self.args = args
+        self.processes: List[subprocess.Popen] = []
+
+    async def __aenter__(self):
+        args = self.args
+        providers_url = f"http://127.0.0.1:{args.provider_port}"
+        self.processes.append(subprocess.Popen(
+            [sys.executable, '-m', 'loadtest.fake_providers', '--port', str(args.provider_port)]
+            + shlex.split(args.provider_args),
+            cwd=BACKEND_DIR
+        ))
+        await wait_until_ready(f"{providers_url}/_stats")
+
+        env = dict(os.environ)
+        env.setdefault('DATABASE_URL', args.database_url)
+        env.update({
+            'ZEROGPT_API_KEY': env.get('ZEROGPT_API_KEY') or 'loadtest',
+            'GPTZERO_API_KEY': env.get('GPTZERO_API_KEY') or 'loadtest',
+            'ZEROGPT_API_URL': f"{providers_url}/api/detect/detectText",
+            'GPTZERO_API_URL': f"{providers_url}/v2/predict/text",
+            'HUGGINGFACE_API_URL': f"{providers_url}/models",
+            'AI_MODEL_SERVER_URL': providers_url,
+        })
+        self.processes.append(subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'app.main:app',
+             '--port', str(args.backend_port), '--log-level', 'warning'],
+            cwd=BACKEND_DIR, env=env
+        ))
+        await wait_until_ready(f"http://127.0.0.1:{args.backend_port}/health", timeout=120.0)
+
+        args.base_url = f"http://127.0.0.1:{args.backend_port}"
+        args.providers_url = providers_url
+        return self
+
+    async def __aexit__(self, *exc):
+        for process in reversed(self.processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+async def wait_until_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} did not become ready within {timeout:.0f}s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Open-loop load generator for /api/v1/detect")
+    parser.add_argument('--base-url', default="http://127.0.0.1:8000")
+    parser.add_argument('--providers-url', default=None, help="Fake provider server, for its /_stats")
+    parser.add_argument('--endpoint', default="/api/v1/detect")
+    parser.add_argument('--rps', default="10", help="Comma separated target rates, run in order")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds per rate step")
+    parser.add_argument('--arrival', choices=['poisson', 'constant'], default='poisson')
+    parser.add_argument('--max-in-flight', type=int, default=512,
+                        help="Requests beyond this many outstanding are dropped and counted")
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=1337)
+    parser.add_argument('--output', default=None, help="Write the report as JSON")
+
+    spawn = parser.add_argument_group("spawned stack")
+    spawn.add_argument('--spawn', action='store_true', help="Start fake providers and a backend locally")
+    spawn.add_argument('--provider-port', type=int, default=9100)
+    spawn.add_argument('--backend-port', type=int, default=8000)
+    spawn.add_argument('--provider-args', default="", help="Extra flags for loadtest.fake_providers")
+    spawn.add_argument('--database-url', default="sqlite+aiosqlite:///./loadtest.db",
+                       help="Used when DATABASE_URL is not already set")
+
+    args = parser.parse_args(argv)
+    args.rps = [float(r) for r in args.rps.split(',')]
+    return args
+
+
+async def drive(args) -> Dict:
+    rng = random.Random(args.seed)
+    corpus = build_corpus(args.seed)
+    rng.shuffle(corpus)
+
+    report = {
+        'base_url': args.base_url,
+        'endpoint': args.endpoint,
+        'duration_s': args.duration,
+        'arrival': args.arrival,
+        'steps': []
+    }
+
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        for rps in args.rps:
+            metrics_before = await fetch_provider_counts(client)
+            fake_before = await fetch_fake_stats(args.providers_url)
+
+            step = await run_step(client, corpus, rps, args, rng)
+
+            step['provider_outcomes'] = diff_counts(await fetch_provider_counts(client), metrics_before)
+            fake_after = await fetch_fake_stats(args.providers_url)
+            step['fake_provider_stats'] = {
+                name: {key: value - fake_before.get(name, {}).get(key, 0) for key, value in stats.items()}
+                for name, stats in fake_after.items()
+            }
+            report['steps'].append(step)
+            print_step(step)
+    return report
+
+
+async def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    print("=" * 80)
+    print("VERIFILY LOAD TEST")
+    print("=" * 80)
+
+    if args.spawn:
+        async with SpawnedStack(args):
+            report = await drive(args)
+    else:
+        report = await drive(args)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
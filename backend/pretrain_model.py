@@ -5,11 +5,11 @@ Uses RAID + HC3 datasets for robust multi-model detection
 Run this ONCE to bootstrap the model before collecting user verifications
 """
 
-import asyncio
+import random
 import argparse
 import torch
 from pathlib import Path
-from datasets import load_dataset, concatenate_datasets
+from collections import Counter
 from transformers import (
     RobertaTokenizer,
     RobertaForSequenceClassification,
@@ -22,6 +22,9 @@ from sklearn.metrics import accuracy_score, precision_recall_fscore_support
 import numpy as np
 from datetime import datetime
 
+from app.ml.tokenized_cache import tokenized_cache
+from app.ml.corpus import public_corpus
+
 
 class PublicDatasetTrainer:
     """
@@ -36,222 +39,58 @@ class PublicDatasetTrainer:
         self.label2id = {'human': 0, 'ai': 1}
         self.id2label = {v: k for k, v in self.label2id.items()}
 
-    def load_raid_dataset(self, max_samples: int = 100000):
-        """
-        Load RAID dataset - the gold standard for adversarial AI detection
-        10M+ documents with adversarial attacks
-        """
-        print("[RAID] Loading dataset...")
-        try:
-            # Load RAID from Hugging Face - use non-streaming for reliability
-            print("[RAID] Downloading dataset (this may take a few minutes)...")
-            raid = load_dataset("liamdugan/raid", split=f"train[:{max_samples}]")
-
-            samples = []
-            for i, example in enumerate(raid):
-                # RAID format: {generation, model, domain, attack}
-                # model: 'human' = human (0), anything else = AI (1)
-                text = example.get('generation', '')
-                model = example.get('model', 'unknown')
-
-                # Convert model to binary label
-                label = 0 if model == 'human' else 1
-
-                if text and len(text) > 50:  # Filter short texts
-                    samples.append({
-                        'text': text,
-                        'label': label,
-                        'source': 'raid'
-                    })
-
-                if (i + 1) % 10000 == 0:
-                    print(f"[RAID] Processed {i + 1} samples, collected {len(samples)}...")
-
-            print(f"[RAID] Total samples collected: {len(samples)}")
-            print(f"[RAID]   Human: {sum(1 for s in samples if s['label'] == 0)}")
-            print(f"[RAID]   AI: {sum(1 for s in samples if s['label'] == 1)}")
-            return samples
-
-        except Exception as e:
-            print(f"[RAID] Error loading: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
-
-    def load_hc3_dataset(self, max_samples: int = 50000):
-        """
-        Load HC3 dataset - Human vs ChatGPT comparisons
-        """
-        print("[HC3] Loading dataset...")
-        try:
-            # HC3 has deprecated - try alternative dataset or skip
-            print("[HC3] Attempting to load with trust_remote_code...")
-            try:
-                hc3 = load_dataset("Hello-SimpleAI/HC3", split="train", trust_remote_code=True)
-            except:
-                print("[HC3] Main dataset failed, trying alternative: 'all' subset...")
-                hc3 = load_dataset("Hello-SimpleAI/HC3", "all", split="train")
-
-            samples = []
-            processed = 0
-            for i, example in enumerate(hc3):
-                if processed >= max_samples:
-                    break
-
-                # HC3 format: {question, human_answers, chatgpt_answers}
-                question = example.get('question', '')
-
-                # Add human answers (label=0)
-                human_answers = example.get('human_answers', [])
-                for answer in human_answers[:2]:  # Max 2 per question
-                    text = f"{question} {answer}"
-                    if len(text) > 50:
-                        samples.append({
-                            'text': text,
-                            'label': 0,
-                            'source': 'hc3_human'
-                        })
-                        processed += 1
-
-                # Add ChatGPT answers (label=1)
-                chatgpt_answers = example.get('chatgpt_answers', [])
-                for answer in chatgpt_answers[:2]:  # Max 2 per question
-                    text = f"{question} {answer}"
-                    if len(text) > 50:
-                        samples.append({
-                            'text': text,
-                            'label': 1,
-                            'source': 'hc3_chatgpt'
-                        })
-                        processed += 1
-
-                if (i + 1) % 5000 == 0:
-                    print(f"[HC3] Processed {i + 1} examples, collected {len(samples)}...")
-
-            print(f"[HC3] Total samples collected: {len(samples)}")
-            print(f"[HC3]   Human: {sum(1 for s in samples if s['label'] == 0)}")
-            print(f"[HC3]   AI: {sum(1 for s in samples if s['label'] == 1)}")
-            return samples
-
-        except Exception as e:
-            print(f"[HC3] Error loading: {e}")
-            print("[HC3] Skipping HC3 dataset - will use RAID and AI-Pile only")
-            import traceback
-            traceback.print_exc()
-            return []
-
-    def load_ai_detection_pile(self, max_samples: int = 50000):
-        """
-        Load AI Text Detection Pile - GPT2/3/ChatGPT/GPTJ
-        """
-        print("[AI-Pile] Loading dataset...")
-        try:
-            print("[AI-Pile] Downloading dataset (this may take a few minutes)...")
-            pile = load_dataset("artem9k/ai-text-detection-pile", split=f"train[:{max_samples}]")
-
-            samples = []
-            for i, example in enumerate(pile):
-                text = example.get('text', '')
-
-                # Check multiple possible label field names
-                label_value = example.get('label', example.get('source', ''))
-
-                # Map to binary: 0=human, 1=AI
-                if isinstance(label_value, int):
-                    label = label_value
-                elif isinstance(label_value, str):
-                    # Common label strings
-                    label = 1 if label_value.lower() in ['generated', 'ai', 'machine', 'gpt', 'chatgpt', '1'] else 0
-                else:
-                    # Default: if source field contains model names, it's AI
-                    source_str = str(example.get('source', '')).lower()
-                    label = 1 if any(model in source_str for model in ['gpt', 'chatgpt', 'ai', 'generated']) else 0
-
-                if text and len(text) > 50:
-                    samples.append({
-                        'text': text,
-                        'label': label,
-                        'source': 'ai_pile'
-                    })
-
-                if (i + 1) % 10000 == 0:
-                    print(f"[AI-Pile] Processed {i + 1} samples, collected {len(samples)}...")
-
-            print(f"[AI-Pile] Total samples collected: {len(samples)}")
-            print(f"[AI-Pile]   Human: {sum(1 for s in samples if s['label'] == 0)}")
-            print(f"[AI-Pile]   AI: {sum(1 for s in samples if s['label'] == 1)}")
-            return samples
-
-        except Exception as e:
-            print(f"[AI-Pile] Error loading: {e}")
-            print("[AI-Pile] Skipping AI-Pile dataset")
-            import traceback
-            traceback.print_exc()
-            return []
-
-    def prepare_combined_dataset(self, max_raid: int = 100000, max_hc3: int = 50000, max_pile: int = 50000):
+    def prepare_combined_dataset(self, max_raid: int = 100000, max_hc3: int = 50000, max_pile: int = 50000,
+                                 offline: bool = False):
         """
         Combine all public datasets
+
+        Sources are streamed into the local corpus first (resumable, deduplicated,
+        skipped when already cached); offline=True uses only what is cached.
         """
         print("="*80)
         print("LOADING PUBLIC DATASETS")
         print("="*80)
         print()
 
-        all_samples = []
-
-        # Load RAID (priority - has adversarial attacks)
-        if max_raid > 0:
-            raid_samples = self.load_raid_dataset(max_raid)
-            all_samples.extend(raid_samples)
-            print()
-        else:
-            print("[RAID] Skipped (max_samples=0)")
-            print()
-
-        # Load HC3
-        if max_hc3 > 0:
-            hc3_samples = self.load_hc3_dataset(max_hc3)
-            all_samples.extend(hc3_samples)
-            print()
-        else:
-            print("[HC3] Skipped (max_samples=0)")
+        # RAID first (priority - has adversarial attacks)
+        limits = {'raid': max_raid, 'hc3': max_hc3, 'ai_pile': max_pile}
+        for source, max_samples in limits.items():
+            if max_samples <= 0:
+                print(f"[{source}] Skipped (max_samples=0)")
+            elif offline:
+                print(f"[{source}] Offline - using cached corpus only")
+            else:
+                try:
+                    public_corpus.ingest(source, max_samples)
+                except Exception as e:
+                    print(f"[{source}] Error streaming: {e}")
+                    print(f"[{source}] Continuing with whatever is cached")
             print()
 
-        # Load AI Detection Pile
-        if max_pile > 0:
-            pile_samples = self.load_ai_detection_pile(max_pile)
-            all_samples.extend(pile_samples)
-            print()
-        else:
-            print("[AI-Pile] Skipped (max_samples=0)")
-            print()
-
-        print(f"TOTAL COMBINED SAMPLES: {len(all_samples)}")
-
-        # Balance classes
-        human_samples = [s for s in all_samples if s['label'] == 0]
-        ai_samples = [s for s in all_samples if s['label'] == 1]
-
-        print(f"  Human: {len(human_samples)}")
-        print(f"  AI: {len(ai_samples)}")
-
-        # Balance to equal sizes
-        min_size = min(len(human_samples), len(ai_samples))
-        import random
-        random.shuffle(human_samples)
-        random.shuffle(ai_samples)
-
-        balanced_samples = human_samples[:min_size] + ai_samples[:min_size]
-        random.shuffle(balanced_samples)
-
-        print(f"  Balanced: {len(balanced_samples)} ({min_size} each)")
+        # Count labels in a first pass so balancing can stream (two counters per label)
+        counts = Counter(ex['label'] for ex in public_corpus.iter_examples(limits))
+        print(f"TOTAL COMBINED SAMPLES: {sum(counts.values())}")
+        print(f"  Human: {counts[0]}")
+        print(f"  AI: {counts[1]}")
+
+        # Balance to equal sizes: keep each example with probability needed/unseen
+        min_size = min(counts[0], counts[1])
+        needed = {0: min_size, 1: min_size}
+        unseen = dict(counts)
+        texts, labels = [], []
+        for ex in public_corpus.iter_examples(limits):
+            label = ex['label']
+            keep = random.random() * unseen[label] < needed[label]
+            unseen[label] -= 1
+            if keep:
+                needed[label] -= 1
+                texts.append(ex['text'])
+                labels.append(label)
+
+        print(f"  Balanced: {len(texts)} ({min_size} each)")
         print()
 
-        # Split train/val/test
-        texts = [s['text'] for s in balanced_samples]
-        labels = [s['label'] for s in balanced_samples]
-
+        # Split train/val/test (train_test_split shuffles)
         train_texts, temp_texts, train_labels, temp_labels = train_test_split(
             texts, labels, test_size=0.2, random_state=42, stratify=labels
         )
@@ -296,7 +135,8 @@ class PublicDatasetTrainer:
         learning_rate: float = 2e-5,
         max_raid: int = 100000,
         max_hc3: int = 50000,
-        max_pile: int = 50000
+        max_pile: int = 50000,
+        offline: bool = False
     ):
         """
         Pre-train model on public datasets
@@ -307,7 +147,7 @@ class PublicDatasetTrainer:
         print()
 
         # Load and combine datasets
-        dataset_dict = self.prepare_combined_dataset(max_raid, max_hc3, max_pile)
+        dataset_dict = self.prepare_combined_dataset(max_raid, max_hc3, max_pile, offline=offline)
 
         # Load tokenizer and model
         print(f"Loading base model: {base_model}")
@@ -320,25 +160,11 @@ class PublicDatasetTrainer:
         )
         print()
 
-        # Tokenize
-        from datasets import Dataset
-
-        def tokenize_function(examples):
-            return tokenizer(
-                examples['text'],
-                padding='max_length',
-                truncation=True,
-                max_length=512
-            )
-
-        train_dataset = Dataset.from_dict(dataset_dict['train'])
-        val_dataset = Dataset.from_dict(dataset_dict['val'])
-        test_dataset = Dataset.from_dict(dataset_dict['test'])
-
+        # Tokenize (cached across runs; unpadded, padded per batch by the collator)
         print("Tokenizing datasets...")
-        train_dataset = train_dataset.map(tokenize_function, batched=True)
-        val_dataset = val_dataset.map(tokenize_function, batched=True)
-        test_dataset = test_dataset.map(tokenize_function, batched=True)
+        train_dataset = tokenized_cache.load_or_tokenize(tokenizer, dataset_dict['train'], name='train')
+        val_dataset = tokenized_cache.load_or_tokenize(tokenizer, dataset_dict['val'], name='val')
+        test_dataset = tokenized_cache.load_or_tokenize(tokenizer, dataset_dict['test'], name='test')
         print()
 
         # Training setup
@@ -363,6 +189,8 @@ class PublicDatasetTrainer:
             metric_for_best_model="f1",
             greater_is_better=True,
             save_total_limit=3,
+            group_by_length=True,  # Length-bucketed batches, so short examples pad less
+            length_column_name='length',
             report_to="none"
         )
 
@@ -372,6 +200,7 @@ class PublicDatasetTrainer:
             args=training_args,
             train_dataset=train_dataset,
             eval_dataset=val_dataset,
+            data_collator=tokenized_cache.collator(tokenizer),
             compute_metrics=self.compute_metrics,
             callbacks=[EarlyStoppingCallback(early_stopping_patience=3)]
         )
@@ -465,6 +294,8 @@ def main():
                       help='Max HC3 samples (default: 50k)')
     parser.add_argument('--max-pile', type=int, default=50000,
                       help='Max AI-Pile samples (default: 50k)')
+    parser.add_argument('--offline', action='store_true',
+                      help='Train on the cached local corpus only (no downloads)')
 
     args = parser.parse_args()
 
@@ -475,7 +306,8 @@ def main():
         learning_rate=args.learning_rate,
         max_raid=args.max_raid,
         max_hc3=args.max_hc3,
-        max_pile=args.max_pile
+        max_pile=args.max_pile,
+        offline=args.offline
     )
 
 
@@ -0,0 +1,21 @@
+"""
+Entry-point modules must import on their own: each runs in a fresh
+interpreter, so an import cycle can't hide behind an earlier import
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("module", ["app.ml.distill", "benchmarks.ensemble_eval"])
+def test_module_imports_standalone(module):
+    result = subprocess.run(
+        [sys.executable, "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,64 @@
+"""
+Incoming traceparent headers: well-formed ones join the caller's trace,
+anything else starts a fresh root trace instead of failing the request
+"""
+import pytest
+
+from app.tracing import Tracer, SpanExporter, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class RecordingExporter(SpanExporter):
+    def __init__(self):
+        self.traces = []
+
+    def submit(self, trace):
+        self.traces.append(trace)
+
+
+def test_parse_valid_traceparent():
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, 1)
+
+
+def test_parse_future_version_ignores_extra_fields():
+    assert parse_traceparent(f"01-{TRACE_ID}-{PARENT_ID}-00-extra") == (TRACE_ID, PARENT_ID, 0)
+
+
+@pytest.mark.parametrize("header", [
+    "",
+    "garbage",
+    f"00-{TRACE_ID}-{PARENT_ID}",
+    f"00-{TRACE_ID}-{PARENT_ID}-01-extra",
+    f"ff-{TRACE_ID}-{PARENT_ID}-01",
+    f"0-{TRACE_ID}-{PARENT_ID}-01",
+    f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-{PARENT_ID}0-01",
+    f"00-{TRACE_ID}-{PARENT_ID}-1",
+    f"00-{TRACE_ID}-{PARENT_ID}-zz",
+    f"00-{'g' * 32}-{PARENT_ID}-01",
+    f"00-{TRACE_ID.upper()}-{PARENT_ID}-01",
+    f"00-{'0' * 32}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-{'0' * 16}-01",
+])
+def test_parse_malformed_traceparent(header):
+    assert parse_traceparent(header) is None
+
+
+def test_start_trace_joins_valid_traceparent():
+    exporter = RecordingExporter()
+    tracer = Tracer(sample_rate=0.0, exporter=exporter)
+    with tracer.start_trace("request", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01") as root:
+        assert root.trace.trace_id == TRACE_ID
+        assert root.parent_span_id == PARENT_ID
+    assert len(exporter.traces) == 1
+
+
+@pytest.mark.parametrize("header", [f"00-{TRACE_ID}-{PARENT_ID}-zz", f"00-{'0' * 32}-{PARENT_ID}-01"])
+def test_start_trace_falls_back_to_fresh_root(header):
+    tracer = Tracer(sample_rate=0.0, exporter=RecordingExporter())
+    with tracer.start_trace("request", traceparent=header) as root:
+        assert root.trace.trace_id != TRACE_ID
+        assert len(root.trace.trace_id) == 32
+        assert root.parent_span_id is None
@@ -0,0 +1,33 @@
+"""
+Modules vendored into the standalone services must stay copies of their
+canonical source: only the header comment and the settings import differ
+"""
+import os
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VENDORED = [
+    ("backend/app/logging_setup.py", "ai-detector-engine/logging_setup.py"),
+    ("ai-detector-engine/prefork.py", "ai-model-server/prefork.py"),
+]
+
+
+def _body(path: str) -> str:
+    with open(os.path.join(REPO_DIR, path)) as f:
+        lines = f.read().splitlines()
+    # Drop the vendoring header and normalize the settings import
+    while lines and lines[0].startswith('#'):
+        lines.pop(0)
+    return '\n'.join(
+        'from config import settings' if line == 'from app.config import settings' else line
+        for line in lines
+    )
+
+
+@pytest.mark.parametrize("canonical,vendored", VENDORED)
+def test_vendored_copy_matches(canonical, vendored):
+    with open(os.path.join(REPO_DIR, vendored)) as f:
+        assert f.readline().startswith(f"# Vendored from {canonical}")
+    assert _body(vendored) == _body(canonical)
@@ -19,6 +19,10 @@ async def main():
                       help='Training batch size (default: 16)')
     parser.add_argument('--learning-rate', type=float, default=2e-5,
                       help='Learning rate (default: 2e-5)')
+    parser.add_argument('--incremental', action='store_true',
+                      help='Continue from the latest registered model on new examples only')
+    parser.add_argument('--replay-ratio', type=float, default=0.5,
+                      help='Incremental: older examples replayed per new example (default: 0.5)')
     parser.add_argument('--export-only', action='store_true',
                       help='Only export data, do not train')
     parser.add_argument('--stats', action='store_true',
@@ -36,7 +40,7 @@ async def main():
     stats = await training_collector.get_stats()
 
     print(f"\nTraining Data Statistics:")
-    print(f"  Total Examples: {stats['total_examples']}")
+    print(f"  Total Examples: {stats['total_examples']} unique ({stats['total_votes']} verifications)")
     print(f"  By Label:")
     for label, count in stats['by_label'].items():
         print(f"    - {label}: {count}")
@@ -51,15 +55,16 @@ async def main():
     # Export data if requested
     if args.export_only:
         print("📤 Exporting training data...")
-        count = await training_collector.export_for_training()
-        print(f"✅ Exported {count} examples to training_data.jsonl")
+        export = await training_collector.export_for_training()
+        print(f"✅ Exported {export['count']} examples to {', '.join(export['shards'])}")
         return
 
-    # Check if we have enough data
-    if stats['available_for_training'] < args.min_examples:
+    # Check if we have enough data (full runs also reuse examples earlier models saw)
+    available = stats['available_for_training'] if args.incremental else stats['confirmed']
+    if available < args.min_examples:
         print(f"❌ Not enough training data!")
         print(f"   Need: {args.min_examples}")
-        print(f"   Have: {stats['available_for_training']}")
+        print(f"   Have: {available}")
         print()
         print("💡 Collect more verifications from users before training.")
         return
@@ -75,7 +80,9 @@ async def main():
         num_epochs=args.epochs,
         batch_size=args.batch_size,
         learning_rate=args.learning_rate,
-        min_examples=args.min_examples
+        min_examples=args.min_examples,
+        incremental=args.incremental,
+        replay_ratio=args.replay_ratio
     )
 
     if result is None:
@@ -107,5 +114,13 @@ async def main():
     print(f"   {result['model_path']}")
 
 
+async def run():
+    try:
+        await main()
+    finally:
+        # Commits anything queued and stops the connection threads so the script can exit
+        await training_collector.close()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(run())